@@ -0,0 +1,561 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+"""Benchmarks of all public functions of protlearn.
+
+Each public function is timed (and its peak memory measured) on synthetic
+datasets of peptides or proteins of different sizes. Results are stored as
+JSON and two result files can be compared to find regressions.
+
+Usage
+-----
+
+    python benchmarks/bench.py run -o results.json
+    python benchmarks/bench.py run --datasets protein --sizes 100 10000 \\
+        --functions aaindex2 ngram_composition -o aaindex2.json
+    python benchmarks/bench.py compare baseline.json results.json
+
+compare exits with status 1 if any benchmark got slower (or used more
+memory) than the threshold allows.
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+import protlearn
+from protlearn.tables import AMINO_ACIDS
+
+
+# amino acid background frequencies of UniProtKB/Swiss-Prot (in %)
+BACKGROUND = np.array([8.25, 1.37, 5.45, 6.75, 3.86, 7.07, 2.27, 5.96, 5.84,
+                       9.66, 2.42, 4.06, 4.70, 3.93, 5.53, 6.56, 5.34, 6.87,
+                       1.08, 2.92])
+BACKGROUND /= BACKGROUND.sum()
+
+# synthetic datasets: (minimum length, maximum length, median length)
+DATASETS = {
+    'peptide': (10, 30, None),
+    'protein': (50, 5000, 350),
+}
+
+SIZES = [100, 1000, 10000]
+
+
+def random_sequences(n_samples, min_len, max_len=None, median_len=None,
+                     seed=0):
+    """Random amino acid sequences with natural residue frequencies.
+
+    Parameters
+    ----------
+
+    n_samples : int
+        Number of sequences.
+
+    min_len : int
+        Length of the shortest sequence.
+
+    max_len : int, default=None
+        Length of the longest sequence. None means min_len.
+
+    median_len : int, default=None
+        If given, lengths are drawn from a log-normal distribution with this
+        median (clipped to [min_len, max_len]), as for natural proteins.
+        Otherwise, lengths are uniformly distributed.
+
+    seed : int, default=0
+        Seed of the random number generator.
+
+    Returns
+    -------
+
+    df : Pandas DataFrame of shape (n_samples, 1) with column 'Sequence'
+
+    """
+
+    rng = np.random.default_rng(seed)
+    max_len = max_len or min_len
+    if median_len is None:
+        lengths = rng.integers(min_len, max_len+1, n_samples)
+    else:
+        lengths = rng.lognormal(np.log(median_len), 0.7, n_samples)
+        lengths = np.clip(lengths.astype(np.int64), min_len, max_len)
+
+    # draw all residues at once and split them into sequences
+    residues = rng.choice(np.frombuffer(AMINO_ACIDS.encode(), np.uint8),
+                          size=lengths.sum(), p=BACKGROUND)
+    text = residues.tobytes().decode('ascii')
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    return pd.DataFrame({'Sequence': [text[lo:hi] for lo, hi in
+                                      zip(offsets[:-1], offsets[1:])]})
+
+
+def dataset(name, n_samples, seed=0):
+    "Synthetic dataset of DATASETS"
+
+    min_len, max_len, median_len = DATASETS[name]
+
+    return random_sequences(n_samples, min_len, max_len, median_len, seed)
+
+
+def _text_file(df, tmpdir):
+    "Write sequences to a .txt file (one sequence per line)"
+
+    path = os.path.join(tmpdir, 'sequences.txt')
+    df['Sequence'].to_csv(path, header=False, index=False)
+
+    return path
+
+
+def _queries(n_queries=400, seed=0):
+    "Random (position, amino acid) queries for position_enrichment"
+
+    rng = np.random.default_rng(seed)
+
+    return (list(rng.integers(1, 30, n_queries)),
+            list(rng.choice(list(AMINO_ACIDS), n_queries)))
+
+
+def _featurize_one(df):
+    "featurize_one for (up to) the first 1000 sequences, one call each"
+
+    seqs = list(df['Sequence'][:1000])
+    return lambda: [protlearn.featurize_one(seq) for seq in seqs]
+
+
+def _with_tables(run, seed=0):
+    "Register random residue scales and pair matrices before a benchmark"
+
+    rng = np.random.default_rng(seed)
+    protlearn.register_table('bench_scales', rng.normal(size=(20, 50)))
+    protlearn.register_table('bench_pairs', rng.normal(size=(50, 20, 20)))
+
+    return run
+
+
+def _register_table(seed=0):
+    "Register and remove a stack of pair matrices"
+
+    tables = np.random.default_rng(seed).normal(size=(50, 20, 20))
+
+    def run():
+        protlearn.register_table('bench_register', tables)
+        protlearn.unregister_table('bench_register')
+
+    return run
+
+
+def _cache(df, tmpdir):
+    "aaindex1 with a FeatureCache, once filling and once reading it"
+
+    path = os.path.join(tmpdir, 'features.db')
+
+    def run():
+        cache = protlearn.FeatureCache(path)
+        protlearn.aaindex1(df, cache=cache)
+        protlearn.aaindex1(df, cache=cache)
+        cache.clear()
+        cache.close()
+
+    return run
+
+
+# benchmarks: name -> (public function, setup(df, tmpdir) -> callable)
+CASES = {
+    'txt_to_df': ('txt_to_df', lambda df, tmp:
+                  lambda path=_text_file(df, tmp): protlearn.txt_to_df(path)),
+    'read_chunks': ('read_chunks', lambda df, tmp:
+                    lambda path=_text_file(df, tmp):
+                    list(protlearn.read_chunks(path, chunksize=10000))),
+    'integer_encode': ('integer_encode', lambda df, tmp:
+                       lambda: protlearn.integer_encode(df)),
+    'SequenceBatch': ('SequenceBatch', lambda df, tmp:
+                      lambda: protlearn.SequenceBatch(df)),
+    'length': ('length', lambda df, tmp: lambda: protlearn.length(df)),
+    'length[ohe]': ('length', lambda df, tmp:
+                    lambda: protlearn.length(df, 'ohe')),
+    'composition': ('composition', lambda df, tmp:
+                    lambda: protlearn.composition(df)),
+    'aaindex1': ('aaindex1', lambda df, tmp: lambda: protlearn.aaindex1(df)),
+    'aaindex2': ('aaindex2', lambda df, tmp: lambda: protlearn.aaindex2(df)),
+    'aaindex3': ('aaindex3', lambda df, tmp: lambda: protlearn.aaindex3(df)),
+    'ngram_composition': ('ngram_composition', lambda df, tmp:
+                          lambda: protlearn.ngram_composition(df)),
+    'ngram_composition[3,sparse]': ('ngram_composition', lambda df, tmp:
+                                    lambda: protlearn.ngram_composition(
+                                        df, ngram=3, output='sparse')),
+    'custom_index[scales]': ('custom_index', lambda df, tmp:
+                             _with_tables(lambda: protlearn.custom_index(
+                                 df, 'bench_scales'))),
+    'custom_index[pairs]': ('custom_index', lambda df, tmp:
+                            _with_tables(lambda: protlearn.custom_index(
+                                df, 'bench_pairs'))),
+    'register_table': ('register_table', lambda df, tmp: _register_table()),
+    'unregister_table': ('unregister_table', lambda df, tmp:
+                         _register_table()),
+    'position_enrichment': ('position_enrichment', lambda df, tmp:
+                            lambda q=_queries():
+                            protlearn.position_enrichment(df, *q)),
+    'kmer_vocabulary': ('kmer_vocabulary', lambda df, tmp:
+                        lambda: protlearn.kmer_vocabulary(4)),
+    'kmer_to_string': ('kmer_to_string', lambda df, tmp:
+                       lambda ids=np.arange(0, 20**6, 97):
+                       protlearn.kmer_to_string(ids, 6)),
+    'kmer_to_id': ('kmer_to_id', lambda df, tmp:
+                   lambda kmers=protlearn.kmer_to_string(
+                       np.arange(0, 20**6, 97), 6):
+                   protlearn.kmer_to_id(kmers)),
+    'featurize': ('featurize', lambda df, tmp:
+                  lambda: protlearn.featurize(df)),
+    'featurize_one[per sequence]': ('featurize_one', lambda df, tmp:
+                                    _featurize_one(df)),
+    'feature_names': ('feature_names', lambda df, tmp:
+                      lambda: protlearn.feature_names()),
+    'featurize_into[memmap]': ('featurize_into', lambda df, tmp:
+                               lambda: protlearn.featurize_into(
+                                   df, os.path.join(tmp, 'features.npy'))),
+    'CompositionTransformer': ('CompositionTransformer', lambda df, tmp:
+                               lambda: protlearn.CompositionTransformer()
+                               .fit_transform(df)),
+    'AAIndex1Transformer': ('AAIndex1Transformer', lambda df, tmp:
+                            lambda: protlearn.AAIndex1Transformer()
+                            .fit_transform(df)),
+    'AAIndex2Transformer': ('AAIndex2Transformer', lambda df, tmp:
+                            lambda: protlearn.AAIndex2Transformer()
+                            .fit_transform(df)),
+    'AAIndex3Transformer': ('AAIndex3Transformer', lambda df, tmp:
+                            lambda: protlearn.AAIndex3Transformer()
+                            .fit_transform(df)),
+    'NGramTransformer': ('NGramTransformer', lambda df, tmp:
+                         lambda: protlearn.NGramTransformer()
+                         .fit_transform(df)),
+    'TableTransformer': ('TableTransformer', lambda df, tmp:
+                         _with_tables(lambda: protlearn.TableTransformer(
+                             'bench_pairs').fit_transform(df))),
+    'LengthTransformer': ('LengthTransformer', lambda df, tmp:
+                          lambda: protlearn.LengthTransformer()
+                          .fit_transform(df)),
+    'summarize': ('summarize', lambda df, tmp:
+                  lambda: protlearn.summarize(df, ngrams=(1, 2, 3))),
+    'DatasetSummary': ('DatasetSummary', lambda df, tmp:
+                       lambda: protlearn.DatasetSummary((2, 5)).update(df)
+                       .merge(protlearn.DatasetSummary((2, 5)).update(df))),
+    'viz_length': ('viz_length', lambda df, tmp:
+                   lambda: protlearn.viz_length(df, get_data=True,
+                                                plot=False)),
+    'viz_composition': ('viz_composition', lambda df, tmp:
+                        lambda: protlearn.viz_composition(df, get_data=True,
+                                                          plot=False)),
+    'viz_ngram': ('viz_ngram', lambda df, tmp:
+                  lambda: protlearn.viz_ngram(df, get_data=True, plot=False)),
+    'load_table': ('load_table', lambda df, tmp:
+                   lambda: (protlearn.clear_table_cache(),
+                            protlearn.load_table('aaindex1'))),
+    'table_cache_info': ('table_cache_info', lambda df, tmp:
+                         protlearn.table_cache_info),
+    'clear_table_cache': ('clear_table_cache', lambda df, tmp:
+                          protlearn.clear_table_cache),
+    'table_version': ('table_version', lambda df, tmp:
+                      lambda: protlearn.table_version('aaindex2')),
+    'FeatureCache': ('FeatureCache', _cache),
+}
+
+
+def public_functions():
+    "Names of all functions and classes exported by protlearn/__init__.py"
+
+    return sorted(name for name in protlearn.__all__
+                  if inspect.isfunction(getattr(protlearn, name)) or
+                  inspect.isclass(getattr(protlearn, name)))
+
+
+# import benchmarks: name -> statement timed in a fresh interpreter
+IMPORTS = {
+    'import protlearn': 'import protlearn',
+    'import protlearn.composition': 'import protlearn; protlearn.composition',
+    'import protlearn.viz_length': 'import protlearn; protlearn.viz_length',
+}
+
+# dependencies whose import is reported by the import benchmarks
+HEAVY_MODULES = ['pandas', 'scipy', 'sklearn', 'matplotlib', 'seaborn',
+                 'pkg_resources']
+
+_IMPORT_SCRIPT = """
+import sys, time, tracemalloc
+sys.path.insert(0, %r)
+if sys.argv[1] == 'memory':
+    tracemalloc.start()
+t0 = time.perf_counter()
+%s
+elapsed = time.perf_counter() - t0
+peak = tracemalloc.get_traced_memory()[1] if sys.argv[1] == 'memory' else 0
+print(elapsed, peak, ','.join(m for m in %r if m in sys.modules))
+"""
+
+
+def measure_import(statement, repeat=3, memory=True):
+    """Import times, peak memory and loaded heavy modules of a statement.
+
+    Each run uses a fresh interpreter, so nothing is imported beforehand. The
+    peak memory is measured in a separate run (0 if memory=False).
+    """
+
+    script = _IMPORT_SCRIPT % (os.path.join(os.path.dirname(
+        os.path.abspath(__file__)), '..'), statement, HEAVY_MODULES)
+
+    def run(mode):
+        out = subprocess.run([sys.executable, '-c', script, mode], check=True,
+                             stdout=subprocess.PIPE,
+                             universal_newlines=True).stdout.split()
+        return float(out[0]), int(out[1]), out[2].split(',') if\
+               len(out) > 2 else []
+
+    runs = [run('time') for _ in range(repeat)]
+    peak = run('memory')[1] if memory else 0
+
+    return [t for t, _, _ in runs], peak, runs[-1][2]
+
+
+def measure(func, repeat=3):
+    """Run times and peak memory of a function.
+
+    The function is timed repeat times. Its peak memory (of all allocations
+    traced by tracemalloc, including numpy arrays) is measured in a separate
+    run, since tracing slows down the function.
+    """
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return times, peak
+
+
+def run(datasets=('peptide', 'protein'), sizes=SIZES, functions=None,
+        repeat=3, max_residues=2*10**7, seed=0, verbose=True):
+    """Benchmark the public functions on synthetic datasets.
+
+    Parameters
+    ----------
+
+    datasets : list of strings, default=('peptide', 'protein')
+        Names of datasets in DATASETS.
+
+    sizes : list of int, default=SIZES
+        Numbers of sequences.
+
+    functions : list of strings, default=None
+        Names of benchmarks (keys of CASES or IMPORTS) or public functions to
+        run, or 'import' for all import benchmarks. None runs all 
+        benchmarks.
+
+    repeat : int, default=3
+        Number of timed runs of each benchmark.
+
+    max_residues : int, default=2*10**7
+        Datasets with more residues are skipped.
+
+    seed : int, default=0
+        Seed of the dataset generators.
+
+    verbose : bool, default=True
+        Print each result.
+
+    Returns
+    -------
+
+    results : dict with keys 'meta' (environment) and 'results' (one dict per
+              benchmark, dataset and size)
+
+    """
+
+    cases = {name: case for name, case in CASES.items() if functions is None
+             or name in functions or case[0] in functions}
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in datasets:
+            for n_samples in sizes:
+                df = dataset(name, n_samples, seed)
+                n_residues = int(df['Sequence'].str.len().sum())
+                if n_residues > max_residues:
+                    if verbose:
+                        print('skip %s x %d (%d residues)'
+                              % (name, n_samples, n_residues))
+                    continue
+
+                for case, (function, setup) in cases.items():
+                    times, peak = measure(setup(df, tmpdir), repeat)
+                    result = {'benchmark': case, 'function': function,
+                              'dataset': name, 'n_samples': n_samples,
+                              'n_residues': n_residues,
+                              'time': float(np.min(times)),
+                              'times': times, 'peak_memory': peak}
+                    results.append(result)
+                    if verbose:
+                        print('%-30s %-8s %8d %10.4fs %10.1f MB'
+                              % (case, name, n_samples, result['time'],
+                                 peak/2**20))
+
+    # import times, independent of the datasets
+    for case, statement in IMPORTS.items():
+        if functions is not None and case not in functions and\
+           'import' not in functions:
+            continue
+        times, peak, modules = measure_import(statement, repeat)
+        results.append({'benchmark': case, 'function': 'import',
+                        'dataset': 'none', 'n_samples': 0, 'n_residues': 0,
+                        'time': float(np.min(times)), 'times': times,
+                        'peak_memory': peak, 'modules': modules})
+        if verbose:
+            print('%-30s %-8s %8d %10.4fs %10.1f MB  %s'
+                  % (case, 'none', 0, results[-1]['time'], peak/2**20,
+                     ' '.join(modules)))
+
+    meta = {'protlearn': getattr(protlearn, '__version__', None),
+            'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'uncovered': sorted(set(public_functions()) -
+                                {case[0] for case in CASES.values()})}
+
+    return {'meta': meta, 'results': results}
+
+
+def compare(baseline, current, threshold=0.2, min_time=1e-3,
+            memory_threshold=0.2):
+    """Find regressions between two benchmark results.
+
+    Parameters
+    ----------
+
+    baseline, current : dict
+        Results of run (e.g. loaded from JSON).
+
+    threshold : float, default=0.2
+        Relative slowdown above which a benchmark counts as a regression.
+
+    min_time : float, default=1e-3
+        Slowdowns of less than min_time seconds are ignored as noise.
+
+    memory_threshold : float, default=0.2
+        Relative increase in peak memory above which a benchmark counts as a
+        regression.
+
+    Returns
+    -------
+
+    rows : list of dict
+        One row per benchmark present in both results, with the time and
+        memory ratios (current/baseline) and whether it regressed.
+
+    """
+
+    def key(result):
+        return result['benchmark'], result['dataset'], result['n_samples']
+
+    old = {key(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        if key(result) not in old:
+            continue
+        before = old[key(result)]
+        time_ratio = result['time'] / max(before['time'], 1e-12)
+        memory_ratio = result['peak_memory'] / max(before['peak_memory'], 1)
+        slower = time_ratio > 1+threshold and\
+                 result['time'] - before['time'] > min_time
+        larger = memory_ratio > 1+memory_threshold and\
+                 result['peak_memory'] - before['peak_memory'] > 2**20
+        rows.append({'benchmark': result['benchmark'],
+                     'dataset': result['dataset'],
+                     'n_samples': result['n_samples'],
+                     'time': result['time'], 'baseline_time': before['time'],
+                     'time_ratio': time_ratio, 'memory_ratio': memory_ratio,
+                     'regression': bool(slower or larger)})
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command')
+
+    run_parser = commands.add_parser('run', help='run benchmarks')
+    run_parser.add_argument('-o', '--output', default='benchmarks.json',
+                            help='JSON file to write results to')
+    run_parser.add_argument('--datasets', nargs='+', default=list(DATASETS),
+                            choices=list(DATASETS))
+    run_parser.add_argument('--sizes', nargs='+', type=int, default=SIZES,
+                            help='numbers of sequences (e.g. 100 1000000)')
+    run_parser.add_argument('--functions', nargs='+', default=None,
+                            help='benchmarks or public functions to run')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--max-residues', type=int, default=2*10**7,
+                            help='skip datasets with more residues')
+    run_parser.add_argument('--seed', type=int, default=0)
+
+    compare_parser = commands.add_parser('compare',
+                                         help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='relative slowdown flagged as '
+                                     'regression (default: 0.2)')
+    compare_parser.add_argument('--min-time', type=float, default=1e-3,
+                                help='ignore slowdowns below this many '
+                                     'seconds (default: 0.001)')
+    compare_parser.add_argument('--memory-threshold', type=float,
+                                default=0.2)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.error('the following arguments are required: command')
+    if args.command == 'run':
+        results = run(args.datasets, args.sizes, args.functions, args.repeat,
+                      args.max_residues, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+        if results['meta']['uncovered']:
+            print('no benchmark for: %s'
+                  % ', '.join(results['meta']['uncovered']))
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold, args.min_time,
+                   args.memory_threshold)
+    for row in rows:
+        print('%-30s %-8s %8d %10.4fs %7.2fx time %7.2fx memory%s'
+              % (row['benchmark'], row['dataset'], row['n_samples'],
+                 row['time'], row['time_ratio'], row['memory_ratio'],
+                 '  REGRESSION' if row['regression'] else ''))
+    regressions = sum(row['regression'] for row in rows)
+    print('%d of %d benchmarks regressed' % (regressions, len(rows)))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
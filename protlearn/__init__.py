@@ -1,14 +1,92 @@
-from protlearn.preprocessing import txt_to_df
-from protlearn.preprocessing import integer_encode
-
-from protlearn.feature_engineering import length
-from protlearn.feature_engineering import composition
-from protlearn.feature_engineering import aaindex1
-from protlearn.feature_engineering import aaindex2
-from protlearn.feature_engineering import aaindex3
-from protlearn.feature_engineering import ngram_composition
-from protlearn.feature_engineering import position_enrichment
-
-from protlearn.visualize import viz_length
-from protlearn.visualize import viz_composition
-from protlearn.visualize import viz_ngram
\ No newline at end of file
+"""Preprocessing, feature engineering, and visualization of protein and
+peptide sequences.
+
+The public functions are imported from their modules on first access, so
+that `import protlearn` does not load pandas, scikit-learn, or the plotting
+libraries until they are needed. Python versions before 3.7 do not support
+module-level __getattr__, so there all public functions are imported
+eagerly.
+"""
+
+import sys
+import importlib
+
+# public names and the modules they are defined in
+_EXPORTS = {
+    'txt_to_df': 'preprocessing',
+    'integer_encode': 'preprocessing',
+    'read_chunks': 'preprocessing',
+    'SequenceBatch': 'preprocessing',
+
+    'length': 'feature_engineering',
+    'composition': 'feature_engineering',
+    'aaindex1': 'feature_engineering',
+    'aaindex2': 'feature_engineering',
+    'aaindex3': 'feature_engineering',
+    'ngram_composition': 'feature_engineering',
+    'position_enrichment': 'feature_engineering',
+    'custom_index': 'feature_engineering',
+    'kmer_vocabulary': 'feature_engineering',
+    'kmer_to_string': 'feature_engineering',
+    'kmer_to_id': 'feature_engineering',
+
+    'featurize': 'pipeline',
+    'featurize_one': 'pipeline',
+    'feature_names': 'pipeline',
+    'featurize_into': 'pipeline',
+
+    'CompositionTransformer': 'transformers',
+    'AAIndex1Transformer': 'transformers',
+    'AAIndex2Transformer': 'transformers',
+    'AAIndex3Transformer': 'transformers',
+    'NGramTransformer': 'transformers',
+    'LengthTransformer': 'transformers',
+    'TableTransformer': 'transformers',
+
+    'DatasetSummary': 'summary',
+    'summarize': 'summary',
+
+    'viz_length': 'visualize',
+    'viz_composition': 'visualize',
+    'viz_ngram': 'visualize',
+
+    'load_table': 'tables',
+    'table_cache_info': 'tables',
+    'clear_table_cache': 'tables',
+    'table_version': 'tables',
+    'register_table': 'tables',
+    'unregister_table': 'tables',
+
+    'FeatureCache': 'cache',
+}
+
+_SUBMODULES = {'preprocessing', 'feature_engineering', 'pipeline',
+               'transformers', 'summary', 'visualize', 'tables', 'cache',
+               'parallel'}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module('protlearn.' + _EXPORTS[name])
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module('protlearn.' + name)
+    else:
+        raise AttributeError("module 'protlearn' has no attribute %r" % name)
+
+    # later lookups bypass __getattr__
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | _SUBMODULES)
+
+
+if sys.version_info < (3, 7):
+    for _name in _EXPORTS:
+        __getattr__(_name)
+    del _name
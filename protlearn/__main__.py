@@ -0,0 +1,4 @@
+import sys
+from protlearn.cli import main
+
+sys.exit(main())
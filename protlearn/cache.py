@@ -0,0 +1,205 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+import time
+import sqlite3
+import hashlib
+import numpy as np
+from protlearn.preprocessing import SequenceBatch
+
+
+class FeatureCache:
+    """Persistent cache of per-sequence feature rows.
+
+    A FeatureCache can be passed to composition, aaindex1, aaindex2, aaindex3
+    and ngram_composition via their cache argument. Raw (unstandardized)
+    feature rows are stored per sequence in an SQLite database, keyed by a
+    hash of the (sliced) sequence, the feature, its parameters and the version
+    of the index table it is computed from. Only sequences that are not in
+    the cache are computed; standardization and column removal are applied
+    to the assembled matrix, so results are identical to uncached calls.
+
+    Parameters
+    ----------
+
+    path : string
+        Path of the SQLite database. It is created if it does not exist.
+
+    max_bytes : int, default=None
+        Upper bound for the size of the stored rows. If exceeded, the least
+        recently used rows are evicted. None means unbounded.
+
+    Attributes
+    ----------
+
+    hits : int
+        Number of rows read from the cache.
+
+    misses : int
+        Number of rows that had to be computed.
+
+    Notes
+    -----
+
+    Since rows are keyed by the sliced sequence, calls with different start
+    and end share all rows of identical subsequences.
+
+    """
+
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS rows (key BLOB PRIMARY "
+                         "KEY, value BLOB NOT NULL, used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS rows_used ON rows(used)")
+        self._db.commit()
+        self._nbytes = self._db.execute("SELECT COALESCE(SUM(LENGTH(value)), "
+                                        "0) FROM rows").fetchone()[0]
+
+    def keys(self, sequences, feature, params, version=''):
+        """Cache keys of sequences for a feature.
+
+        Parameters
+        ----------
+
+        sequences : list of bytes
+            Encoded (sliced) sequences.
+
+        feature : string
+            Name of the feature.
+
+        params : tuple
+            Parameters the feature rows depend on (besides the sequence).
+
+        version : string, default=''
+            Version of the table the feature is computed from.
+
+        Returns
+        -------
+
+        keys : list of bytes
+
+        """
+
+        namespace = hashlib.blake2b(repr((feature, params, version)).encode(),
+                                    digest_size=16).digest()
+        hasher = hashlib.blake2b(namespace, digest_size=16)
+        keys = []
+        for seq in sequences:
+            h = hasher.copy()
+            h.update(seq)
+            keys.append(h.digest())
+
+        return keys
+
+    def get(self, keys):
+        "Stored rows of the given keys, as a dict of bytes"
+
+        found = {}
+        unique = list(set(keys))
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i+500]
+            found.update(self._db.execute(
+                "SELECT key, value FROM rows WHERE key IN (%s)"
+                % ','.join('?'*len(chunk)), chunk))
+
+        # mark rows as recently used
+        now = time.time()
+        self._db.executemany("UPDATE rows SET used = ? WHERE key = ?",
+                             [(now, key) for key in found])
+        self._db.commit()
+        hits = sum(key in found for key in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+
+        return found
+
+    def put(self, items):
+        "Store rows given as a dict of bytes and evict rows beyond max_bytes"
+
+        now = time.time()
+        self._db.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?)",
+                             [(key, value, now) for key, value in items.items()])
+        self._nbytes += sum(map(len, items.values()))
+
+        # least recently used eviction
+        if self.max_bytes is not None and self._nbytes > self.max_bytes:
+            excess = self._nbytes - self.max_bytes
+            evict = []
+            for key, size in self._db.execute("SELECT key, LENGTH(value) FROM "
+                                              "rows ORDER BY used"):
+                if excess <= 0:
+                    break
+                evict.append((key, ))
+                excess -= size
+                self._nbytes -= size
+            self._db.executemany("DELETE FROM rows WHERE key = ?", evict)
+        self._db.commit()
+
+    def info(self):
+        """Statistics of the cache.
+
+        Returns
+        -------
+
+        info : dict
+            'hits' and 'misses' of this instance, number of stored rows
+            ('entries'), their size in bytes ('nbytes') and 'max_bytes'.
+
+        """
+
+        entries = self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries,
+                'nbytes': self._nbytes, 'max_bytes': self.max_bytes}
+
+    def clear(self):
+        "Remove all stored rows and reset the statistics"
+
+        self._db.execute("DELETE FROM rows")
+        self._db.commit()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        "Close the database connection"
+
+        self._db.close()
+
+
+def _cached_rows(cache, batch, start, end, feature, params, version, 
+                 compute):
+    """Feature rows of all sequences as bytes, computing only cache misses.
+
+    compute(batch) must return one bytes object per sequence of a 
+    SequenceBatch of (unsliced) sequences. Returns one bytes object per 
+    sequence of batch, sliced to [start, end].
+    """
+
+    codes, lengths = batch.encode(start, end)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    sequences = [codes[offsets[i]:offsets[i+1]].tobytes()
+                 for i in range(len(lengths))]
+    keys = cache.keys(sequences, feature, params, version)
+    found = cache.get(keys)
+
+    # compute each missing sequence once
+    missing = {}
+    for i, key in enumerate(keys):
+        if key not in found and key not in missing:
+            missing[key] = i
+    if missing:
+        idx = list(missing.values())
+        sub = SequenceBatch.from_encoded(
+            np.concatenate([codes[offsets[i]:offsets[i+1]] for i in idx]),
+            lengths[idx])
+        new = dict(zip(missing, compute(sub)))
+        cache.put(new)
+        found.update(new)
+
+    return [found[key] for key in keys]
@@ -0,0 +1,325 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+"""Command line interface of protlearn.
+
+    protlearn featurize sequences.fasta -o features/ --features composition \\
+        aaindex1 --format parquet --chunksize 100000 --n-jobs -1
+
+reads the sequences in chunks, computes the features of each chunk in a
+worker pool and writes one shard per chunk together with a manifest
+(manifest.json) describing the columns and shards. An interrupted run is
+continued with --resume, which only computes the missing shards.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+
+MANIFEST = 'manifest.json'
+
+# settings that must match for a run to be resumed
+_RESUME_KEYS = ['input', 'features', 'tables', 'format', 'chunksize', 'start',
+                'end', 'dtype']
+
+
+def _shard_name(index, fmt):
+    return 'shard-%05d.%s' % (index, fmt)
+
+
+def _featurize_shard(seqs, settings, directory, index):
+    """Compute the features of a chunk and write them as a shard.
+
+    The shard is written to a temporary file first and then renamed, so that
+    an interrupted run never leaves a partial shard behind.
+    """
+
+    import numpy as np
+    from protlearn.preprocessing import SequenceBatch
+    from protlearn.pipeline import _fixed_kernel, feature_names
+
+    batch = SequenceBatch(seqs)
+    # Parquet columns are written from a column-major array
+    order = 'F' if settings['format'] == 'parquet' else 'K'
+    arr = _fixed_kernel(batch, settings['features'], settings['start'],
+                        settings['end']).astype(settings['dtype'], order,
+                                                copy=False)
+
+    name = _shard_name(index, settings['format'])
+    path = os.path.join(directory, name)
+    tmp = path + '.tmp'
+    if settings['format'] == 'npy':
+        with open(tmp, 'wb') as f:
+            np.save(f, arr)
+    else:
+        import pyarrow.parquet as pq
+        from protlearn.feature_engineering import _to_arrow
+        pq.write_table(_to_arrow(arr, feature_names(settings['features'])),
+                       tmp)
+    os.replace(tmp, path)
+
+    return {'index': index, 'file': name, 'n_samples': len(batch),
+            'n_residues': int(batch.lengths.sum())}
+
+
+def _save_manifest(directory, manifest):
+    "Atomically replace the manifest"
+
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def _load_manifest(directory, settings, resume):
+    "Manifest of a previous run to resume, or a new one"
+
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return dict(settings, shards=[], complete=False)
+    if not resume:
+        raise ValueError("%s already contains a manifest. Pass --resume to "
+                         "continue the run or choose another output "
+                         "directory." % directory)
+
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest.setdefault('tables', {})
+    changed = [key for key in _RESUME_KEYS if manifest.get(key) !=
+               settings[key]]
+    if changed:
+        raise ValueError("Cannot resume a run with different settings (%s)."
+                         % ', '.join(changed))
+
+    # shards whose file is missing are computed again
+    manifest['shards'] = [shard for shard in manifest['shards'] if
+                          os.path.exists(os.path.join(directory,
+                                                      shard['file']))]
+
+    return manifest
+
+
+def featurize_files(input, output, features=('composition', 'aaindex1',
+                                             'aaindex2', 'aaindex3'),
+                    fmt='parquet', chunksize=10000, n_jobs=None, start=1,
+                    end=None, dtype='float64', file_format=None,
+                    resume=False, log=None, tables=None):
+    """Featurize a sequence file into shards with a manifest.
+
+    Parameters
+    ----------
+
+    input : string
+        Path of a .txt or FASTA file (optionally gzipped, see read_chunks).
+
+    output : string
+        Output directory. It is created if it does not exist.
+
+    features : list of strings, default=('composition', 'aaindex1',
+                                         'aaindex2', 'aaindex3')
+        Features in the fixed layout of featurize_one (see feature_names), so
+        that all shards share the same columns.
+
+    fmt : string, default='parquet'
+        'parquet' : one Parquet file per chunk (requires pyarrow)
+        'npy' : one .npy array per chunk, column names in the manifest
+
+    chunksize : int, default=10000
+        Number of sequences per shard.
+
+    n_jobs : int, default=None
+        Number of worker processes, each featurizing whole chunks. None means
+        1 (no pool), -1 means all CPUs.
+
+    start : int, default=1
+        Determines the starting point of the amino acid sequence.
+
+    end : int, default=None
+        Determines the end point of the amino acid sequence.
+
+    dtype : string, default='float64'
+        Data type of the stored features.
+
+    file_format : string, default=None
+        Format of the input file ('txt', 'fasta' or None to detect it).
+
+    resume : bool, default=False
+        Continue a previous run into the same output directory, computing
+        only the shards that are missing.
+
+    log : file object, default=None
+        Progress and throughput are written to log if given.
+
+    tables : dict, default=None
+        Custom tables to register before featurizing, mapping their names to
+        csv files (see register_table). They can then be used in features.
+
+    Returns
+    -------
+
+    manifest : dict
+        Settings, column names and shards ('index', 'file', 'first_row',
+        'n_samples', 'n_residues') of the run, as written to manifest.json.
+
+    """
+
+    import numpy as np
+    from protlearn.parallel import effective_n_jobs
+    from protlearn.preprocessing import read_chunks
+    from protlearn.pipeline import feature_names
+    from protlearn.tables import register_table, table_version, _CUSTOM,\
+                                 _restore_tables
+
+    if fmt not in ['parquet', 'npy']:
+        raise ValueError("fmt must be one of %r." % ['parquet', 'npy'])
+    if fmt == 'parquet':
+        import pyarrow.parquet
+    for name, table in (tables or {}).items():
+        register_table(name, table)
+    settings = {'input': os.path.abspath(input), 'features': list(features),
+                'tables': {name: table_version(name) for name in 
+                           sorted(tables or {})},
+                'columns': feature_names(features), 'format': fmt,
+                'chunksize': chunksize, 'start': start, 'end': end,
+                'dtype': np.dtype(dtype).name}
+
+    os.makedirs(output, exist_ok=True)
+    manifest = _load_manifest(output, settings, resume)
+    done = {shard['index']: shard for shard in manifest['shards']}
+    manifest['complete'] = False
+    _save_manifest(output, manifest)
+
+    def finished(shard):
+        done[shard['index']] = shard
+        manifest['shards'] = sorted(done.values(), key=lambda s: s['index'])
+        _save_manifest(output, manifest)
+        stats[0] += shard['n_samples']
+        stats[1] += shard['n_residues']
+        if log is not None:
+            elapsed = time.perf_counter() - t0
+            log.write('%s: %d sequences (%.0f sequences/s, %.0f residues/s)'
+                      '\n' % (shard['file'], shard['n_samples'],
+                              stats[0]/elapsed, stats[1]/elapsed))
+
+    # chunks are read sequentially and featurized by the workers, with a
+    # bounded number of chunks in flight
+    n_workers = effective_n_jobs(n_jobs)
+    executor = ProcessPoolExecutor(n_workers, initializer=_restore_tables,
+                                   initargs=(dict(_CUSTOM), )) \
+               if n_workers > 1 else None
+    pending = {}
+    first_row = 0
+    stats = [0, 0]
+    t0 = time.perf_counter()
+    try:
+        chunks = read_chunks(input, chunksize, file_format=file_format)
+        for index, chunk in enumerate(chunks):
+            rows = first_row
+            first_row += len(chunk)
+            if index in done:
+                continue
+            seqs = list(chunk['Sequence'])
+            if executor is None:
+                shard = _featurize_shard(seqs, settings, output, index)
+                finished(dict(shard, first_row=rows))
+                continue
+
+            future = executor.submit(_featurize_shard, seqs, settings,
+                                     output, index)
+            pending[future] = rows
+            if len(pending) >= 2*n_workers:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    finished(dict(future.result(),
+                                  first_row=pending.pop(future)))
+
+        for future in list(pending):
+            finished(dict(future.result(), first_row=pending.pop(future)))
+
+    finally:
+        if executor is not None:
+            # chunks that have not started are dropped on errors
+            for future in pending:
+                future.cancel()
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - t0
+    manifest['complete'] = True
+    manifest['n_samples'] = first_row
+    manifest['throughput'] = {
+        'seconds': elapsed, 'sequences': stats[0], 'residues': stats[1],
+        'sequences_per_second': stats[0]/elapsed if elapsed else None,
+        'residues_per_second': stats[1]/elapsed if elapsed else None}
+    _save_manifest(output, manifest)
+    if log is not None:
+        log.write('featurized %d sequences (%d residues) in %.2fs: '
+                  '%.0f sequences/s, %.0f residues/s\n'
+                  % (stats[0], stats[1], elapsed,
+                     stats[0]/max(elapsed, 1e-9), stats[1]/max(elapsed, 1e-9)))
+
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='protlearn',
+                                     description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command')
+
+    featurize = commands.add_parser(
+        'featurize', help='featurize a sequence file into shards',
+        description='Featurize a .txt or FASTA file into Parquet or .npy '
+                    'shards with a manifest.')
+    featurize.add_argument('input', help='.txt or FASTA file (may be .gz)')
+    featurize.add_argument('-o', '--output', required=True,
+                           help='output directory')
+    featurize.add_argument('--features', nargs='+',
+                           default=['composition', 'aaindex1', 'aaindex2',
+                                    'aaindex3'],
+                           help='length, composition, composition_relative, '
+                                'aaindex1, aaindex2, aaindex3, ngram1, '
+                                'ngram2 (default: composition aaindex1-3)')
+    featurize.add_argument('--table', action='append', default=[],
+                           metavar='NAME=CSV',
+                           help='register a custom scale or pair matrix csv '
+                                'file under NAME, to be used in --features')
+    featurize.add_argument('--format', default='parquet',
+                           choices=['parquet', 'npy'])
+    featurize.add_argument('--chunksize', type=int, default=10000,
+                           help='sequences per shard (default: 10000)')
+    featurize.add_argument('--n-jobs', type=int, default=None,
+                           help='worker processes, -1 for all CPUs')
+    featurize.add_argument('--start', type=int, default=1)
+    featurize.add_argument('--end', type=int, default=None)
+    featurize.add_argument('--dtype', default='float64',
+                           choices=['float64', 'float32'])
+    featurize.add_argument('--file-format', default=None,
+                           choices=['txt', 'fasta'])
+    featurize.add_argument('--resume', action='store_true',
+                           help='continue an interrupted run')
+    featurize.add_argument('-q', '--quiet', action='store_true',
+                           help='do not report progress')
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.error('the following arguments are required: command')
+    tables = dict(table.split('=', 1) for table in args.table 
+                  if '=' in table)
+    if len(tables) < len(args.table):
+        parser.error('--table must be given as NAME=CSV')
+    try:
+        featurize_files(args.input, args.output, args.features, args.format,
+                        args.chunksize, args.n_jobs, args.start, args.end,
+                        args.dtype, args.file_format, args.resume,
+                        log=None if args.quiet else sys.stderr, 
+                        tables=tables)
+    except (ValueError, ImportError, OSError) as e:
+        parser.exit(1, 'protlearn: error: %s\n' % e)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,14 +2,652 @@
 
 import numpy as np
 import pandas as pd
-from collections import Counter
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-import pkg_resources
+from collections.abc import Iterator
+from functools import wraps
+from protlearn.tables import PATH, AMINO_ACIDS, load_table, table_version,\
+                             _table_kind, _is_table
+from protlearn.preprocessing import SequenceBatch, _as_batch, _AA_LOOKUP,\
+                                    _as_lenient_batch
+from protlearn.parallel import map_shards
+from protlearn.cache import _cached_rows
 
 
-PATH = pkg_resources.resource_filename('protlearn', 'docs/')
+def _csr_matrix(*args, **kwargs):
+    "scipy.sparse.csr_matrix, imported on first use of sparse output"
 
-def length(X, method='int'):
+    from scipy import sparse
+
+    return sparse.csr_matrix(*args, **kwargs)
+
+
+def _scaler(standardize):
+    "Unfitted scikit-learn scaler of standardize ('zscore' or 'minmax')"
+
+    # scikit-learn is only imported if features are standardized
+    from sklearn.preprocessing import StandardScaler, MinMaxScaler
+
+    return StandardScaler() if standardize == 'zscore' else MinMaxScaler()
+
+
+def _kmer_ids(codes, lengths, ngram, gap=0):
+    "Compute base-20 ids of all (gapped) n-grams and the rows they belong to"
+
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    span = (ngram-1)*(gap+1) + 1
+    n_windows = max(len(codes)-span+1, 0)
+
+    # rolling base-20 window over the encoded residues
+    ids = np.zeros(n_windows, dtype=np.int64)
+    for k in range(0, span, gap+1):
+        ids = ids*20 + codes[k:k+n_windows]
+
+    # n-grams must not span two sequences
+    valid = rows[:n_windows] == rows[span-1:span-1+n_windows]
+
+    return ids[valid], rows[:n_windows][valid]
+
+
+def _kmer_strings(ids, ngram, gap=0):
+    "Convert base-20 n-gram ids into strings, marking gaps with '.'"
+
+    letters = np.frombuffer(AMINO_ACIDS.encode(), dtype=np.uint8)
+    digits = np.asarray(ids)[:, None] // 20**np.arange(ngram-1, -1, -1) % 20
+    chars = letters[digits]
+
+    if gap > 0:
+        # insert gap characters between consecutive residues
+        width = (ngram-1)*(gap+1) + 1
+        gapped = np.full((len(chars), width), ord('.'), dtype=np.uint8)
+        gapped[:, ::gap+1] = chars
+        chars = gapped
+
+    chars = np.ascontiguousarray(chars)
+
+    return chars.view('S%d' % chars.shape[1]).ravel().astype(str)
+
+
+# full k-mer vocabularies, built on first use per (ngram, gap)
+_VOCABULARIES = {}
+
+
+def kmer_vocabulary(ngram, gap=0):
+    """All 20^ngram n-grams in id order.
+
+    The vocabulary is generated once per process (per ngram and gap) and
+    cached; the returned array is read-only.
+
+    Parameters
+    ----------
+
+    ngram : int
+        Length of the n-grams (1-5).
+
+    gap : int, default=0
+        Number of positions skipped between consecutive residues, marked with
+        '.' in the strings.
+
+    Returns
+    -------
+
+    vocab : ndarray of shape (20^ngram, )
+        N-grams as strings, such that vocab[i] is the n-gram with id i (see 
+        kmer_to_id).
+
+    """
+
+    if not 1 <= ngram <= 5:
+        raise ValueError("ngram must be an integer between 1-5. Use "
+                         "kmer_to_string for longer n-grams.")
+    if (ngram, gap) not in _VOCABULARIES:
+        vocab = _kmer_strings(np.arange(20**ngram), ngram, gap)
+        vocab.setflags(write=False)
+        _VOCABULARIES[ngram, gap] = vocab
+
+    return _VOCABULARIES[ngram, gap]
+
+
+def kmer_to_string(ids, ngram, gap=0):
+    """Convert n-gram ids into strings.
+
+    Only the requested n-grams are converted, so columns can be named from 
+    the ids of the (few) n-grams that are present without generating all
+    20^ngram strings. 
+
+    Parameters
+    ----------
+
+    ids : array-like of int
+        Base-20 n-gram ids, i.e. the sum of 20^(ngram-1-i) times the index of
+        the i-th residue in 'ACDEFGHIKLMNPQRSTVWY' (e.g. 'AC' is 1, 'CA' 20).
+
+    ngram : int
+        Length of the n-grams.
+
+    gap : int, default=0
+        Number of positions skipped between consecutive residues, marked with
+        '.' in the strings.
+
+    Returns
+    -------
+
+    kmers : ndarray of strings
+
+    """
+
+    ids = np.asarray(ids, dtype=np.int64).ravel()
+    if (ngram, gap) in _VOCABULARIES:
+        return _VOCABULARIES[ngram, gap][ids]
+
+    return _kmer_strings(ids, ngram, gap)
+
+
+def kmer_to_id(kmers, gap=0):
+    """Convert n-gram strings into ids (inverse of kmer_to_string).
+
+    Parameters
+    ----------
+
+    kmers : string or array-like of strings
+        N-grams of equal length, with gap characters if gap > 0.
+
+    gap : int, default=0
+        Number of positions skipped between consecutive residues.
+
+    Returns
+    -------
+
+    ids : ndarray of int64
+
+    """
+
+    kmers = np.atleast_1d(np.asarray(kmers, dtype=bytes))
+    width = kmers.dtype.itemsize
+    if width == 0 or (width-1) % (gap+1) != 0:
+        raise ValueError("N-grams must have (ngram-1)*(gap+1)+1 characters.")
+    chars = np.ascontiguousarray(kmers).view(np.uint8).reshape(len(kmers), 
+                                                               width)
+    codes = _AA_LOOKUP[chars[:, ::gap+1]]
+    if (codes == 255).any():
+        raise ValueError("N-grams must consist of the 20 amino acids %s and "
+                         "have equal length." % AMINO_ACIDS)
+    powers = 20**np.arange(codes.shape[1]-1, -1, -1, dtype=np.int64)
+
+    return codes.astype(np.int64) @ powers
+
+
+def _mean_profile(counts, lengths, index):
+    """Average a per-residue index over each sequence.
+
+    counts is a (n_samples, n_symbols) count matrix and index the matching
+    (n_symbols, n_indices) table. An index is NaN for a sequence only if one
+    of the symbols it actually contains has a NaN value.
+
+    The product is summed with einsum rather than BLAS, whose summation order
+    depends on the shape of the batch, so that each row is bit-identical no
+    matter how the batch is split into shards (see n_jobs).
+    """
+
+    nan_mask = np.isnan(index)
+    arr = np.einsum('ij,jk->ik', counts.astype(np.float64), 
+                    np.where(nan_mask, 0, index))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        arr /= lengths[:, None]
+
+    # only check the indices that contain NaNs
+    cols = np.flatnonzero(nan_mask.any(axis=0))
+    if len(cols) > 0:
+        hits = (counts > 0).astype(np.float64) @ nan_mask[:, cols]
+        arr[:, cols] = np.where(hits > 0, np.nan, arr[:, cols])
+
+    return arr
+
+
+def _composition_kernel(batch, start, end):
+    "Amino acid counts of a batch"
+
+    return batch.counts(start, end)
+
+
+def _residue_profile(batch, index, start, end):
+    "Mean profile of a batch for a (20, n_indices) table of residue scales"
+
+    counts = batch.counts(start, end)
+    lengths = batch.encode(start, end)[1]
+
+    return _mean_profile(counts, lengths, index)
+
+
+def _residue_index_kernel(batch, name, start, end):
+    "Unfiltered mean profile of a batch for a table of residue scales"
+
+    return _residue_profile(batch, load_table(name)[1], start, end)
+
+
+def _aaindex1_kernel(batch, start, end):
+    "Unfiltered mean AAIndex1 profile of a batch"
+
+    return _residue_index_kernel(batch, 'aaindex1', start, end)
+
+
+def _pair_profile(batch, index, start, end):
+    """Mean profile of a batch for a (400, n_indices) table of pair indices.
+
+    The values of each sequence are summed pair by pair in sequence order, as
+    in the mean over the (n_pairs, n_indices) matrix of a single sequence, so
+    that the result is bit-identical to it. The sequences are sorted by their
+    number of pairs, so that the t-th pairs of all sequences having one are
+    added in a single step. This is done for blocks of sequences whose sums
+    (about 300 KB) stay in the CPU cache across all steps.
+    """
+
+    codes, lengths = batch.encode(start, end)
+    n_pairs = np.maximum(lengths-1, 0)
+    pairs = codes[:-1].astype(np.intp)*20 + codes[1:]
+
+    order = np.argsort(-n_pairs, kind='stable')
+    first = (np.cumsum(lengths) - lengths)[order]
+    n_pairs = n_pairs[order]
+
+    total = np.zeros((len(lengths), index.shape[1]))
+    block = max(64, 40000 // max(index.shape[1], 1))
+    for lo in range(0, len(lengths), block):
+        # number of sequences of the block with more than t pairs
+        n_active = np.searchsorted(-n_pairs[lo:lo+block], 
+                                   -np.arange(n_pairs[lo]), side='left')
+        sums, starts = total[lo:lo+block], first[lo:lo+block]
+        for t, m in enumerate(n_active):
+            sums[:m] += index[pairs[starts[:m]+t]]
+
+    arr = np.empty_like(total)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        arr[order] = total / n_pairs[:, None]
+
+    return arr
+
+
+def _pair_index_kernel(batch, name, start, end):
+    "Unfiltered mean AAIndex2/AAIndex3 profile of a batch"
+
+    return _pair_profile(batch, load_table(name)[1], start, end)
+
+
+def _table_kernel(batch, name, start, end):
+    "Unfiltered mean profile of a batch for a residue or pair table"
+
+    if _table_kind(name) == 'residue':
+        return _residue_index_kernel(batch, name, start, end)
+    return _pair_index_kernel(batch, name, start, end)
+
+
+def _ngram_kernel(batch, ngram, gap, start, end):
+    "Number of sequences and (row, n-gram id, count) triplets of a batch"
+
+    codes, lengths = batch.encode(start, end)
+    ids, rows = _kmer_ids(codes, lengths, ngram, gap)
+
+    # run-length encode identical (row, id) pairs
+    order = np.lexsort((ids, rows))
+    ids, rows = ids[order], rows[order]
+    first = np.ones(len(ids), dtype=bool)
+    first[1:] = (ids[1:] != ids[:-1]) | (rows[1:] != rows[:-1])
+    starts = np.flatnonzero(first)
+    counts = np.diff(np.append(starts, len(ids)))
+
+    return len(batch), rows[starts], ids[starts], counts
+
+
+# record of one n-gram count of a sequence in a FeatureCache
+_NGRAM_RECORD = np.dtype([('id', '<i8'), ('count', '<u4')])
+
+
+def _ngram_triplets(batch, ngram, gap, start, end, n_jobs=None, cache=None):
+    """Number of sequences and (row, n-gram id, count) triplets of a batch.
+
+    Triplets are sorted by row and id. They are computed shard by shard, or 
+    read from a FeatureCache for sequences that were counted before.
+    """
+
+    if cache is None:
+        shards = map_shards(_ngram_kernel, batch, (ngram, gap, start, end), 
+                            n_jobs)
+        offsets = np.cumsum([0] + [shard[0] for shard in shards])
+        rows = np.concatenate([shard[1] + offset 
+                               for shard, offset in zip(shards, offsets)])
+        ids = np.concatenate([shard[2] for shard in shards])
+        counts = np.concatenate([shard[3] for shard in shards])
+
+        return offsets[-1], rows, ids, counts
+
+    def compute(sub):
+        n_samples, rows, ids, counts = _ngram_triplets(sub, ngram, gap, 1, 
+                                                       None, n_jobs)
+        records = np.empty(len(ids), dtype=_NGRAM_RECORD)
+        records['id'], records['count'] = ids, counts
+        bounds = np.searchsorted(rows, np.arange(n_samples+1))
+        return [records[lo:hi].tobytes() 
+                for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+    cached = _cached_rows(cache, batch, start, end, 'ngram_composition', 
+                          (ngram, gap), '', compute)
+    records = np.frombuffer(b''.join(cached), dtype=_NGRAM_RECORD)
+    sizes = [len(row) // _NGRAM_RECORD.itemsize for row in cached]
+    rows = np.repeat(np.arange(len(batch)), sizes)
+
+    return len(batch), rows, records['id'], records['count'].astype(np.int64)
+
+
+def _window_kernel(batch, name, start, end, window):
+    """Profiles of all windows of a batch as (n_samples, n_windows, n_features)
+
+    Sequences are laid out as rows of a padded matrix and each row is summed
+    cumulatively, so that every window is the difference of two prefix sums.
+    Windows past the end of a sequence are NaN.
+    """
+
+    codes, lengths = batch.encode(start, end)
+    n_samples = len(lengths)
+    max_len = lengths.max() if n_samples else 0
+    n_windows = max(max_len - window + 1, 0)
+    rows = np.repeat(np.arange(n_samples), lengths)
+    pos = np.arange(len(codes)) - np.repeat(np.cumsum(lengths)-lengths, 
+                                            lengths)
+
+    if name == 'composition' or _table_kind(name) == 'residue':
+        # cumulative amino acid counts, 20 is padding
+        cum = np.zeros((n_samples, max_len+1, 21), dtype=np.int32)
+        cum[rows, pos+1, codes] = 1
+        np.cumsum(cum, axis=1, out=cum)
+        counts = (cum[:, window:, :20] - cum[:, :n_windows, :20])
+        counts = counts.reshape(-1, 20)
+
+        if name == 'composition':
+            arr = counts.astype(np.float64)
+        else:
+            index = load_table(name)[1]
+            arr = _mean_profile(counts, np.full(len(counts), window), index)
+    else:
+        # dipeptide ids of the padded sequences, ids >= 400 contain padding
+        padded = np.full((n_samples, max_len), 20, dtype=np.intp)
+        padded[rows, pos] = codes
+        ids = padded[:, :-1]*20 + padded[:, 1:]
+
+        # prefix sums of the pairwise indices (NaNs counted separately)
+        index = load_table(name)[1]
+        nan_cols = np.flatnonzero(np.isnan(index).any(axis=0))
+        table = np.zeros((421, index.shape[1]))
+        table[:400] = np.where(np.isnan(index), 0, index)
+        nans = np.zeros((421, len(nan_cols)), dtype=np.int32)
+        nans[:400] = np.isnan(index[:, nan_cols])
+
+        arr, hits = [], []
+        for values, out in [(table, arr), (nans, hits)]:
+            cum = np.cumsum(values[ids], axis=1)
+            sums = cum[:, window-2:].copy()
+            sums[:, 1:] -= cum[:, :max(max_len-window, 0)]
+            out.append(sums.reshape(n_samples*sums.shape[1], 
+                                    values.shape[1]))
+        arr, hits = arr[0] / (window-1), hits[0]
+        arr[:, nan_cols] = np.where(hits > 0, np.nan, arr[:, nan_cols])
+
+    arr = arr.reshape(n_samples, n_windows, -1)
+    arr[np.arange(n_windows) > (lengths - window)[:, None]] = np.nan
+
+    return arr
+
+
+def _window_profile(batch, name, start, end, window, n_jobs, cache=None):
+    "Compute the window profiles of a batch and merge the shards"
+
+    if cache is not None:
+        raise ValueError("window profiles cannot be cached.")
+    min_window = 1 if name == 'composition' or \
+                      _table_kind(name) == 'residue' else 2
+    if not isinstance(window, (int, np.integer)) or window < min_window:
+        raise ValueError("window must be an integer of at least %d." 
+                         % min_window)
+
+    shards = map_shards(_window_kernel, batch, 
+                        (name, start, end, window), n_jobs)
+    if len(shards) == 1:
+        return shards[0]
+
+    # pad all shards to the longest number of windows
+    n_windows = max(shard.shape[1] for shard in shards)
+    arr = np.full((len(batch), n_windows, shards[0].shape[2]), np.nan)
+    row = 0
+    for shard in shards:
+        arr[row:row+len(shard), :shard.shape[1]] = shard
+        row += len(shard)
+
+    return arr
+
+
+def _scale_windows(arr, standardize):
+    "Standardize window profiles across all windows, ignoring padding"
+
+    if standardize == 'none':
+        return arr
+    scaler = _scaler(standardize)
+    shape = arr.shape
+    arr = scaler.fit_transform(arr.reshape(-1, shape[2]))
+
+    return arr.reshape(shape)
+
+
+def _cached_matrix(cache, batch, start, end, feature, compute, width, 
+                   dtype=np.float64, params=()):
+    """Per-sequence feature rows, read from a FeatureCache if one is given.
+
+    compute(batch, start, end) returns the rows of a batch as an array of
+    shape (n_samples, width). With a cache, it is only called for sequences
+    that are not stored yet.
+    """
+
+    if cache is None:
+        return compute(batch, start, end)
+
+    version = table_version(feature) if _is_table(feature) else ''
+    rows = _cached_rows(cache, batch, start, end, feature, params, version, 
+                        lambda sub: [row.tobytes() for row in 
+                                     compute(sub, 1, None).astype(dtype)])
+
+    return np.frombuffer(b''.join(rows), dtype=dtype).reshape(len(batch), 
+                                                              width)
+
+
+def _window_output(arr, output, dtype):
+    "Window profiles are only available as 3D numpy arrays"
+
+    if output not in [None, 'numpy']:
+        raise ValueError("window profiles can only be returned with "
+                         "output='numpy'.")
+    if dtype is not None and np.dtype(dtype).kind != 'f':
+        raise ValueError("window profiles are padded with NaN and require a "
+                         "floating point dtype.")
+
+    return arr if dtype is None else arr.astype(dtype, copy=False)
+
+
+def _chunkwise(func):
+    "Apply a feature function chunk by chunk if X is an iterator of chunks"
+
+    @wraps(func)
+    def wrapper(X, *args, **kwargs):
+        if isinstance(X, Iterator):
+            return (func(chunk, *args, **kwargs) for chunk in X)
+        return func(X, *args, **kwargs)
+
+    return wrapper
+
+
+# containers the feature functions can return
+OUTPUTS = ['numpy', 'pandas', 'arrow', 'sparse']
+
+
+def _count_dtype(arr, dtype=None):
+    """Dtype of counts or lengths.
+
+    None gives the smallest signed integer type holding all counts of arr, 
+    so that subtracting from the results does not wrap around, and 
+    dtype='compact' the smallest unsigned one. Any other dtype is returned 
+    unchanged.
+    """
+
+    if dtype is None:
+        candidates = [np.int8, np.int16, np.int32, np.int64]
+    elif isinstance(dtype, str) and dtype == 'compact':
+        candidates = [np.uint8, np.uint16, np.uint32, np.uint64]
+    else:
+        return dtype
+
+    largest = arr.max(initial=0)
+    for dtype in candidates[:-1]:
+        if largest <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+
+    return np.dtype(candidates[-1])
+
+
+def _to_arrow(arr, columns):
+    """Wrap the columns of a 2D array in an Arrow table.
+
+    C-ordered arrays are copied once into Fortran order, whose columns Arrow
+    then references without further copies.
+    """
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("output='arrow' requires pyarrow.")
+
+    # each column of a Fortran-ordered array is a contiguous buffer that 
+    # Arrow can reference directly
+    arr = np.asfortranarray(arr)
+
+    return pa.Table.from_arrays([pa.array(arr[:, j]) 
+                                 for j in range(arr.shape[1])],
+                                names=[str(col) for col in columns])
+
+
+def _format(arr, columns, output, dtype=None):
+    """Convert a feature array into the requested container and dtype.
+
+    One-dimensional arrays are returned as a Pandas Series (named after the
+    only column), a single-column Arrow table or a CSR column vector.
+    """
+
+    if output == 'arrow':
+        # dtype conversion and column-major layout in a single copy
+        arr = arr.reshape(len(arr), -1)
+        return _to_arrow(arr.astype(dtype or arr.dtype, order='F', 
+                                    copy=False), columns)
+    if dtype is not None:
+        arr = arr.astype(dtype, copy=False)
+
+    if output == 'numpy':
+        return arr
+    elif output == 'pandas':
+        if arr.ndim == 1:
+            return pd.Series(arr, name=columns[0])
+        return pd.DataFrame(arr, columns=columns, copy=False)
+    elif output == 'sparse':
+        return _csr_matrix(arr.reshape(len(arr), -1)), np.asarray(columns)
+    else:
+        raise ValueError("output must be one of %r." % OUTPUTS)
+
+
+def _filter_columns(arr, desc, standardize):
+    "Remove NaN (and all-zero) columns of an index matrix and standardize it"
+
+    # columns with NaNs are always removed, all-zero columns only if the
+    # index matrix is standardized
+    cols = np.isnan(arr).any(axis=0)
+    if standardize != 'none':
+        cols |= ~arr.any(axis=0)
+    arr = arr[:, ~cols]
+    desc = np.asarray(desc)[~cols]
+
+    # standardization
+    if standardize == 'zscore':
+        arr = _scaler('zscore').fit_transform(arr)
+
+    # normalization
+    elif standardize == 'minmax':
+        arr = _scaler('minmax').fit_transform(arr)
+
+    return arr, desc
+
+
+def _postprocess(arr, desc, standardize, dtype=None, output='pandas'):
+    "Remove NaN (and all-zero) columns, standardize and build the output"
+
+    arr, desc = _filter_columns(arr, desc, standardize)
+
+    return _format(arr, desc, output, dtype)
+
+
+def _length_edges(lengths, bins, strategy='quantile'):
+    """Inner bin edges of sequence lengths.
+
+    bins is either a number of bins, whose integer edges are placed at the
+    quantiles ('quantile') or evenly between the shortest and longest 
+    sequence ('uniform'), or a sequence of edges.
+    """
+
+    if not isinstance(bins, (int, np.integer)):
+        edges = np.asarray(bins, dtype=np.int64)
+        if edges.ndim != 1 or (np.diff(edges) <= 0).any():
+            raise ValueError("bins must be an integer or increasing edges.")
+        return edges
+    if bins < 1:
+        raise ValueError("bins must be at least 1.")
+    if len(lengths) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if strategy == 'quantile':
+        edges = np.quantile(lengths, np.linspace(0, 1, bins+1)[1:-1])
+    elif strategy == 'uniform':
+        edges = np.linspace(lengths.min(), lengths.max(), bins+1)[1:-1]
+    else:
+        raise ValueError("strategy must be one of %r." 
+                         % ['quantile', 'uniform'])
+
+    # lengths are integers, so are the edges (duplicates are merged)
+    return np.unique(np.ceil(edges).astype(np.int64))
+
+
+def _length_bin_names(edges):
+    "Names of the bins delimited by edges, e.g. '<10', '10-49', '>=50'"
+
+    if len(edges) == 0:
+        return np.array(['length'])
+    names = ['<%d' % edges[0]]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        names.append('%d' % lo if hi == lo+1 else '%d-%d' % (lo, hi-1))
+    names.append('>=%d' % edges[-1])
+
+    return np.array(names)
+
+
+def _onehot(cols, columns, output, dtype=np.uint8):
+    "One-hot matrix with a single one per row, built without scanning"
+
+    n_samples = len(cols)
+    if output == 'sparse':
+        arr = _csr_matrix((np.ones(n_samples, dtype=dtype), cols,
+                                 np.arange(n_samples+1)),
+                                shape=(n_samples, len(columns)))
+        return arr, np.asarray(columns)
+
+    arr = np.zeros((n_samples, len(columns)), dtype=dtype)
+    arr[np.arange(n_samples), cols] = 1
+
+    return _format(arr, columns, output)
+
+
+@_chunkwise
+def length(X, method='int', dtype=None, output=None, bins=10, 
+           strategy='quantile'):
     """Compute the length of proteins or peptides.
     
     The number of amino acids that a protein or peptide is comprised of will be
@@ -18,48 +656,97 @@ def length(X, method='int'):
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
 
     method : string, default='int'
 
         'int' : compute array of protein/peptide lengths
-        'ohe' : compute one-hot encoded array of protein/peptide lengths
+        'ohe' : compute one-hot encoded array of protein/peptide lengths, with
+                one column per length present in X
+        'bin' : compute one-hot encoded array of length bins
+
+    dtype : numpy dtype or 'compact', default=None
+        Data type of the returned values. None returns the smallest signed 
+        integer type holding all lengths if method = 'int', and np.uint8 if 
+        method = 'ohe' or 'bin'. 'compact' returns the smallest unsigned 
+        integer type holding all lengths.
+
+    output : string, default=None
+
+        None : same as 'numpy'
+        'numpy' : return a numpy array
+        'pandas' : return a Pandas Series (method = 'int') or DataFrame
+        'arrow' : return a pyarrow Table backed by one column-major copy 
+                  (requires pyarrow), e.g. for writing Parquet files
+        'sparse' : return a scipy.sparse CSR matrix and its column names
+
+    bins : int or array-like, default=10
+        Only applies if method = 'bin'. Either the number of bins, placed
+        according to strategy, or increasing integer edges e_1, ..., e_k 
+        delimiting the k+1 bins <e_1, e_1 to e_2-1, ..., >=e_k. 
+
+    strategy : string, default='quantile'
+        Only applies if method = 'bin' and bins is an integer.
+
+        'quantile' : bin edges at the quantiles of the lengths in X
+        'uniform' : bins of equal width between the shortest and longest 
+                    sequence of X
 
     Returns
     -------
 
     lengths : ndarray of shape (n_samples, ) if method = 'int'
               ndarray of shape (n_samples, n_unique_lengths) if method = 'ohe'
+              ndarray of shape (n_samples, n_bins) if method = 'bin'
+
+    Notes
+    -----
+
+    The columns of 'ohe' and of 'bin' with an integer number of bins depend
+    on the lengths in X. Use fixed edges or LengthTransformer to encode 
+    training and inference sequences with the same columns.
 
     """
 
     # list of protein/peptide lengths
-    all_len = [len(X['Sequence'][i]) for i in range(X.shape[0])]
+    if isinstance(X, SequenceBatch):
+        all_len = X.lengths
+    else:
+        all_len = np.array([len(seq) for seq in X['Sequence']], dtype=np.int64)
     
-    # one-hot-encoded lengths of proteins/peptides
-    len_span = max(all_len) - min(all_len)
-    len_ohe = np.zeros((X.shape[0], len_span+1))
-    len_unique = np.arange(min(all_len), max(all_len)+1)
-
-    # fill array with ones based on sequence lengths (columns)
-    for i in range(len(all_len)):    
-        seq_len = all_len[i]
-        j = np.where(len_unique == seq_len)[0][0]
-        len_ohe[i,j] = 1
-
-    # delete columns with all zeros
-    zero_cols = np.where(~len_ohe.any(axis=0))[0]
-    len_ohe = np.delete(len_ohe, zero_cols, axis=1)
+    output = output or 'numpy'
+    if method == 'int':
+        return _format(all_len, ['length'], output, 
+                       _count_dtype(all_len, dtype))
+
+    # one-hot flags are compact by default
+    if isinstance(dtype, str) and dtype == 'compact':
+        dtype = None
+
+    # one-hot-encoded lengths of proteins/peptides, one column per length
+    if method == 'ohe':
+        len_unique, cols = np.unique(all_len, return_inverse=True)
+        return _onehot(cols, len_unique, output, dtype or np.uint8)
+
+    # one-hot-encoded length bins
+    elif method == 'bin':
+        edges = _length_edges(all_len, bins, strategy)
+        cols = np.searchsorted(edges, all_len, side='right')
+        return _onehot(cols, _length_bin_names(edges), output, 
+                       dtype or np.uint8)
 
-    return {
-            'int': lambda: np.asarray(all_len), 
-            'ohe': lambda: len_ohe,
-    }.get(method, lambda: None)()
+    else:
+        raise ValueError("method must be one of %r." % ['int', 'ohe', 'bin'])
 
 
-def composition(X, method='absolute', start=1, end=None, round_fraction=3):
+@_chunkwise
+def composition(X, method='absolute', start=1, end=None, round_fraction=3,
+                n_jobs=None, window=None, dtype=None, output=None, cache=None):
     """Compute the amino acid composition of proteins or peptides.
 
     The frequency of each of the 20 amino acids in a protein or peptide are 
@@ -71,20 +758,25 @@ def composition(X, method='absolute', start=1, end=None, round_fraction=3):
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
 
     method : string, default='absolute'
 
         'absolute' : compute absolute amino acid composition
         'relative' : compute relative amino acid composition
 
-    start : int, default=1
-        Determines the starting point of the amino acid sequence.
+    start : int or array-like of shape (n_samples, ), default=1
+        Determines the starting point of the amino acid sequence, either for
+        all sequences or for each sequence individually.
 
-    end : int, default=None
-        Determines the end point of the amino acid sequence.
+    end : int or array-like of shape (n_samples, ), default=None
+        Determines the end point of the amino acid sequence, either for all
+        sequences or for each sequence individually.
 
     round_fraction : int, default=3
         This applies only if method='relative'. For shorter peptides with only 
@@ -92,14 +784,53 @@ def composition(X, method='absolute', start=1, end=None, round_fraction=3):
         big impact. However, with longer proteins, decimal places become 
         increasingly more significant and can thus be increased.
 
+    n_jobs : int, default=None
+        Number of worker processes. Sequences are split into contiguous shards
+        that are computed in parallel from shared memory. None computes 
+        everything in the calling process, -1 uses all CPUs.
+
+    window : int, default=None
+        If given, the composition is computed for every window of this many
+        consecutive residues (stride 1) from cumulative amino acid counts, 
+        i.e. at constant cost per window. All 20 amino acids are retained
+        and relative compositions are divided by the window size.
+
+    dtype : numpy dtype or 'compact', default=None
+        Data type of the returned values. None returns the smallest signed 
+        integer type holding all counts if method='absolute', and np.float64
+        otherwise. 'compact' returns the smallest unsigned integer type 
+        holding all counts (method='absolute' only).
+
+    output : string, default=None
+
+        None : same as 'pandas' (or 'numpy' if window is given)
+        'numpy' : return a numpy array
+        'pandas' : return a Pandas DataFrame
+        'arrow' : return a pyarrow Table backed by one column-major copy 
+                  (requires pyarrow), e.g. for writing Parquet files
+        'sparse' : return a scipy.sparse CSR matrix and its column names
+
+    cache : FeatureCache, default=None
+        Persistent cache of raw per-sequence rows (see FeatureCache). Only 
+        sequences that are not in the cache are computed. Not available for
+        window profiles.
+
     Returns
     -------
 
     comp :  Pandas DataFrame of shape (n_samples, n_unique_amino_acids)
 
+    comp : ndarray of shape (n_samples, n_windows, 20) if window is given
+        Windows past the end of a sequence are NaN, where n_windows is the 
+        number of windows of the longest sequence.
+
     Notes
     -----
 
+    Counts are computed with a single bincount over the encoded residues of
+    the whole batch. Relative compositions can be returned as np.float32 to 
+    halve their memory.
+
     The returned dataframe 'comp' can easily be converted into a numpy array 
     with the command 'np.asarray(comp)', if desired.
 
@@ -109,34 +840,41 @@ def composition(X, method='absolute', start=1, end=None, round_fraction=3):
     amino_acids = ['A','C','D','E','F','G','H','I','K','L',
                    'M','N','P','Q','R','S','T','V','W','Y']
 
-    # initialize empty array with shape (n_samples, 20)
-    comp_arr = np.zeros((X.shape[0], len(amino_acids)))
-
-    # fill array with frequency of amino acids per protein/peptide
-    for i in range(X.shape[0]):
-        seq = [aa for aa in X['Sequence'][i]]
-        seq = seq[start-1:end] # positional information
-        values, counts = np.unique(seq, return_counts=True)
-        indices = [amino_acids.index(j) for j in values]
-        comp_arr[i,indices] = counts
+    # amino acid counts of all windows of all (sliced) sequences
+    batch = _as_batch(X)
+    if window is not None:
+        comp_arr = _window_profile(batch, 'composition', start, end, window, 
+                                   n_jobs, cache)
+        if method == 'relative':
+            comp_arr = np.round(comp_arr/window, round_fraction)
+        return _window_output(comp_arr, output, dtype)
+
+    # amino acid counts of all (sliced) sequences
+    counts = _cached_matrix(
+        cache, batch, start, end, 'composition', 
+        lambda batch, start, end: map_shards(_composition_kernel, batch, 
+                                             (start, end), n_jobs, width=20, 
+                                             dtype=np.int64),
+        20, np.uint32)
 
     # delete zero columns
-    cols_zeros = np.where(~comp_arr.any(axis=0))[0]
-    comp_arr = np.delete(comp_arr, cols_zeros, axis=1)
-    amino_acids = [i for j, i in enumerate(amino_acids) if j not in cols_zeros]
+    present = counts.any(axis=0)
+    counts = counts[:, present]
+    amino_acids = [aa for aa, keep in zip(amino_acids, present) if keep]
 
     if method == 'absolute':
-        return pd.DataFrame(comp_arr, columns=amino_acids)
+        return _format(counts, amino_acids, output or 'pandas', 
+                       _count_dtype(counts, dtype))
 
     elif method == 'relative':
-        all_len = [len(X['Sequence'][i]) for i in range(X.shape[0])]
-        comp_rel = [np.round((comp_arr[i]/all_len[i]), round_fraction)\
-                    for i in range(comp_arr.shape[0])]
+        comp_rel = np.round(counts/batch.lengths[:, None], round_fraction)
         
-        return pd.DataFrame(np.asarray(comp_rel), columns=amino_acids)
+        return _format(comp_rel, amino_acids, output or 'pandas', dtype)
         
 
-def aaindex1(X, standardize='none', start=1, end=None):
+@_chunkwise
+def aaindex1(X, standardize='none', start=1, end=None, n_jobs=None,
+             window=None, dtype=None, output=None, cache=None):
     """Compute amino acid indices from AAIndex1.
 
     AAindex1 ver.9.2 (release Feb, 2017) is a set of 20 numerical values
@@ -148,9 +886,12 @@ def aaindex1(X, standardize='none', start=1, end=None):
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
 
     standardize : string, default='none'
 
@@ -160,17 +901,53 @@ def aaindex1(X, standardize='none', start=1, end=None):
         'minmax' : index matrix is scaled (normalized) across columns (indices)
                    to have a range of [0, 1].
 
-    start : int, default=1
-        Determines the starting point of the amino acid sequence.
+    start : int or array-like of shape (n_samples, ), default=1
+        Determines the starting point of the amino acid sequence, either for
+        all sequences or for each sequence individually.
+
+    end : int or array-like of shape (n_samples, ), default=None
+        Determines the end point of the amino acid sequence, either for all
+        sequences or for each sequence individually.
+
+    n_jobs : int, default=None
+        Number of worker processes. Sequences are split into contiguous shards
+        that are computed in parallel from shared memory. None computes 
+        everything in the calling process, -1 uses all CPUs. Results are
+        identical for any number of workers.
 
-    end : int, default=None
-        Determines the end point of the amino acid sequence.
+    window : int, default=None
+        If given, indices are averaged over every window of this many 
+        consecutive residues (stride 1, at least 1) using prefix sums, i.e.
+        at constant cost per window. All indices are retained and an index is
+        NaN only for windows containing a residue with a NaN value. 
+        Standardization is applied across all windows.
+
+    dtype : numpy dtype, default=None
+        Data type of the returned values. None returns np.float64.
+
+    output : string, default=None
+
+        None : same as 'pandas' (or 'numpy' if window is given)
+        'numpy' : return a numpy array
+        'pandas' : return a Pandas DataFrame
+        'arrow' : return a pyarrow Table backed by one column-major copy 
+                  (requires pyarrow), e.g. for writing Parquet files
+        'sparse' : return a scipy.sparse CSR matrix and its column names
+
+    cache : FeatureCache, default=None
+        Persistent cache of raw per-sequence rows (see FeatureCache). Only 
+        sequences that are not in the cache are computed. Not available for
+        window profiles.
 
     Returns
     -------
 
     arr_index1 : Pandas DataFrame of shape (n_samples, 553-566) 
 
+    arr_index1 : ndarray of shape (n_samples, n_windows, 566) if window is given
+        Windows past the end of a sequence are NaN, where n_windows is the 
+        number of windows of the longest sequence.
+
     Notes
     -----
 
@@ -182,79 +959,29 @@ def aaindex1(X, standardize='none', start=1, end=None):
 
     """
     
-    # load AAIndex1 data
-    aaind1 = pd.read_csv(PATH+'aaindex1.csv')
-
-    # get descriptions of all 566 indices
-    desc = aaind1['Description'].values
-
-    # initialize empty array with shape (n_samples, n_aa1_indices)
-    aaind_arr = np.zeros((len(X), aaind1.shape[0]))
-
-    # fill array with mean of indices per protein/peptide
-    for i, seq in enumerate(range(len(X))):
-        sequence = X['Sequence'][seq]
-        sequence = sequence[start-1:end] # positional information
-        tmp_arr = np.zeros((aaind1.shape[0], len(sequence)) )
-
-        # fill temporary array with indices for each amino acid of the sequence
-        # and compute their mean across all rows
-        for j, aa in enumerate(sequence):
-            tmp_arr[:,j] = np.asarray(aaind1[aa])
-
-        # fill rows with mean vector of tmp_arr
-        aaind_arr[i,:] = tmp_arr.mean(axis=1)
-
-    if standardize == 'none':
-        # removing columns with NaNs
-        inds_nan = np.argwhere(np.isnan(aaind_arr))
-        if len(inds_nan) != 0:
-            cols_nan = np.unique(inds_nan[:,1])
-            cols_nan = np.hstack(cols_nan)
-            aaind_arr = np.delete(aaind_arr, cols_nan, axis=1)
-            desc = np.delete(desc, cols_nan)
-        return pd.DataFrame(aaind_arr, columns=desc)
-
-    else:
-        # finding and removing columns with NaNs and all zeros
-        cols_all = []
-        inds_nan = np.argwhere(np.isnan(aaind_arr))
-        if len(inds_nan) != 0:
-            cols_nan = np.unique(inds_nan[:,1])
-            cols_nan = np.hstack(cols_nan)
-
-        cols_zeros = np.where(~aaind_arr.any(axis=0))[0]
-            
-        if len(inds_nan) != 0 and len(cols_zeros) != 0:
-            cols_all = np.array((cols_nan, cols_zeros))
-            cols_all = np.hstack(cols_all)
-
-        elif len(inds_nan) != 0 and len(cols_zeros) == 0:
-            cols_all = cols_nan
-
-        elif len(inds_nan) == 0 and len(cols_zeros) != 0:
-            cols_all = cols_zeros
-
-        if len(cols_all) > 0:
-            aaind_arr = np.delete(aaind_arr, cols_all, axis=1)
-            desc = np.delete(desc, cols_all)
-
-        # standardization
-        if standardize == 'zscore':
-            scaler = StandardScaler().fit(aaind_arr)
-            aaind_arr = scaler.transform(aaind_arr)
-            
-            return pd.DataFrame(aaind_arr, columns=desc)
-
-        # normalization
-        elif standardize == 'minmax':
-            scaler = MinMaxScaler().fit(aaind_arr)
-            aaind_arr = scaler.transform(aaind_arr)
-
-            return pd.DataFrame(aaind_arr, columns=desc)
+    # load AAIndex1 data as a (20, n_indices) matrix
+    desc, index = load_table('aaindex1')
+
+    # mean index profiles of all windows
+    if window is not None:
+        arr = _window_profile(_as_batch(X), 'aaindex1', start, end, window, 
+                              n_jobs, cache)
+        return _window_output(_scale_windows(arr, standardize), output, dtype)
+
+    # mean index profile of the whole batch, computed from amino acid counts
+    aaind_arr = _cached_matrix(
+        cache, _as_batch(X), start, end, 'aaindex1',
+        lambda batch, start, end: map_shards(_aaindex1_kernel, batch, 
+                                             (start, end),
+                                             n_jobs, width=len(desc)),
+        len(desc))
+
+    return _postprocess(aaind_arr, desc, standardize, dtype, output or 'pandas')
         
         
-def aaindex2(X, standardize='none', start=1, end=None):
+@_chunkwise
+def aaindex2(X, standardize='none', start=1, end=None, n_jobs=None,
+             window=None, dtype=None, output=None, cache=None):
     """Compute amino acid indices from AAIndex2.
 
     AAindex2 ver.9.2 (release Feb, 2017) is a set of lower triangular (67), 
@@ -273,9 +1000,12 @@ def aaindex2(X, standardize='none', start=1, end=None):
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
 
     standardize : string, default='none'
 
@@ -285,11 +1015,43 @@ def aaindex2(X, standardize='none', start=1, end=None):
         'minmax' : index matrix is scaled (normalized) across columns (indices)
                    to have a range of [0, 1].
 
-    start : int, default=1
-        Determines the starting point of the amino acid sequence.
+    start : int or array-like of shape (n_samples, ), default=1
+        Determines the starting point of the amino acid sequence, either for
+        all sequences or for each sequence individually.
+
+    end : int or array-like of shape (n_samples, ), default=None
+        Determines the end point of the amino acid sequence, either for all
+        sequences or for each sequence individually.
+
+    n_jobs : int, default=None
+        Number of worker processes. Sequences are split into contiguous shards
+        that are computed in parallel from shared memory. None computes 
+        everything in the calling process, -1 uses all CPUs. Results are
+        identical for any number of workers.
 
-    end : int, default=None
-        Determines the end point of the amino acid sequence.
+    window : int, default=None
+        If given, indices are averaged over every window of this many 
+        consecutive residues (stride 1, at least 2) using prefix sums, i.e.
+        at constant cost per window. All indices are retained and an index is
+        NaN only for windows containing an amino acid pair with a NaN value. 
+        Standardization is applied across all windows.
+
+    dtype : numpy dtype, default=None
+        Data type of the returned values. None returns np.float64.
+
+    output : string, default=None
+
+        None : same as 'pandas' (or 'numpy' if window is given)
+        'numpy' : return a numpy array
+        'pandas' : return a Pandas DataFrame
+        'arrow' : return a pyarrow Table backed by one column-major copy 
+                  (requires pyarrow), e.g. for writing Parquet files
+        'sparse' : return a scipy.sparse CSR matrix and its column names
+
+    cache : FeatureCache, default=None
+        Persistent cache of raw per-sequence rows (see FeatureCache). Only 
+        sequences that are not in the cache are computed. Not available for
+        window profiles.
 
     Returns
     -------
@@ -297,6 +1059,10 @@ def aaindex2(X, standardize='none', start=1, end=None):
     arr_index2 : Pandas DataFrame of shape (n_samples, 92-94) 
         Column size could vary when standardize != 'none'.
 
+    arr_index2 : ndarray of shape (n_samples, n_windows, 94) if window is given
+        Windows past the end of a sequence are NaN, where n_windows is the 
+        number of windows of the longest sequence.
+
     Notes
     -----
 
@@ -308,110 +1074,30 @@ def aaindex2(X, standardize='none', start=1, end=None):
 
     """
     
-    # load AAIndex2 data
-    raw_lt = pd.read_csv(PATH+'aaindex2_lowtri.csv')
-    raw_sq = pd.read_csv(PATH+'aaindex2_square.csv')
-
-    def compute_aaind2(index, shape):
-        "Compute AAIndex2 for all shapes"
-        
-        # get unique index descriptions
-        desc = [index['Description'][i] for i in\
-                np.arange(0, index.shape[0], 20)]
-        
-        # drop columns to facilitate easier indexing
-        index = index.drop(['Description', 'Amino Acids'], 
-                            axis=1).reset_index(drop=True)
-        
-        # get lengths and indices (e.g. 0, 20, 40,...)
-        LENGTH = len(desc)
-        inds = np.arange(0, index.shape[0], 20)
-        
-        # compute dict for indexing ({'A': 0, 'R': 1, ...})
-        aa_dict = {index.columns[i]: i for i in range(index.shape[1])}
-        
-        # initialitze empty array
-        arr = np.zeros((len(X), LENGTH))
-        
-        for a, seq in enumerate(range(len(X))):
-            sequence = X['Sequence'][seq]
-            sequence = sequence[start-1:end]
-            conpot = np.zeros((len(sequence)-1, LENGTH))
-
-            for i in range(len(sequence)-1):
-                aa1, aa2 = sequence[i], sequence[i+1]
-                aa1_ind, aa2_ind = aa_dict[aa1], aa_dict[aa2]
-
-                if shape == 'square':
-                    aa1_ind = aa1_ind + inds
-                    conpot[i,:] = index.iloc[aa1_ind, aa2_ind]
-
-                elif shape == 'lowtri':
-                    if aa1_ind > aa2_ind:
-                        aa1_ind += inds
-                        conpot[i,:] = index.iloc[aa1_ind, aa2_ind]
-                    else:
-                        aa2_ind += inds
-                        conpot[i,:] = index.iloc[aa2_ind, aa1_ind]
-
-            arr[a,:] = np.asarray(conpot.mean(axis=0))
-            
-        if standardize == 'none':
-            # removing columns with NaNs
-            inds_nan = np.argwhere(np.isnan(arr))
-            if len(inds_nan) != 0:
-                cols_nan = np.unique(inds_nan[:,1])
-                cols_nan = np.hstack(cols_nan)
-                arr = np.delete(arr, cols_nan, axis=1)
-                desc = np.delete(desc, cols_nan)
-            return pd.DataFrame(arr, columns=desc)
-        
-        else:
-            # finding and removing columns with NaNs and all zeros
-            cols_all = []
-            inds_nan = np.argwhere(np.isnan(arr))
-            if len(inds_nan) != 0:
-                cols_nan = np.unique(inds_nan[:,1])
-                cols_nan = np.hstack(cols_nan)
-
-            cols_zeros = np.where(~arr.any(axis=0))[0]
-                
-            if len(inds_nan) != 0 and len(cols_zeros) != 0:
-                cols_all = np.array((cols_nan, cols_zeros))
-                cols_all = np.hstack(cols_all)
-
-            elif len(inds_nan) != 0 and len(cols_zeros) == 0:
-                cols_all = cols_nan
-
-            elif len(inds_nan) == 0 and len(cols_zeros) != 0:
-                cols_all = cols_zeros
-
-            if len(cols_all) > 0:
-                arr = np.delete(arr, cols_all, axis=1)
-                desc = np.delete(desc, cols_all)
-            
-            # standardization
-            if standardize == 'zscore':
-                scaler = StandardScaler().fit(arr)
-                arr = scaler.transform(arr)
-                
-                return pd.DataFrame(arr, columns=desc)
-            
-            elif standardize == 'minmax':
-                scaler = MinMaxScaler().fit(arr)
-                arr = scaler.transform(arr)
-                
-                return pd.DataFrame(arr, columns=desc)
-            
-        
-    # get aaindices2
-    lt = compute_aaind2(raw_lt, 'lowtri')
-    sq = compute_aaind2(raw_sq, 'square')
-    
-    return pd.concat([lt, sq], axis=1)
-
-
-def aaindex3(X, standardize='none', start=1, end=None):
+    # load lower triangular and square AAIndex2 matrices as one dense
+    # (400, n_matrices) table indexed by dipeptide
+    desc, index = load_table('aaindex2')
+
+    # mean pairwise index profiles of all windows
+    if window is not None:
+        arr = _window_profile(_as_batch(X), 'aaindex2', start, end, window, 
+                              n_jobs, cache)
+        return _window_output(_scale_windows(arr, standardize), output, dtype)
+
+    # mean of all pairwise indices of the whole batch, summed in sequence order
+    arr = _cached_matrix(
+        cache, _as_batch(X), start, end, 'aaindex2',
+        lambda batch, start, end: map_shards(_pair_index_kernel, batch, 
+                                             ('aaindex2', start, end),
+                                             n_jobs, width=len(desc)),
+        len(desc))
+
+    return _postprocess(arr, desc, standardize, dtype, output or 'pandas')
+
+
+@_chunkwise
+def aaindex3(X, standardize='none', start=1, end=None, n_jobs=None,
+             window=None, dtype=None, output=None, cache=None):
     """Compute amino acid indices from AAIndex3.
 
     AAindex3 ver.9.2 (release Feb, 2017) is a set of lower triangular (44)
@@ -426,9 +1112,12 @@ def aaindex3(X, standardize='none', start=1, end=None):
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
 
     standardize : string, default='none'
 
@@ -438,11 +1127,43 @@ def aaindex3(X, standardize='none', start=1, end=None):
         'minmax' : index matrix is scaled (normalized) across columns (indices)
                    to have a range of [0, 1].
 
-    start : int, default=1
-        Determines the starting point of the amino acid sequence.
+    start : int or array-like of shape (n_samples, ), default=1
+        Determines the starting point of the amino acid sequence, either for
+        all sequences or for each sequence individually.
+
+    end : int or array-like of shape (n_samples, ), default=None
+        Determines the end point of the amino acid sequence, either for all
+        sequences or for each sequence individually.
+
+    n_jobs : int, default=None
+        Number of worker processes. Sequences are split into contiguous shards
+        that are computed in parallel from shared memory. None computes 
+        everything in the calling process, -1 uses all CPUs. Results are
+        identical for any number of workers.
 
-    end : int, default=None
-        Determines the end point of the amino acid sequence.
+    window : int, default=None
+        If given, indices are averaged over every window of this many 
+        consecutive residues (stride 1, at least 2) using prefix sums, i.e.
+        at constant cost per window. All indices are retained and an index is
+        NaN only for windows containing an amino acid pair with a NaN value. 
+        Standardization is applied across all windows.
+
+    dtype : numpy dtype, default=None
+        Data type of the returned values. None returns np.float64.
+
+    output : string, default=None
+
+        None : same as 'pandas' (or 'numpy' if window is given)
+        'numpy' : return a numpy array
+        'pandas' : return a Pandas DataFrame
+        'arrow' : return a pyarrow Table backed by one column-major copy 
+                  (requires pyarrow), e.g. for writing Parquet files
+        'sparse' : return a scipy.sparse CSR matrix and its column names
+
+    cache : FeatureCache, default=None
+        Persistent cache of raw per-sequence rows (see FeatureCache). Only 
+        sequences that are not in the cache are computed. Not available for
+        window profiles.
 
     Returns
     -------
@@ -450,6 +1171,10 @@ def aaindex3(X, standardize='none', start=1, end=None):
     arr_index3 : Pandas DataFrame of shape (n_samples, 43-47) 
         Column size could vary when standardize != 'none'.
 
+    arr_index3 : ndarray of shape (n_samples, n_windows, 47) if window is given
+        Windows past the end of a sequence are NaN, where n_windows is the 
+        number of windows of the longest sequence.
+
     Notes
     -----
 
@@ -461,122 +1186,135 @@ def aaindex3(X, standardize='none', start=1, end=None):
 
     """
     
-    # load AAIndex3 data
-    raw_lt = pd.read_csv(PATH+'aaindex3_lowtri.csv')
-    raw_sq = pd.read_csv(PATH+'aaindex3_square.csv')
+    # load lower triangular and square AAIndex3 matrices as one dense
+    # (400, n_matrices) table indexed by dipeptide
+    desc, index = load_table('aaindex3')
 
-    def compute_aaind3(index, shape):
-        "Compute AAIndex3 for all shapes"
-        
-        # get unique index descriptions
-        desc = [index['Description'][i] for i in\
-                      np.arange(0, index.shape[0], 20)]
-        
-        # drop columns to facilitate easier indexing
-        index = index.drop(['Description', 'Amino Acids'], 
-                            axis=1).reset_index(drop=True)
-        
-        # get lengths and indices (e.g. 0, 20, 40,...)
-        LENGTH = len(desc)
-        inds = np.arange(0, index.shape[0], 20)
-        
-        # compute dict for indexing ({'A': 0, 'R': 1, ...})
-        aa_dict = {index.columns[i]: i for i in range(index.shape[1])}
-        
-        # initialitze empty array
-        arr = np.zeros((len(X), LENGTH))
-        
-        for a, seq in enumerate(range(len(X))):
-            sequence = X['Sequence'][seq]
-            sequence = sequence[start-1:end]
-            conpot = np.zeros((len(sequence)-1, LENGTH))
-
-            for i in range(len(sequence)-1):
-                aa1, aa2 = sequence[i], sequence[i+1]
-                aa1_ind, aa2_ind = aa_dict[aa1], aa_dict[aa2]
-
-                if shape == 'square':
-                    aa1_ind = aa1_ind + inds
-                    conpot[i,:] = index.iloc[aa1_ind, aa2_ind]
-
-                elif shape == 'lowtri':
-                    if aa1_ind > aa2_ind:
-                        aa1_ind += inds
-                        conpot[i,:] = index.iloc[aa1_ind, aa2_ind]
-                    else:
-                        aa2_ind += inds
-                        conpot[i,:] = index.iloc[aa2_ind, aa1_ind]
-
-            arr[a,:] = np.asarray(conpot.mean(axis=0))
-            
-        if standardize == 'none':
-            # removing columns with NaNs
-            inds_nan = np.argwhere(np.isnan(arr))
-            if len(inds_nan) != 0:
-                cols_nan = np.unique(inds_nan[:,1])
-                cols_nan = np.hstack(cols_nan)
-                arr = np.delete(arr, cols_nan, axis=1)
-                desc = np.delete(desc, cols_nan)
-            return pd.DataFrame(arr, columns=desc)
-        
-        else:
-            # finding and removing columns with NaNs and all zeros
-            cols_all = []
-            inds_nan = np.argwhere(np.isnan(arr))
-            if len(inds_nan) != 0:
-                cols_nan = np.unique(inds_nan[:,1])
-                cols_nan = np.hstack(cols_nan)
-
-            cols_zeros = np.where(~arr.any(axis=0))[0]
-                
-            if len(inds_nan) != 0 and len(cols_zeros) != 0:
-                cols_all = np.array((cols_nan, cols_zeros))
-                cols_all = np.hstack(cols_all)
-
-            elif len(inds_nan) != 0 and len(cols_zeros) == 0:
-                cols_all = cols_nan
-
-            elif len(inds_nan) == 0 and len(cols_zeros) != 0:
-                cols_all = cols_zeros
-
-            if len(cols_all) > 0:
-                arr = np.delete(arr, cols_all, axis=1)
-                desc = np.delete(desc, cols_all)
-            
-            # standardization
-            if standardize == 'zscore':
-                scaler = StandardScaler().fit(arr)
-                arr = scaler.transform(arr)
-                
-                return pd.DataFrame(arr, columns=desc)
-            
-            elif standardize == 'minmax':
-                scaler = MinMaxScaler().fit(arr)
-                arr = scaler.transform(arr)
-                
-                return pd.DataFrame(arr, columns=desc)
-            
-        
-    # get aaindices3
-    lt = compute_aaind3(raw_lt, 'lowtri')
-    sq = compute_aaind3(raw_sq, 'square')
-    
-    return pd.concat([lt, sq], axis=1)
+    # mean pairwise index profiles of all windows
+    if window is not None:
+        arr = _window_profile(_as_batch(X), 'aaindex3', start, end, window, 
+                              n_jobs, cache)
+        return _window_output(_scale_windows(arr, standardize), output, dtype)
+
+    # mean of all pairwise indices of the whole batch, summed in sequence order
+    arr = _cached_matrix(
+        cache, _as_batch(X), start, end, 'aaindex3',
+        lambda batch, start, end: map_shards(_pair_index_kernel, batch, 
+                                             ('aaindex3', start, end),
+                                             n_jobs, width=len(desc)),
+        len(desc))
+
+    return _postprocess(arr, desc, standardize, dtype, output or 'pandas')
+
+
+@_chunkwise
+def custom_index(X, name, standardize='none', start=1, end=None, n_jobs=None,
+                 window=None, dtype=None, output=None, cache=None):
+    """Compute the indices of a registered amino acid scale or pair matrix.
+
+    Tables added with register_table are computed exactly like the bundled 
+    ones: residue scales are averaged across the sequence as in aaindex1, 
+    pair matrices (e.g. contact potentials) are collected for each amino 
+    acid pair in the sequence, then averaged as in aaindex2 and aaindex3.
+
+    Parameters
+    ----------
+
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
+        The column containing protein or peptide sequences must be labeled
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
+
+    name : string
+        Name of a table added with register_table (or of a bundled table).
 
+    standardize : string, default='none'
+
+        'none' : unstandardized index matrix will be returned
+        'zscore' : index matrix is standardized across columns (indices) to have
+                   a mean of 0 and standard deviation of 1 (unit variance).
+        'minmax' : index matrix is scaled (normalized) across columns (indices)
+                   to have a range of [0, 1].
+
+    start : int or array-like of shape (n_samples, ), default=1
+        Determines the starting point of the amino acid sequence, either for
+        all sequences or for each sequence individually.
+
+    end : int or array-like of shape (n_samples, ), default=None
+        Determines the end point of the amino acid sequence, either for all
+        sequences or for each sequence individually.
+
+    n_jobs : int, default=None
+        Number of worker processes (see aaindex1). Registered tables are 
+        passed on to the workers.
+
+    window : int, default=None
+        If given, indices are averaged over every window of this many 
+        consecutive residues (stride 1, at least 1 for residue scales and 2 
+        for pair matrices), as in aaindex1 and aaindex2.
+
+    dtype : numpy dtype, default=None
+        Data type of the returned values. None returns np.float64.
+
+    output : string, default=None
+        Container of the result (see aaindex1).
+
+    cache : FeatureCache, default=None
+        Persistent cache of raw per-sequence rows (see FeatureCache). Rows 
+        are keyed by the values of the table, so re-registering a table with
+        different values does not return stale rows.
+
+    Returns
+    -------
+
+    arr_index : Pandas DataFrame of shape (n_samples, n_indices) 
+        Columns are named after the scales or matrices of the table. As with
+        the AAindex functions, columns containing NaNs are removed.
+
+    arr_index : ndarray of shape (n_samples, n_windows, n_indices) if window 
+        is given
+
+    """
 
-def ngram_composition(X, ngram=2, start=1, end=None):
+    desc, index = load_table(name)
+
+    if window is not None:
+        arr = _window_profile(_as_batch(X), name, start, end, window, n_jobs,
+                              cache)
+        return _window_output(_scale_windows(arr, standardize), output, dtype)
+
+    arr = _cached_matrix(
+        cache, _as_batch(X), start, end, name,
+        lambda batch, start, end: map_shards(_table_kernel, batch, 
+                                             (name, start, end),
+                                             n_jobs, width=len(desc)),
+        len(desc))
+
+    return _postprocess(arr, desc, standardize, dtype, output or 'pandas')
+
+
+@_chunkwise
+def ngram_composition(X, ngram=2, start=1, end=None, gap=0, output=None,
+                      n_jobs=None, dtype=None, cache=None):
     """Compute n-gram peptide composition.
     
-    This function computes the di-, tri-, or quadpeptide composition of
-    amino acid sequences. Therefore, the function argument 'ngram' can only
-    take on the values 2, 3, and 4 - otherwise, it will raise a ValueError.
+    This function computes the di-, tri-, or quadpeptide (or any other 
+    n-gram) composition of amino acid sequences. The function argument 'ngram'
+    can take on values between 1 and 14 - otherwise, it will raise a 
+    ValueError. Optionally, gapped n-grams, whose residues are separated by a
+    fixed number of positions, can be counted.
     
     Parameters
     ----------
     
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
        
     ngram : int, default=2
         Integer denoting the desired n-gram composition.
@@ -585,12 +1323,42 @@ def ngram_composition(X, ngram=2, start=1, end=None):
         3 : tripepitde composition
         4 : quadpeptide composition
 
-    start : int, default=1
-        Determines the starting point of the amino acid sequence.
+    start : int or array-like of shape (n_samples, ), default=1
+        Determines the starting point of the amino acid sequence, either for
+        all sequences or for each sequence individually.
+
+    end : int or array-like of shape (n_samples, ), default=None
+        Determines the end point of the amino acid sequence, either for all
+        sequences or for each sequence individually.
+
+    gap : int, default=0
+        Number of positions skipped between consecutive residues of an n-gram.
+        For instance, with ngram=2 and gap=1, the sequence 'ACD' contains the
+        gapped dipeptide 'A.D', where '.' denotes the skipped residue.
+
+    output : string, default=None
+
+        None : same as 'pandas'
+        'numpy' : return a dense numpy array
+        'pandas' : return a dense Pandas DataFrame
+        'arrow' : return a pyarrow Table backed by one column-major copy 
+                  (requires pyarrow), e.g. for writing Parquet files
+        'sparse' : return a scipy.sparse CSR matrix and its column names, 
+                   built directly from the n-grams present in the sequences
+
+    n_jobs : int, default=None
+        Number of worker processes. Sequences are split into contiguous shards
+        that are computed in parallel from shared memory. None computes 
+        everything in the calling process, -1 uses all CPUs.
+
+    dtype : numpy dtype or 'compact', default=None
+        Data type of the returned counts. None returns the smallest signed
+        integer type holding all counts, 'compact' the smallest unsigned one.
+
+    cache : FeatureCache, default=None
+        Persistent cache of the n-gram counts of each sequence (see 
+        FeatureCache). Only sequences that are not in the cache are computed.
 
-    end : int, default=None
-        Determines the end point of the amino acid sequence.
-        
     Returns
     -------
     
@@ -600,114 +1368,188 @@ def ngram_composition(X, ngram=2, start=1, end=None):
         - (n_samples, 8000) for tripeptide composition
         - (n_samples, 160000) for quadpeptide composition
 
+    (arr_ngram, columns) : tuple of scipy.sparse.csr_matrix of shape 
+        (n_samples, n_unique_ngrams) and ndarray of shape (n_unique_ngrams, )
+        if output='sparse'
+
     Notes
     -----
 
     Columns containing all zeros will be removed, therefore the column size of
     the returned array can vary.
+
+    For tri- and quadpeptides, output='sparse' is highly recommended, since its
+    memory grows with the number of distinct n-grams actually present rather 
+    than with 20^ngram. The matrix can be passed directly to scikit-learn.
        
     """
     
-    # make sure ngram is between 2-4
-    valid = [2, 3, 4]
-    if ngram not in valid:
-        raise ValueError("ngram_comp: ngram must be one of %r." % valid)
-    
-    # get ngram combinations
-    aa_combo = []
-    amino_acids = ['A','C','D','E','F','G','H','I','K','L',
-                   'M','N','P','Q','R','S','T','V','W','Y']
+    # make sure the n-gram ids fit into int64 (20^14 < 2^63)
+    if not isinstance(ngram, (int, np.integer)) or not 1 <= ngram <= 14:
+        raise ValueError("ngram_comp: ngram must be an integer between 1-14.")
+    if gap < 0:
+        raise ValueError("ngram_comp: gap must be a non-negative integer.")
+
+    output = output or 'pandas'
+    if output not in OUTPUTS:
+        raise ValueError("output must be one of %r." % OUTPUTS)
+    batch = _as_batch(X)
+
+    # reuse the amino acid and dipeptide counts of the batch
+    if gap == 0 and ngram <= 2 and output != 'sparse' and n_jobs is None\
+       and cache is None:
+        if ngram == 1:
+            counts = batch.counts(start, end)
+        else:
+            counts = batch.dipeptide_counts(start, end)
+        present = counts.any(axis=0)
+        columns = kmer_to_string(np.flatnonzero(present), ngram)
+        counts = counts[:, present]
 
-    def combo(seq, prefix, n, k):
-        "Generate every possible ngram combination"
-        if k == 0: 
-            aa_combo.append(prefix)
-            return aa_combo  
+        return _format(counts, columns, output, _count_dtype(counts, dtype))
 
-        for i in range(n): 
-            newPrefix = prefix + seq[i] 
-            combo(seq, newPrefix, n, k-1) 
+    # n-gram ids and their counts per sequence
+    n_samples, rows, ids, counts = _ngram_triplets(batch, ngram, gap, start, 
+                                                   end, n_jobs, cache)
 
-    combo(amino_acids, "", 20, ngram)
-    
-    # create dataframe with all zeros
-    arr_ngram = np.zeros((len(X), len(aa_combo)))
-    df_ngram = pd.DataFrame(arr_ngram, columns=aa_combo)
-    
-    # define n-gram function
-    def n_gram(seq):
-        "Computing n-gram features for sequence pairs"
-        n_gram_list = []
-        for i in range(len(seq)):
-            aa_pair = seq[i:i+ngram]
-            if len(aa_pair) == ngram:
-                n_gram_list.append(aa_pair)
-        return Counter(n_gram_list)
-    
-    # compute n-gram composition
-    for i in range(len(X)):
-        sequence = X['Sequence'][i]
-        sequence = sequence[start-1:end]
-        pep_comp = n_gram(sequence)
-        for j in range(len(pep_comp)):
-            keys = list(pep_comp)
-            df_ngram[keys[j]][i] = pep_comp[keys[j]]
+    # only n-grams that are present become columns
+    vocab, cols = np.unique(ids, return_inverse=True)
+    columns = kmer_to_string(vocab, ngram, gap)
 
-    # delete zero columns
-    df_ngram = df_ngram.loc[:, (df_ngram!=0).any(axis=0)]
-            
-    return df_ngram
+    dtype = _count_dtype(counts, dtype)
+    if output == 'sparse':
+        arr_ngram = _csr_matrix((counts.astype(dtype), (rows, cols)),
+                                      shape=(n_samples, len(vocab)))
+
+        return arr_ngram, columns
+
+    arr_ngram = np.zeros((n_samples, len(vocab)), dtype=dtype)
+    arr_ngram[rows, cols] = counts
+
+    return _format(arr_ngram, columns, output)
 
 
-def position_enrichment(X, position, aminoacid):
+def _positional_onehot(batch, position, dtype, output):
+    "Sparse one-hot encoding of the residues at the given positions"
+
+    if position is None:
+        positions = np.arange(1, int(batch.lengths.max(initial=0))+1)
+    elif isinstance(position, (int, np.integer)):
+        positions = np.arange(1, position+1)
+    else:
+        positions = np.asarray(position, dtype=np.int64).ravel()
+    columns = ['%s%d' % (aa, p) for p in positions for aa in AMINO_ACIDS]
+
+    # residues at all positions, 20 past the end of a sequence
+    padded = batch.padded(max(int(positions.max(initial=0)), 1))
+    residues = padded[:, np.clip(positions-1, 0, None)]
+    residues[:, positions < 1] = 20
+
+    # one nonzero per position inside a sequence, in column order
+    rows, idx = np.nonzero(residues < 20)
+    indptr = np.zeros(len(batch)+1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(batch)), out=indptr[1:])
+    onehot = _csr_matrix(
+        (np.ones(len(rows), dtype=dtype or np.uint8), 
+         idx*20 + residues[rows, idx], indptr), 
+        shape=(len(batch), 20*len(positions)))
+
+    if output == 'sparse':
+        return onehot, np.asarray(columns)
+    return _format(onehot.toarray(), columns, output)
+
+
+@_chunkwise
+def position_enrichment(X, position=None, aminoacid=None, dtype=None, 
+                        output=None, method='query'):
     """Compute the presence of an amino acid at a specific position.
 
     This function returns a binary feature vector or matrix in which ones 
     indicate the presence of the given amino acid(s) at the specified 
-    position(s), and zeros indicate their absence. 
+    position(s), and zeros indicate their absence. Sequences are laid out
+    as rows of a padded residue matrix, so any number of (position, amino 
+    acid) queries are answered by a single lookup. Positions past the end of
+    a sequence (or smaller than 1) are treated as absent, as are non-standard
+    residues (e.g. X or U), which may occur in the sequences.
 
     Parameters
     ----------
     
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. A SequenceBatch shares its encoding and intermediate
+        results across all functions it is passed to. An iterator of 
+        DataFrames (e.g. from read_chunks) is processed chunk by chunk and an
+        iterator of results is returned.
        
     position : int or list
         Integer or list of integers denoting the position(s) in the sequence.
+        If method='onehot', an integer L encodes positions 1-L, a list the
+        given positions, and None all positions up to the longest sequence.
 
     aminoacid : string or list
         String or list of strings indicating the amino acid(s) of interest.
-        
+        Ignored if method='onehot'.
+
+    dtype : numpy dtype, default=None
+        Data type of the returned values. None returns np.uint8.
+
+    output : string, default=None
+
+        None : 'numpy' if method='query', 'sparse' if method='onehot'
+        'numpy' : return a numpy array
+        'pandas' : return a Pandas Series (single position) or DataFrame, with columns named
+                   after amino acid and position, e.g. 'K5'
+        'arrow' : return a pyarrow Table backed by one column-major copy 
+                  (requires pyarrow), e.g. for writing Parquet files
+        'sparse' : return a scipy.sparse CSR matrix and its column names
+
+    method : string, default='query'
+
+        'query' : presence of the given amino acid(s) at the given position(s)
+        'onehot' : one-hot encoding of the 20 amino acids at every position,
+                   with columns 'A1', 'C1', ..., 'Y1', 'A2', ...; positions 
+                   past the end of a sequence are all zeros
+
     Returns
     -------
     
     pos : ndarray of shape (n_samples, ) or (n_samples, n_positions)
+          or scipy.sparse.csr_matrix of shape (n_samples, 20*n_positions)
+          and its column names if method='onehot'
        
     """
 
-    if isinstance(position, int) and isinstance(aminoacid, str):
-        pos = np.zeros((X.shape[0],))
-        for a, seq in enumerate(range(len(X))):
-            sequence = X['Sequence'][seq]
-            for i, aa in enumerate(sequence):
-                if i == position-1 and aa == aminoacid:
-                    pos[a] = 1
-        return pos
-    
-    elif isinstance(position, list) and isinstance(aminoacid, list):
-    
-        if len(position) != len(aminoacid):
-            raise ValueError("Number of positions does not match number of amino acids")
-
-        pos = np.zeros((X.shape[0], len(position)))
-
-        for a, seq in enumerate(range(len(X))):
-            sequence = X['Sequence'][seq]
-            for i in range(len(position)):
-                if sequence[position[i]-1] == aminoacid[i]:
-                    pos[a, i] = 1
-        return pos
-    
-    else:
-        raise ValueError("The arguments position and aminoacid must either be integer/string or lists of integers/strings.")
\ No newline at end of file
+    # only residues are compared, so non-standard ones are allowed
+    batch = _as_lenient_batch(X)
+    if method == 'onehot':
+        return _positional_onehot(batch, position, dtype, output or 'sparse')
+    elif method != 'query':
+        raise ValueError("method must be one of %r." % ['query', 'onehot'])
+
+    output = output or 'numpy'
+    single = isinstance(position, (int, np.integer)) and\
+             isinstance(aminoacid, str)
+    if single:
+        position, aminoacid = [position], [aminoacid]
+    elif not (isinstance(position, (list, tuple, np.ndarray)) and 
+              isinstance(aminoacid, (list, tuple, np.ndarray))):
+        raise ValueError("The arguments position and aminoacid must either be integer/string or lists of integers/strings.")
+    elif len(position) != len(aminoacid):
+        raise ValueError("Number of positions does not match number of amino acids")
+
+    # unknown amino acids never match
+    positions = np.asarray(position, dtype=np.int64)
+    codes = np.array([AMINO_ACIDS.index(aa) if aa in list(AMINO_ACIDS) else -1
+                      for aa in aminoacid], dtype=np.int16)
+
+    # all queries as one lookup into the residue matrix
+    padded = batch.padded(max(int(positions.max(initial=0)), 1))
+    pos = padded[:, np.clip(positions-1, 0, None)] == codes
+    pos[:, positions < 1] = False
+    pos = pos.astype(dtype or np.uint8)
+
+    columns = ['%s%d' % (aa, p) for aa, p in zip(aminoacid, position)]
+    if single:
+        return _format(pos[:, 0], columns, output)
+    return _format(pos, columns, output)
\ No newline at end of file
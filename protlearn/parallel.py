@@ -0,0 +1,179 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from protlearn.preprocessing import SequenceBatch
+from protlearn.tables import _CUSTOM, _restore_tables
+
+
+def effective_n_jobs(n_jobs):
+    """Number of worker processes for a given n_jobs.
+
+    As in scikit-learn, None means 1 and negative values count backwards from
+    the number of CPUs (-1 uses all CPUs).
+    """
+
+    if n_jobs is None:
+        return 1
+    if n_jobs == 0:
+        raise ValueError("n_jobs == 0 has no meaning.")
+    if n_jobs < 0:
+        return max(os.cpu_count() + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def _shared_memory():
+    """multiprocessing.shared_memory, imported when a pool is used.
+
+    It requires Python 3.8, so that the serial path (n_jobs=None or 1) works
+    on older versions.
+    """
+
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise ImportError("n_jobs > 1 requires Python 3.8 or later.")
+
+    return shared_memory
+
+
+def _to_shared(arr):
+    "Copy an array into a new shared memory block"
+
+    shm = _shared_memory().SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+
+    return shm
+
+
+def _shard_args(args, n_samples, lo, hi):
+    "Split per-sequence array arguments along with the batch"
+
+    return tuple(np.asarray(arg)[lo:hi] if not isinstance(arg, str) and 
+                 np.ndim(arg) == 1 and len(arg) == n_samples else arg 
+                 for arg in args)
+
+
+def _run_shard(kernel, args, data, offsets, output, lo, hi):
+    "Compute the kernel for sequences lo:hi of the shared batch"
+
+    shared_memory = _shared_memory()
+    data_shm = shared_memory.SharedMemory(name=data[0])
+    offsets_shm = shared_memory.SharedMemory(name=offsets[0])
+    out_shm = None
+    try:
+        all_data = np.ndarray(data[1], np.uint8, buffer=data_shm.buf)
+        all_offsets = np.ndarray(offsets[1], np.int64, buffer=offsets_shm.buf)
+        shard = SequenceBatch.from_encoded(
+            all_data[all_offsets[lo]:all_offsets[hi]],
+            np.diff(all_offsets[lo:hi+1]))
+        result = kernel(shard, *_shard_args(args, len(all_offsets)-1, lo, hi))
+
+        if output is None:
+            return result
+
+        # write directly into the shared output array
+        out_shm = shared_memory.SharedMemory(name=output[0])
+        out = np.ndarray(output[1], output[2], buffer=out_shm.buf)
+        out[lo:hi] = result
+        del out, result
+
+    finally:
+        # views on shared memory must be released before closing it
+        shard = all_data = all_offsets = None
+        data_shm.close()
+        offsets_shm.close()
+        if out_shm is not None:
+            out_shm.close()
+
+
+def map_shards(kernel, batch, args=(), n_jobs=None, width=None,
+               dtype=np.float64, out=None):
+    """Apply a kernel to contiguous shards of a batch in a process pool.
+
+    The encoded sequences are placed in shared memory, from which each worker
+    builds its shard without pickling. Shards are contiguous and results are
+    placed in sequence order, so the output does not depend on scheduling.
+
+    Parameters
+    ----------
+
+    kernel : callable
+        Picklable function kernel(batch, *args) computing the result for a
+        SequenceBatch.
+
+    batch : SequenceBatch
+
+    args : tuple, default=()
+        Additional arguments passed to the kernel. One-dimensional arrays (or
+        lists) of length n_samples (e.g. per-sequence start positions) are split into
+        shards along with the batch.
+
+    n_jobs : int, default=None
+        Number of worker processes. None means 1, -1 means all CPUs.
+
+    width : int, default=None
+        If given, the kernel must return an array of shape (n_shard, width),
+        which is written directly into a shared output array of the given
+        dtype. Otherwise, the (pickled) kernel results are returned as a list.
+
+    dtype : numpy dtype, default=np.float64
+        Dtype of the output array if width is given.
+
+    out : ndarray of shape (n_samples, width), default=None
+        If given (together with width), the output is written into out (e.g.
+        a slice of a memory-mapped array) instead of a new array.
+
+    Returns
+    -------
+
+    out : ndarray of shape (n_samples, width) if width is given, otherwise
+          list of kernel results in shard order
+
+    """
+
+    n_shards = min(effective_n_jobs(n_jobs), len(batch))
+    if n_shards <= 1:
+        result = kernel(batch, *args)
+        if width is None:
+            return [result]
+        if out is not None:
+            out[...] = result
+            return out
+        return result
+
+    bounds = np.linspace(0, len(batch), n_shards+1).astype(np.int64)
+    shms = [_to_shared(batch.data), _to_shared(batch.offsets)]
+    data = (shms[0].name, batch.data.shape)
+    offsets = (shms[1].name, batch.offsets.shape)
+    output = None
+    if width is not None:
+        shape = (len(batch), width)
+        shms.append(_shared_memory().SharedMemory(
+            create=True, size=max(int(np.prod(shape))*np.dtype(dtype).itemsize,
+                                  1)))
+        output = (shms[2].name, shape, dtype)
+
+    try:
+        # registered tables are not inherited by spawned workers
+        with ProcessPoolExecutor(n_shards, initializer=_restore_tables,
+                                 initargs=(dict(_CUSTOM), )) as executor:
+            futures = [executor.submit(_run_shard, kernel, args, data, offsets,
+                                       output, lo, hi)
+                       for lo, hi in zip(bounds[:-1], bounds[1:])]
+            results = [future.result() for future in futures]
+
+        if width is None:
+            return results
+        shared = np.ndarray(shape, dtype, buffer=shms[2].buf)
+        if out is not None:
+            out[...] = shared
+            del shared
+            return out
+        return shared.copy()
+
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
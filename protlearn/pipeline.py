@@ -0,0 +1,499 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+import os
+import re
+import numpy as np
+import pandas as pd
+from functools import partial
+from collections.abc import Iterator
+from protlearn.tables import AMINO_ACIDS, load_table, _table_kind, _is_table,\
+                             _DERIVED
+from protlearn.parallel import map_shards
+from protlearn.preprocessing import SequenceBatch, _as_batch, _AA_LOOKUP
+from protlearn.feature_engineering import ngram_composition, _chunkwise,\
+                                          kmer_vocabulary, kmer_to_string,\
+                                          _table_kernel, _residue_profile,\
+                                          _pair_profile, _filter_columns
+
+
+# features that can be requested from featurize
+FEATURES = ['length', 'composition', 'composition_relative', 'aaindex1', 
+            'aaindex2', 'aaindex3', 'ngram<n>', '<registered table>']
+
+
+def _check_features(features):
+    "Raise a ValueError for features that featurize cannot compute"
+
+    for feature in features:
+        if not (feature in ['length', 'composition', 'composition_relative']
+                or re.fullmatch(r'ngram(\d+)', feature) or _is_table(feature)):
+            raise ValueError("Unknown feature %r. Must be one of %r." 
+                             % (feature, FEATURES))
+
+
+def _index_blocks(batch, features, standardize, start, end):
+    """Filtered and scaled index blocks of all requested tables.
+
+    All residue tables are stacked into one (20, n) table and all pair tables
+    into one (400, n) table, so that the residues and the pairs of the batch
+    are each traversed once. NaN (and all-zero) columns are then removed and
+    the features scaled per table, as in the individual functions.
+    """
+
+    tables = [feature for feature in dict.fromkeys(features) 
+              if _is_table(feature)]
+    blocks = {}
+    for kind, profile in [('residue', _residue_profile), 
+                          ('pair', _pair_profile)]:
+        names = [name for name in tables if _table_kind(name) == kind]
+        if not names:
+            continue
+        fused = np.hstack([load_table(name)[1] for name in names])
+        arr = profile(batch, fused, start, end)
+
+        offset = 0
+        for name in names:
+            desc = load_table(name)[0]
+            blocks[name] = _filter_columns(arr[:, offset:offset+len(desc)], 
+                                           desc, standardize)
+            offset += len(desc)
+
+    return blocks
+
+
+def _count_block(batch, feature, start, end):
+    "Counts (or relative counts) of a batch without all-zero columns"
+
+    match = re.fullmatch(r'ngram(\d+)', feature)
+    if match and int(match.group(1)) > 2:
+        arr, columns = ngram_composition(batch, int(match.group(1)), start, 
+                                         end, output='sparse')
+        return arr.toarray(), columns
+
+    if feature == 'ngram2':
+        counts = batch.dipeptide_counts(start, end)
+    else:
+        counts = batch.counts(start, end)
+    present = counts.any(axis=0)
+    columns = kmer_to_string(np.flatnonzero(present), 
+                             2 if feature == 'ngram2' else 1)
+    counts = counts[:, present]
+
+    if feature == 'composition_relative':
+        return np.round(counts/batch.lengths[:, None], 3), columns
+    return counts, columns
+
+
+@_chunkwise
+def featurize(X, features=('length', 'composition', 'aaindex1', 'aaindex2', 
+                           'aaindex3'), standardize='none', start=1, end=None):
+    """Compute several features in a single call.
+
+    The sequences are encoded only once. All residue based indices (aaindex1
+    and registered residue scales) are computed in a single pass over the 
+    amino acid counts and all pair based indices (aaindex2, aaindex3 and 
+    registered pair matrices) in a single pass over the residue pairs. The 
+    feature blocks are written into a single matrix without building 
+    intermediate dataframes.
+
+    Parameters
+    ----------
+
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
+        The column containing protein or peptide sequences must be labeled
+        'Sequence'. An iterator of DataFrames (e.g. from read_chunks) is 
+        processed chunk by chunk and an iterator of results is returned.
+
+    features : list of strings, default=('length', 'composition', 'aaindex1',
+                                         'aaindex2', 'aaindex3')
+
+        'length' : sequence length
+        'composition' : absolute amino acid composition
+        'composition_relative' : relative amino acid composition
+        'aaindex1' : AAIndex1
+        'aaindex2' : AAIndex2
+        'aaindex3' : AAIndex3
+        'ngram<n>' : n-gram composition, e.g. 'ngram2' for dipeptides
+        or the name of a table added with register_table (see custom_index)
+
+    standardize : string, default='none'
+        Standardization of the index features ('none', 'zscore', 'minmax').
+
+    start : int or array-like of shape (n_samples, ), default=1
+        Determines the starting point of the amino acid sequence, either for
+        all sequences or for each sequence individually.
+
+    end : int or array-like of shape (n_samples, ), default=None
+        Determines the end point of the amino acid sequence, either for all
+        sequences or for each sequence individually.
+
+    Returns
+    -------
+
+    feats : Pandas DataFrame of shape (n_samples, n_features)
+        Features in the requested order. Column names are prefixed with the 
+        name of their feature, e.g. 'composition_A' or 'aaindex1_ANDN920101'.
+
+    Notes
+    -----
+
+    As with the individual functions, NaN and all-zero columns are removed, 
+    so the number of columns can vary between datasets.
+
+    """
+
+    _check_features(features)
+    batch = _as_batch(X)
+
+    blocks = _index_blocks(batch, features, standardize, start, end)
+    for feature in features:
+        if feature == 'length':
+            blocks[feature] = batch.lengths[:, None], ['length']
+        elif feature not in blocks:
+            blocks[feature] = _count_block(batch, feature, start, end)
+
+    # write all blocks into one matrix in the requested order
+    widths = [blocks[feature][0].shape[1] for feature in features]
+    feats = np.empty((len(batch), sum(widths)))
+    columns = []
+    offset = 0
+    for feature, width in zip(features, widths):
+        arr, cols = blocks[feature]
+        feats[:, offset:offset+width] = arr
+        columns.extend(col if feature == 'length' else feature+'_'+col 
+                       for col in cols)
+        offset += width
+
+    return pd.DataFrame(feats, columns=columns, copy=False)
+
+
+# compiled layouts of featurize_one, keyed by the tuple of features; they
+# are recompiled whenever a table is registered
+_LAYOUTS = {}
+_DERIVED.append(_LAYOUTS)
+
+
+def _columns(cols):
+    "Use a slice instead of an index array for contiguous columns"
+
+    if len(cols) and (np.diff(cols) == 1).all():
+        return slice(cols[0], cols[-1]+1)
+    return cols
+
+
+def _layout(features):
+    """Compile the fixed output layout of featurize_one.
+
+    Counts are written directly. All indices averaged over residues are fused
+    into one residue table and all indices averaged over pairs into one pair
+    table, so that a sequence needs a single product with each of them.
+    """
+
+    features = tuple(features)
+    layout = _LAYOUTS.get(features)
+    if layout is not None:
+        return layout
+
+    names = []
+    layout = {'length': [], 'counts': [], 'relative': [], 'pair_counts': []}
+    tables = {'residue': [], 'pair': []}
+    for feature in features:
+        offset = len(names)
+        if feature == 'length':
+            desc, blocks = ['length'], layout['length']
+        elif feature in ['composition', 'ngram1']:
+            desc, blocks = list(AMINO_ACIDS), layout['counts']
+        elif feature == 'composition_relative':
+            desc, blocks = list(AMINO_ACIDS), layout['relative']
+        elif feature == 'ngram2':
+            desc, blocks = kmer_vocabulary(2), layout['pair_counts']
+        elif _is_table(feature):
+            desc, table = load_table(feature)
+            blocks = tables[_table_kind(feature)]
+            blocks.append((np.arange(offset, offset+len(desc)), table))
+        else:
+            raise ValueError("Unknown feature %r. featurize_one supports %r."
+                             % (feature, FEATURES[:-2] + ['ngram1', 'ngram2', 
+                                                          FEATURES[-1]]))
+        if not _is_table(feature):
+            blocks.append(slice(offset, offset+len(desc)))
+        names.extend(col if feature == 'length' else feature+'_'+col 
+                     for col in desc)
+    layout['names'] = names
+
+    for key, blocks in tables.items():
+        if blocks:
+            cols = np.concatenate([cols for cols, table in blocks])
+            table = np.ascontiguousarray(np.hstack([table for cols, table 
+                                                    in blocks]))
+            layout[key] = (_columns(cols), table)
+
+    # the residue table is multiplied with frequencies, so its NaNs are set
+    # to 0 and restored in the output for the residues that are present
+    if tables['residue']:
+        cols = np.concatenate([cols for cols, table in tables['residue']])
+        table = layout['residue'][1]
+        nan_cols = np.flatnonzero(np.isnan(table).any(axis=0))
+        layout['residue_nan'] = (np.isnan(table[:, nan_cols]).astype(float),
+                                 cols[nan_cols])
+        table[np.isnan(table)] = 0
+    _LAYOUTS[features] = layout
+
+    return layout
+
+
+def feature_names(features=('composition', 'aaindex1', 'aaindex2', 
+                            'aaindex3')):
+    """Column names of the fixed output layout of featurize_one.
+
+    Parameters
+    ----------
+
+    features : list of strings, default=('composition', 'aaindex1', 
+                                          'aaindex2', 'aaindex3')
+        See featurize_one.
+
+    Returns
+    -------
+
+    names : list of strings
+        Names of the columns returned by featurize_one, prefixed with the
+        name of their feature as in featurize.
+
+    """
+
+    return list(_layout(features)['names'])
+
+
+def featurize_one(seq, features=('composition', 'aaindex1', 'aaindex2', 
+                                 'aaindex3'), out=None):
+    """Compute features of a single sequence with minimal overhead.
+
+    This is a fast path for online inference. Tables are loaded and fused 
+    into a fixed layout on the first call for a set of features, and no 
+    Pandas objects are created. Unlike the batch functions, no columns are 
+    removed, so the output always has the same length for the same features.
+
+    Parameters
+    ----------
+
+    seq : string
+        Amino acid sequence.
+
+    features : list of strings, default=('composition', 'aaindex1', 
+                                          'aaindex2', 'aaindex3')
+
+        'length' : sequence length
+        'composition' : absolute amino acid composition (20)
+        'composition_relative' : relative amino acid composition (20)
+        'aaindex1' : AAIndex1 (566)
+        'aaindex2' : AAIndex2 (94)
+        'aaindex3' : AAIndex3 (47)
+        'ngram1', 'ngram2' : monopeptide (20) or dipeptide (400) counts
+        or the name of a table added with register_table
+
+    out : ndarray of shape (n_features, ), default=None
+        Preallocated float64 array to write the features into, e.g. a row of
+        a larger matrix. A new array is allocated if None.
+
+    Returns
+    -------
+
+    out : ndarray of shape (n_features, )
+        Features in the layout given by feature_names(features). Indices are
+        NaN if the sequence contains a residue (pair) with a NaN value, or if
+        it is too short to contain any residue (pair).
+
+    """
+
+    layout = _LAYOUTS.get(features) if isinstance(features, tuple) else None
+    if layout is None:
+        layout = _layout(features)
+    if out is None:
+        out = np.empty(len(layout['names']))
+
+    codes = _AA_LOOKUP.take(np.frombuffer(seq.encode('ascii'), np.uint8))
+    codes = codes.astype(np.intp)
+    counts = np.bincount(codes, minlength=20)
+    if len(counts) > 20:
+        unknown = sorted(set(seq) - set(AMINO_ACIDS))
+        raise ValueError("Unknown amino acid(s) %r." % unknown)
+    n = len(codes)
+
+    for cols in layout['length']:
+        out[cols] = n
+    for cols in layout['counts']:
+        out[cols] = counts
+    for cols in layout['relative']:
+        out[cols] = counts / n if n else np.nan
+
+    if 'residue' in layout:
+        cols, table = layout['residue']
+        if n:
+            freqs = counts / n
+            out[cols] = np.dot(freqs, table)
+            nan_mask, nan_cols = layout['residue_nan']
+            hits = np.dot(freqs, nan_mask).nonzero()[0]
+            if len(hits):
+                out[nan_cols[hits]] = np.nan
+        else:
+            out[cols] = np.nan
+
+    if 'pair' in layout or layout['pair_counts']:
+        pairs = codes[:-1]*20 + codes[1:]
+    for cols in layout['pair_counts']:
+        out[cols] = np.bincount(pairs, minlength=400)
+
+    # averaging the rows of all pairs propagates NaNs of present pairs only
+    if 'pair' in layout:
+        cols, table = layout['pair']
+        if n > 1:
+            out[cols] = np.dot(np.full(n-1, 1/(n-1)), table.take(pairs, axis=0))
+        else:
+            out[cols] = np.nan
+
+    return out
+
+
+def _fixed_kernel(batch, features, start=1, end=None):
+    """Features of a batch in the fixed layout of featurize_one.
+
+    Unlike featurize, no columns are removed, so that the features of 
+    separate chunks share the same columns (see feature_names). As in 
+    featurize, start and end do not apply to 'length' and relative 
+    compositions are divided by the full sequence length.
+    """
+
+    layout = _layout(features)
+    out = np.empty((len(batch), len(layout['names'])))
+
+    offset = 0
+    for feature in features:
+        if feature == 'length':
+            block = batch.lengths[:, None]
+        elif feature in ['composition', 'ngram1']:
+            block = batch.counts(start, end)
+        elif feature == 'composition_relative':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                block = batch.counts(start, end) / batch.lengths[:, None]
+        elif feature == 'ngram2':
+            block = batch.dipeptide_counts(start, end)
+        else:
+            block = _table_kernel(batch, feature, start, end)
+        out[:, offset:offset+block.shape[1]] = block
+        offset += block.shape[1]
+
+    return out
+
+
+def _split_batch(batch, chunksize):
+    "Consecutive sub-batches of at most chunksize sequences"
+
+    for lo in range(0, len(batch), chunksize):
+        hi = min(lo+chunksize, len(batch))
+        yield SequenceBatch.from_encoded(
+            batch.data[batch.offsets[lo]:batch.offsets[hi]], 
+            batch.lengths[lo:hi])
+
+
+def featurize_into(X, out, features=('composition', 'aaindex1', 'aaindex2', 
+                                     'aaindex3'), start=1, end=None, 
+                   n_jobs=None, chunksize=10000, n_samples=None, 
+                   dtype=np.float64):
+    """Write features chunk by chunk into a preallocated or memory-mapped array.
+
+    Features are computed for chunksize sequences at a time and written 
+    directly into out, so the feature matrix never has to be held in memory 
+    at once and no DataFrame is built. As in featurize_one, no columns are 
+    removed, so every row has the layout given by feature_names(features).
+
+    Parameters
+    ----------
+
+    X : Pandas DataFrame, SequenceBatch, list of strings or iterator of 
+        Pandas DataFrames
+        The column containing protein or peptide sequences must be labeled
+        'Sequence'. An iterator of DataFrames (e.g. from read_chunks) is 
+        consumed chunk by chunk.
+
+    out : ndarray of shape (n_samples, n_features) or string
+        Array to write the features into, e.g. an np.memmap. If a path is 
+        given, a .npy file is created and memory-mapped, which can later be
+        opened with np.load(path, mmap_mode='r').
+
+    features : list of strings, default=('composition', 'aaindex1', 
+                                          'aaindex2', 'aaindex3')
+        See featurize_one.
+
+    start : int, default=1
+        Determines the starting point of the amino acid sequence.
+
+    end : int, default=None
+        Determines the end point of the amino acid sequence.
+
+    n_jobs : int, default=None
+        Number of worker processes computing each chunk (see aaindex1).
+
+    chunksize : int, default=10000
+        Number of sequences computed at a time. DataFrames and batches are
+        split into chunks of this size, while the chunks of an iterator are
+        used as they are.
+
+    n_samples : int, default=None
+        Number of sequences, only needed if out is a path and X is an 
+        iterator.
+
+    dtype : numpy dtype, default=np.float64
+        Data type of the .npy file if out is a path.
+
+    Returns
+    -------
+
+    out : ndarray or np.memmap of shape (n_samples, n_features)
+
+    """
+
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer.")
+    if not isinstance(X, Iterator):
+        X = _as_batch(X)
+        n_samples = len(X)
+
+    n_features = len(feature_names(features))
+    if isinstance(out, (str, os.PathLike)):
+        if n_samples is None:
+            raise ValueError("n_samples must be given to create a memory map "
+                             "for an iterator of chunks.")
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=dtype, 
+                                        shape=(n_samples, n_features))
+    if out.ndim != 2 or out.shape[1] != n_features or \
+       (n_samples is not None and len(out) != n_samples):
+        raise ValueError("out must have shape (%s, %d), got %r." 
+                         % (n_samples or 'n_samples', n_features, out.shape))
+
+    if isinstance(X, Iterator):
+        chunks = (_as_batch(chunk) for chunk in X)
+    else:
+        chunks = _split_batch(X, chunksize)
+
+    # the kernel writes into the rows of each chunk, a single chunk at a time
+    # is held in memory; its arguments are bound, so that map_shards does not
+    # split them like per-sequence arrays
+    kernel = partial(_fixed_kernel, features=tuple(features), start=start, 
+                     end=end)
+    row = 0
+    for batch in chunks:
+        if row + len(batch) > len(out):
+            raise ValueError("X contains more than the %d sequences out has "
+                             "rows for." % len(out))
+        map_shards(kernel, batch, (), n_jobs, width=n_features, 
+                   out=out[row:row+len(batch)])
+        row += len(batch)
+    if row != len(out):
+        raise ValueError("X contains %d sequences, but out has %d rows." 
+                         % (row, len(out)))
+
+    if isinstance(out, np.memmap):
+        out.flush()
+
+    return out
@@ -1,7 +1,15 @@
 # Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
 
+import gzip
 import numpy as np
 import pandas as pd
+from protlearn.tables import AMINO_ACIDS
+
+
+# byte-level lookup table mapping ASCII codes to amino acid indices (0-19);
+# every other byte is mapped to 255
+_AA_LOOKUP = np.full(256, 255, dtype=np.uint8)
+_AA_LOOKUP[np.frombuffer(AMINO_ACIDS.encode(), dtype=np.uint8)] = np.arange(20)
 
 
 def txt_to_df(X, label=None):
@@ -36,7 +44,144 @@ def txt_to_df(X, label=None):
     return df
 
 
-def integer_encode(X, padding=False):
+def _open_text(X):
+    "Open a (possibly gzipped) text file or pass through a file object"
+
+    if not isinstance(X, str):
+        return X
+    if X.endswith('.gz'):
+        return gzip.open(X, 'rt')
+    return open(X)
+
+
+def _records(lines, file_format):
+    "Yield one sequence per record of a plain text or FASTA file"
+
+    if file_format == 'txt':
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+
+    elif file_format == 'fasta':
+        seq = None
+        for line in lines:
+            line = line.strip()
+            if line.startswith('>'):
+                if seq is not None:
+                    yield ''.join(seq)
+                seq = []
+            elif line and seq is not None:
+                seq.append(line)
+        if seq is not None:
+            yield ''.join(seq)
+
+    else:
+        raise ValueError("file_format must be one of %r." %
+                         [None, 'txt', 'fasta'])
+
+
+def read_chunks(X, chunksize=10000, label=None, file_format=None):
+    """Read sequences from a .txt or FASTA file in chunks.
+
+    Sequences are streamed from the file and yielded as DataFrames of at most
+    'chunksize' rows, so that arbitrarily large files can be processed with 
+    bounded memory. All feature engineering functions accept the returned 
+    iterator instead of a DataFrame and then compute their features chunk by
+    chunk.
+
+    Parameters
+    ----------
+
+    X : .txt or FASTA file (path or file object)
+        A .txt file must contain one sequence per row and no header. FASTA 
+        records may span multiple lines. Paths ending with '.gz' are read 
+        with gzip.
+
+    chunksize : int, default=10000
+        Maximum number of sequences per chunk.
+
+    label : int, default=None
+        Integer label denoting class (optional).
+
+    file_format : string, default=None
+
+        None : detect the format from the first non-blank line of the file
+        'txt' : one sequence per row
+        'fasta' : FASTA format
+
+    Returns
+    -------
+
+    chunks : iterator of Pandas DataFrames of shape (<= chunksize, 1 or 2) 
+        with columns 'Sequence' and 'Label'
+
+    Notes
+    -----
+
+    Feature functions remove NaN or all-zero columns and standardize each
+    chunk independently, so the columns of the results can vary from chunk to
+    chunk.
+
+    """
+
+    # validated here, as the generator only runs on the first next()
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer.")
+    if file_format not in [None, 'txt', 'fasta']:
+        raise ValueError("file_format must be one of %r." %
+                         [None, 'txt', 'fasta'])
+
+    return _read_chunks(X, chunksize, label, file_format)
+
+
+def _read_chunks(X, chunksize, label, file_format):
+    "Generator of read_chunks"
+
+    f = _open_text(X)
+    try:
+        # detect the file format from the first non-blank line without 
+        # consuming it
+        lines = iter(f)
+        head = []
+        for line in lines:
+            head.append(line)
+            if line.strip():
+                break
+        if file_format is None:
+            file_format = 'fasta' if head and \
+                          head[-1].lstrip().startswith('>') else 'txt'
+
+        def all_lines():
+            yield from head
+            yield from lines
+
+        chunk = []
+        for seq in _records(all_lines(), file_format):
+            chunk.append(seq)
+            if len(chunk) == chunksize:
+                yield _chunk_to_df(chunk, label)
+                chunk = []
+        if chunk:
+            yield _chunk_to_df(chunk, label)
+
+    finally:
+        if f is not X:
+            f.close()
+
+
+def _chunk_to_df(chunk, label):
+    "Build the DataFrame of a single chunk"
+
+    df = pd.DataFrame({'Sequence': chunk})
+    if label != None:
+        df['Label'] = np.ones(df.shape[0])*label
+
+    return df
+
+
+def integer_encode(X, padding=False, max_len=None, pad_side='right', 
+                   unknown=None, ragged=False):
     """Label-encode amino acid sequences.
 
     The 20 amino acids that serve as the building blocks for proteins and 
@@ -45,6 +190,9 @@ def integer_encode(X, padding=False):
     of proteins or peptides using sequence-based prediction models such as 
     LSTMs or GRUs. 
 
+    All sequences are encoded in a single pass through a byte-level lookup 
+    table, and the encoded residues are stored as uint8.
+
     Parameters
     ----------
 
@@ -55,13 +203,34 @@ def integer_encode(X, padding=False):
 
         False : sequences are returned in their original lengths
         True : sequences will be padded with zeros at the end up until the
-               length of the longest sequence in the dataset
+               length of the longest sequence in the dataset (or max_len)
+
+    max_len : int, default=None
+        Sequences longer than max_len are truncated to their first max_len 
+        residues. If padding=True, all sequences are padded to max_len.
+
+    pad_side : string, default='right'
+
+        'right' : zeros are appended to the end of the sequences
+        'left' : zeros are prepended to the start of the sequences
+
+    unknown : int, default=None
+        Integer that residues other than the 20 standard amino acids are 
+        mapped to (e.g. 21 or 0). If None, a ValueError is raised for such 
+        residues.
+
+    ragged : bool, default=False
+        Only applies if padding=False. If True, the encoded sequences are
+        returned as one flat array together with the offsets of each sequence,
+        such that sequence i is data[offsets[i]:offsets[i+1]].
 
     Returns
     -------
 
     enc : ndarray of shape (n_samples,) if padding=False
           ndarray of shape (n_samples, max_len) if padding=True
+          tuple (data, offsets) of ndarrays of shape (n_residues, ) and 
+          (n_samples+1, ) if ragged=True
         Contains the label-encoded peptide sequences.
 
     Notes
@@ -74,26 +243,263 @@ def integer_encode(X, padding=False):
 
     """
 
-    # list of amino acids for integer encoding
-    amino_acids = ['A','C','D','E','F','G','H','I','K','L',
-                   'M','N','P','Q','R','S','T','V','W','Y'] 
-    int_values = np.arange(1, len(amino_acids)+1)
+    if pad_side not in ['right', 'left']:
+        raise ValueError("pad_side must be one of %r." % ['right', 'left'])
+
+    # encode all sequences in one pass (A=1, ..., Y=20)
+    seqs = list(X['Sequence'])
+    lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+    data = _AA_LOOKUP[np.frombuffer(''.join(seqs).encode('ascii'), 
+                                    dtype=np.uint8)]
+    is_unknown = data == 255
+    data += 1
+    if is_unknown.any():
+        if unknown is None:
+            residues = sorted(set(''.join(seqs)) - set(AMINO_ACIDS))
+            raise ValueError("Unknown amino acid(s) %r." % residues)
+        data[is_unknown] = unknown
 
-    enc_list = []
-    for seq in X['Sequence']:
-        seq_split = [aa for aa in seq]
-        seq_trans = [amino_acids.index(i)+1 for i in seq_split]
-        enc_list.append(np.asarray(seq_trans))
-    enc_arr = np.asarray(enc_list)
+    # position of every residue within its sequence
+    starts = np.cumsum(lengths) - lengths
+    rows = np.repeat(np.arange(len(seqs)), lengths)
+    pos = np.arange(len(data)) - starts[rows]
+
+    # truncation
+    if max_len is not None:
+        keep = pos < max_len
+        data, rows, pos = data[keep], rows[keep], pos[keep]
+        lengths = np.minimum(lengths, max_len)
 
     if padding == True:
-        # get maximum sequence length
-        all_len = [len(i) for i in enc_arr]
-        max_len = max(all_len)
+        width = max_len if max_len is not None else lengths.max(initial=0)
+        if pad_side == 'left':
+            pos = pos + (width - lengths)[rows]
+        enc_arr = np.zeros((len(seqs), width), dtype=np.uint8)
+        enc_arr[rows, pos] = data
+        return enc_arr
+
+    offsets = np.zeros(len(seqs)+1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if ragged == True:
+        return data, offsets
+
+    enc_arr = np.empty(len(seqs), dtype=object)
+    for i in range(len(seqs)):
+        enc_arr[i] = data[offsets[i]:offsets[i+1]]
+
+    return enc_arr
+
+
+def _slice_bounds(lengths, start, end):
+    """Vectorized bounds of sequence[start-1:end] for sequences of given lengths
+
+    start and end are either scalars or arrays with one value per sequence.
+    """
+
+    def bound(b):
+        b = np.asarray(b, dtype=np.int64)
+        if b.ndim and b.shape != lengths.shape:
+            raise ValueError("start and end must be scalars or arrays of "
+                             "length n_samples (%d)." % len(lengths))
+        b = np.where(b < 0, b + lengths, b)
+        return np.clip(b, 0, lengths)
+
+    lo = bound(np.asarray(start) - 1)
+    hi = lengths if end is None else bound(end)
+
+    return lo, np.maximum(hi, lo)
+
+
+def _slice_key(start, end):
+    "Hashable cache key of scalar or per-sequence start and end"
+
+    return tuple(b if b is None or np.ndim(b) == 0 else
+                 np.asarray(b, dtype=np.int64).tobytes() for b in (start, end))
+
+
+class SequenceBatch:
+    """Integer-encoded batch of amino acid sequences.
+
+    A SequenceBatch tokenizes a set of sequences once and can be passed to all
+    functions of feature_engineering and visualize in place of a DataFrame. 
+    Derived intermediates, such as the amino acid and dipeptide count 
+    matrices, are computed at most once per batch (and start/end) and reused
+    by all functions the batch is passed to.
+
+    Parameters
+    ----------
+
+    X : Pandas DataFrame or list of strings
+        The column containing protein or peptide sequences must be labeled
+        'Sequence'.
+
+    Attributes
+    ----------
+
+    data : ndarray of shape (n_residues, )
+        Residues of all sequences as uint8 indices (0-19) in the order 
+        'ACDEFGHIKLMNPQRSTVWY'.
+
+    offsets : ndarray of shape (n_samples+1, )
+        Sequence i is stored in data[offsets[i]:offsets[i+1]].
+
+    lengths : ndarray of shape (n_samples, )
+        Lengths of the sequences.
+
+    Notes
+    -----
+
+    Only the 20 standard amino acids are supported. Sequences containing any
+    other residue raise a ValueError.
+
+    """
+
+    def __init__(self, X):
+        seqs = list(X['Sequence'] if isinstance(X, pd.DataFrame) else X)
+        self.lengths = np.fromiter(map(len, seqs), dtype=np.int64, 
+                                   count=len(seqs))
+        self.offsets = np.zeros(len(seqs)+1, dtype=np.int64)
+        np.cumsum(self.lengths, out=self.offsets[1:])
+
+        self.data = _AA_LOOKUP[np.frombuffer(''.join(seqs).encode('ascii'),
+                                             dtype=np.uint8)]
+        if (self.data == 255).any():
+            unknown = sorted(set(''.join(seqs)) - set(AMINO_ACIDS))
+            raise ValueError("Unknown amino acid(s) %r." % unknown)
+
+        self._cache = {}
+
+    @classmethod
+    def from_encoded(cls, data, lengths):
+        """Build a batch from already encoded residues.
+
+        Parameters
+        ----------
+
+        data : ndarray of shape (n_residues, )
+            Residues as uint8 indices (0-19) in 'ACDEFGHIKLMNPQRSTVWY' order.
+
+        lengths : ndarray of shape (n_samples, )
+            Lengths of the sequences stored consecutively in data.
+
+        """
+
+        batch = cls.__new__(cls)
+        batch.data = np.asarray(data, dtype=np.uint8)
+        batch.lengths = np.asarray(lengths, dtype=np.int64)
+        batch.offsets = np.zeros(len(batch.lengths)+1, dtype=np.int64)
+        np.cumsum(batch.lengths, out=batch.offsets[1:])
+        batch._cache = {}
+
+        return batch
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def _cached(self, key, compute):
+        "Compute an intermediate at most once"
+
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def rows(self):
+        "Index of the sequence each residue belongs to"
+
+        return self._cached('rows', lambda: np.repeat(np.arange(len(self)), 
+                                                      self.lengths))
+
+    def encode(self, start=1, end=None):
+        """Residues and lengths of all sequences sliced to [start, end].
+
+        Slicing follows sequence[start-1:end] of each sequence. start and end
+        can also be arrays with one value per sequence.
+        """
+
+        if np.ndim(start) == 0 and start == 1 and end is None:
+            return self.data, self.lengths
+
+        def compute():
+            lo, hi = _slice_bounds(self.lengths, start, end)
+
+            # keep residues whose position lies within the bounds
+            pos = np.arange(len(self.data)) - self.offsets[self.rows]
+            keep = (pos >= lo[self.rows]) & (pos < hi[self.rows])
+
+            return self.data[keep], hi - lo
+
+        return self._cached(('encode', ) + _slice_key(start, end), compute)
+
+    def counts(self, start=1, end=None):
+        "Amino acid count matrix of shape (n_samples, 20)"
+
+        def compute():
+            codes, lengths = self.encode(start, end)
+            rows = np.repeat(np.arange(len(self)), lengths)
+            counts = np.bincount(rows*20 + codes, minlength=len(self)*20)
+            return counts.reshape(len(self), 20)
+
+        return self._cached(('counts', ) + _slice_key(start, end), compute)
+
+    def dipeptide_counts(self, start=1, end=None):
+        "Dipeptide count matrix of shape (n_samples, 400) (20*aa1 + aa2)"
+
+        def compute():
+            codes, lengths = self.encode(start, end)
+            rows = np.repeat(np.arange(len(self)), lengths)
+
+            # only pairs of adjacent residues within the same sequence
+            same = rows[:-1] == rows[1:]
+            pairs = codes[:-1].astype(np.int64)*20 + codes[1:]
+            counts = np.bincount(rows[:-1][same]*400 + pairs[same],
+                                 minlength=len(self)*400)
+            return counts.reshape(len(self), 400)
+
+        return self._cached(('dipeptides', ) + _slice_key(start, end), compute)
+
+    def padded(self, width=None):
+        """Residue matrix of shape (n_samples, width), padded with 20.
+
+        Row i holds the first width residues of sequence i as uint8 indices;
+        positions past the end of a sequence are 20. width defaults to the 
+        length of the longest sequence.
+        """
+
+        if width is None:
+            width = int(self.lengths.max(initial=0))
+
+        def compute():
+            pos = np.arange(len(self.data)) - self.offsets[self.rows]
+            keep = pos < width
+            arr = np.full((len(self), width), 20, dtype=np.uint8)
+            arr[self.rows[keep], pos[keep]] = self.data[keep]
+            return arr
+
+        return self._cached(('padded', width), compute)
+
+
+def _as_batch(X):
+    "Convert a DataFrame into a SequenceBatch, if it is not one already"
+
+    if isinstance(X, SequenceBatch):
+        return X
+    return SequenceBatch(X)
+
+
+def _as_lenient_batch(X):
+    """Convert a DataFrame into a SequenceBatch allowing any residue.
+
+    Non-standard residues (e.g. X or U) are encoded as 255, which never 
+    matches an amino acid, so the batch is only suited for positional lookups
+    (see SequenceBatch.padded) and not for counts.
+    """
 
-        # padding up to max_len with zeros
-        enc_arr = [np.pad(enc_arr[i], (0, max_len-len(enc_arr[i])),\
-                  'constant') for i in range(enc_arr.shape[0])]
-        enc_arr = np.asarray(enc_arr)
+    if isinstance(X, SequenceBatch):
+        return X
+    seqs = list(X['Sequence'] if isinstance(X, pd.DataFrame) else X)
+    lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+    data = _AA_LOOKUP[np.frombuffer(''.join(seqs).encode('ascii'), 
+                                    dtype=np.uint8)]
 
-    return enc_arr
\ No newline at end of file
+    return SequenceBatch.from_encoded(data, lengths)
@@ -0,0 +1,261 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+import numpy as np
+import pandas as pd
+from collections.abc import Iterator
+from protlearn.tables import AMINO_ACIDS
+from protlearn.preprocessing import SequenceBatch, _AA_LOOKUP
+from protlearn.feature_engineering import _kmer_ids, kmer_to_string
+
+
+# n-grams up to this length are counted in a dense array of 20^n counters
+_DENSE_NGRAM = 4
+
+
+def _merge_sparse(a, b):
+    "Add two sparse counters given as (sorted ids, counts)"
+
+    ids, inverse = np.unique(np.concatenate([a[0], b[0]]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([a[1], b[1]]),
+                         minlength=len(ids))
+
+    return ids, counts.astype(np.int64)
+
+
+def _encode_lenient(X):
+    """Encode sequences that may contain non-standard residues.
+
+    Returns the lengths of the sequences, a SequenceBatch of their segments 
+    between non-standard residues (so that no n-gram spans one) and the 
+    counts of the non-standard residues as a dict.
+    """
+
+    seqs = list(X['Sequence'] if isinstance(X, pd.DataFrame) else X)
+    lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+    raw = np.frombuffer(''.join(seqs).encode('ascii'), dtype=np.uint8)
+    codes = _AA_LOOKUP[raw]
+    unknown = codes == 255
+    if not unknown.any():
+        return lengths, SequenceBatch.from_encoded(codes, lengths), {}
+
+    # a new segment starts at each sequence and after each unknown residue
+    offsets = np.cumsum(lengths) - lengths
+    starts = np.zeros(len(codes), dtype=np.int64)
+    np.add.at(starts, offsets[offsets < len(codes)], 1)
+    starts[1:] += unknown[:-1]
+    segments = np.cumsum(starts)[~unknown] - 1
+    batch = SequenceBatch.from_encoded(codes[~unknown], 
+                                       np.bincount(segments))
+    other, counts = np.unique(raw[unknown], return_counts=True)
+
+    return lengths, batch, {chr(c): int(n) for c, n in zip(other, counts)}
+
+
+class DatasetSummary:
+    """Mergeable counts of a dataset of sequences.
+
+    A DatasetSummary accumulates the length histogram, the amino acid counts
+    and the n-gram counts of all sequences passed to update. Its memory only
+    depends on the longest sequence and the n-gram vocabulary, not on the
+    number of sequences, so a dataset can be summarized chunk by chunk in a
+    single pass. Summaries of separate chunks (e.g. computed by different
+    workers) can be combined with merge or +.
+
+    Parameters
+    ----------
+
+    ngrams : tuple of int, default=(2, )
+        Lengths of the n-grams to count (1-14).
+
+    Attributes
+    ----------
+
+    n_samples : int
+        Number of sequences.
+
+    n_residues : int
+        Total number of residues.
+
+    length_counts : ndarray
+        Number of sequences of each length (indexed by length).
+
+    residue_counts : ndarray of shape (20, )
+        Counts of the amino acids in 'ACDEFGHIKLMNPQRSTVWY' order.
+
+    other_counts : dict
+        Counts of non-standard residues (e.g. 'X' or 'U'), which are allowed
+        in DataFrames and lists of strings. N-grams containing them are not
+        counted.
+
+    """
+
+    def __init__(self, ngrams=(2, )):
+        self.ngrams = tuple(sorted(set(ngrams)))
+        if any(not 1 <= n <= 14 for n in self.ngrams):
+            raise ValueError("ngram must be an integer between 1-14.")
+        self.n_samples = 0
+        self.n_residues = 0
+        self.length_counts = np.zeros(0, dtype=np.int64)
+        self.residue_counts = np.zeros(20, dtype=np.int64)
+        self.other_counts = {}
+        self._kmers = {n: np.zeros(20**n, dtype=np.int64) if
+                       n <= _DENSE_NGRAM else (np.zeros(0, dtype=np.int64),
+                                               np.zeros(0, dtype=np.int64))
+                       for n in self.ngrams}
+
+    def _add_lengths(self, length_counts):
+        if len(length_counts) > len(self.length_counts):
+            length_counts, self.length_counts = self.length_counts, \
+                                                length_counts.copy()
+        self.length_counts[:len(length_counts)] += length_counts
+
+    def _add_other(self, other_counts):
+        for residue, count in other_counts.items():
+            self.other_counts[residue] = self.other_counts.get(residue, 0) + \
+                                         count
+
+    def update(self, X):
+        """Add sequences to the summary.
+
+        Parameters
+        ----------
+
+        X : Pandas DataFrame, SequenceBatch or list of strings
+            The column containing protein or peptide sequences must be
+            labeled 'Sequence'. Sequences of a DataFrame or list may contain
+            non-standard residues.
+
+        Returns
+        -------
+
+        self
+
+        """
+
+        if isinstance(X, SequenceBatch):
+            lengths, batch, other = X.lengths, X, {}
+        else:
+            lengths, batch, other = _encode_lenient(X)
+        self.n_samples += len(lengths)
+        self.n_residues += int(lengths.sum())
+        self._add_lengths(np.bincount(lengths))
+        self.residue_counts += np.bincount(batch.data, minlength=20)
+        self._add_other(other)
+
+        for n in self.ngrams:
+            ids, _ = _kmer_ids(batch.data, batch.lengths, n)
+            if n <= _DENSE_NGRAM:
+                self._kmers[n] += np.bincount(ids, minlength=20**n)
+            else:
+                self._kmers[n] = _merge_sparse(self._kmers[n],
+                                               np.unique(ids,
+                                                         return_counts=True))
+
+        return self
+
+    def merge(self, other):
+        """Add the counts of another summary with the same n-grams.
+
+        Returns
+        -------
+
+        self
+
+        """
+
+        if other.ngrams != self.ngrams:
+            raise ValueError("Summaries of different n-grams cannot be merged.")
+        self.n_samples += other.n_samples
+        self.n_residues += other.n_residues
+        self._add_lengths(other.length_counts)
+        self.residue_counts += other.residue_counts
+        self._add_other(other.other_counts)
+        for n in self.ngrams:
+            if n <= _DENSE_NGRAM:
+                self._kmers[n] += other._kmers[n]
+            else:
+                self._kmers[n] = _merge_sparse(self._kmers[n],
+                                               other._kmers[n])
+
+        return self
+
+    def __add__(self, other):
+        return DatasetSummary(self.ngrams).merge(self).merge(other)
+
+    def lengths(self):
+        "Number of sequences of each length that occurs, as a Pandas Series"
+
+        present = np.flatnonzero(self.length_counts)
+
+        return pd.Series(self.length_counts[present], index=present,
+                         name='Frequency')
+
+    def composition(self):
+        """Counts of the amino acids, as a Pandas Series.
+
+        Non-standard residues that occur follow the 20 amino acids.
+        """
+
+        other = sorted(self.other_counts)
+
+        return pd.Series(np.concatenate([self.residue_counts, 
+                                         [self.other_counts[residue] 
+                                          for residue in other]]).astype(
+                                              np.int64),
+                         index=list(AMINO_ACIDS) + other, name='Frequency')
+
+    def ngram_counts(self, ngram):
+        """Counts of the n-grams that occur, in id order.
+
+        Parameters
+        ----------
+
+        ngram : int
+            Length of the n-grams (must be one of ngrams).
+
+        Returns
+        -------
+
+        counts : Pandas Series indexed by the n-grams
+
+        """
+
+        if ngram not in self._kmers:
+            raise ValueError("The summary does not contain %d-gram counts."
+                             % ngram)
+        if ngram <= _DENSE_NGRAM:
+            ids = np.flatnonzero(self._kmers[ngram])
+            counts = self._kmers[ngram][ids]
+        else:
+            ids, counts = self._kmers[ngram]
+
+        return pd.Series(counts, index=kmer_to_string(ids, ngram),
+                         name='Frequency')
+
+
+def summarize(X, ngrams=(2, )):
+    """Summarize a dataset in a single pass.
+
+    Parameters
+    ----------
+
+    X : Pandas DataFrame, SequenceBatch or iterator of Pandas DataFrames
+        The column containing protein or peptide sequences must be labeled
+        'Sequence'. An iterator of DataFrames (e.g. from read_chunks) is
+        consumed chunk by chunk, so only one chunk is held in memory.
+
+    ngrams : tuple of int, default=(2, )
+        Lengths of the n-grams to count.
+
+    Returns
+    -------
+
+    summary : DatasetSummary
+
+    """
+
+    summary = DatasetSummary(ngrams)
+    for chunk in (X if isinstance(X, Iterator) else [X]):
+        summary.update(chunk)
+
+    return summary
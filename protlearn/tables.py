@@ -0,0 +1,482 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+import os
+import re
+import hashlib
+import threading
+import numpy as np
+
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'docs', '')
+
+# location of the binary tables built on first use, outside of the package
+# directory, which may be read-only
+CACHE_DIR = os.environ.get('PROTLEARN_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache',
+                                        'protlearn'))
+
+# amino acid order used for all internal index computations
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+
+# csv files each bundled table is compiled from
+SOURCES = {
+    'aaindex1': ['aaindex1.csv'],
+    'aaindex2': ['aaindex2_lowtri.csv', 'aaindex2_square.csv'],
+    'aaindex3': ['aaindex3_lowtri.csv', 'aaindex3_square.csv'],
+}
+
+# process-wide registry of loaded tables and where they were loaded from
+_TABLES = {}
+_ORIGIN = {}
+_VERSIONS = {}
+_LOCK = threading.Lock()
+
+# tables registered with register_table: name -> (kind, desc, index)
+_CUSTOM = {}
+
+# caches of objects compiled from the tables (e.g. the fused layouts of
+# featurize_one), cleared whenever a table is registered or the cache cleared
+_DERIVED = []
+
+# names that cannot be registered, as they denote other features
+_RESERVED = re.compile(r'aaindex[123]|length|composition(_relative)?|'
+                       r'ngram(\d+|_composition)')
+
+
+def _read_aaindex1():
+    "Parse AAIndex1 into a contiguous (20, n_indices) float64 matrix"
+
+    # pandas is only needed to compile the tables from csv
+    import pandas as pd
+
+    aaind1 = pd.read_csv(PATH+'aaindex1.csv')
+    desc = aaind1['Description'].values
+    index = np.ascontiguousarray(aaind1[list(AMINO_ACIDS)].values.T,
+                                 dtype=np.float64)
+
+    return desc, index
+
+
+def _read_pair_index(name):
+    """Parse AAIndex2 or AAIndex3 into a dense (400, n_matrices) table.
+
+    Lower triangular matrices are mirrored into full symmetric matrices and
+    appended to the square ones. Rows are indexed by dipeptide, i.e.
+    20*aa1 + aa2 in AMINO_ACIDS order.
+    """
+
+    import pandas as pd
+
+    desc, tensors = [], []
+    for shape in ['lowtri', 'square']:
+        index = pd.read_csv(PATH+name+'_'+shape+'.csv')
+        desc.append(index['Description'].values[::20])
+
+        # (n_matrices, 20, 20) tensor in the order of the csv columns
+        csv_order = list(index.columns[2:])
+        tensor = index[csv_order].values.astype(np.float64).reshape(-1, 20, 20)
+        if shape == 'lowtri':
+            lower = np.tril(np.ones((20, 20), dtype=bool))
+            tensor = np.where(lower, tensor, tensor.transpose(0, 2, 1))
+
+        # reorder rows and columns to AMINO_ACIDS
+        order = [csv_order.index(aa) for aa in AMINO_ACIDS]
+        tensors.append(tensor[:, order][:, :, order])
+
+    tensor = np.concatenate(tensors)
+    index = np.ascontiguousarray(tensor.reshape(len(tensor), 400).T)
+
+    return np.concatenate(desc), index
+
+
+_READERS = {
+    'aaindex1': _read_aaindex1,
+    'aaindex2': lambda: _read_pair_index('aaindex2'),
+    'aaindex3': lambda: _read_pair_index('aaindex3'),
+}
+
+
+def _binary_files(name, directory):
+    "Paths of the binary index and description files of a table"
+
+    return (os.path.join(directory, name+'.npy'),
+            os.path.join(directory, name+'_desc.npy'))
+
+
+def _is_current(name, directory):
+    "Check if a binary copy exists and is newer than its csv sources"
+
+    index_file, desc_file = _binary_files(name, directory)
+    if not (os.path.exists(index_file) and os.path.exists(desc_file)):
+        return False
+    built = min(os.path.getmtime(index_file), os.path.getmtime(desc_file))
+    sources = [os.path.getmtime(PATH+f) for f in SOURCES[name]]
+
+    return built >= max(sources)
+
+
+def _save_binary(name, desc, index):
+    "Write a binary copy into CACHE_DIR, returning False if it is not writable"
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for path, arr in zip(_binary_files(name, CACHE_DIR),
+                             [index, desc.astype(str)]):
+            # write to a temporary file first so that concurrent processes
+            # never see a partially written table
+            tmp = '%s.%d.tmp' % (path, os.getpid())
+            with open(tmp, 'wb') as f:
+                np.save(f, arr)
+            os.replace(tmp, path)
+    except OSError:
+        return False
+
+    return True
+
+
+def _load(name):
+    "Load a table from its binary copy or compile it from csv"
+
+    index_file, desc_file = _binary_files(name, CACHE_DIR)
+    if _is_current(name, CACHE_DIR):
+        index = np.load(index_file, mmap_mode='r')
+        desc = np.load(desc_file)
+        return (desc, index), index_file
+
+    desc, index = _READERS[name]()
+    origin = index_file + ' (built)' if _save_binary(name, desc, index) \
+             else 'csv'
+
+    return (np.asarray(desc), index), origin
+
+
+def load_table(name):
+    """Load an amino acid index table, parsing it at most once per process.
+
+    The first call for a table memory-maps its binary copy (.npy) if one is
+    present in CACHE_DIR. Otherwise the bundled csv files are parsed and a 
+    binary copy is written to CACHE_DIR for subsequent processes. The package
+    directory itself is never written to.
+    All further calls return the cached arrays.
+
+    Parameters
+    ----------
+
+    name : string
+        'aaindex1' : (20, 566) matrix of AAIndex1
+        'aaindex2' : (400, 94) dipeptide table of AAIndex2
+        'aaindex3' : (400, 47) dipeptide table of AAIndex3
+        or the name of a table added with register_table
+
+    Returns
+    -------
+
+    desc : ndarray of shape (n_indices, )
+        Descriptions (names) of the indices.
+
+    index : ndarray of shape (20, n_indices) or (400, n_indices)
+        Index values in 'ACDEFGHIKLMNPQRSTVWY' order. Rows of dipeptide tables
+        correspond to 20*aa1 + aa2.
+
+    """
+
+    table = _TABLES.get(name)
+    if table is None:
+        if name not in _READERS and name not in _CUSTOM:
+            raise ValueError("Unknown table %r. Must be one of %r."
+                             % (name, sorted(_READERS) + sorted(_CUSTOM)))
+        with _LOCK:
+            if name not in _TABLES:
+                if name in _CUSTOM:
+                    _TABLES[name] = _CUSTOM[name][1:]
+                    _ORIGIN[name] = 'registered'
+                else:
+                    _TABLES[name], _ORIGIN[name] = _load(name)
+            table = _TABLES[name]
+
+    return table
+
+
+def table_version(name):
+    """Content hash of a table.
+
+    The version changes whenever the values of the table change and can be
+    used to invalidate features computed from an older table.
+
+    Parameters
+    ----------
+
+    name : string
+        Name of the table (see load_table).
+
+    Returns
+    -------
+
+    version : string
+        Hexadecimal hash of the descriptions and values of the table.
+
+    """
+
+    if name not in _VERSIONS:
+        desc, index = load_table(name)
+        h = hashlib.blake2b(digest_size=16)
+        h.update('\n'.join(map(str, desc)).encode())
+        h.update(np.ascontiguousarray(index).tobytes())
+        _VERSIONS[name] = h.hexdigest()
+
+    return _VERSIONS[name]
+
+
+def table_cache_info():
+    """Inspect the tables currently held by the process-wide cache.
+
+    Returns
+    -------
+
+    info : dict
+        Maps the name of each loaded table to a dict with its 'shape', its
+        size in bytes ('nbytes'), whether it is memory-mapped ('mmap') and
+        the file it was loaded from or 'csv' ('origin').
+
+    """
+
+    return {name: {'shape': index.shape,
+                   'nbytes': index.nbytes,
+                   'mmap': isinstance(index, np.memmap),
+                   'origin': _ORIGIN[name]}
+            for name, (desc, index) in _TABLES.items()}
+
+
+def clear_table_cache(binary=False):
+    """Clear the process-wide table cache.
+
+    Parameters
+    ----------
+
+    binary : bool, default=False
+        Also delete the binary copies of the tables in CACHE_DIR so that they
+        will be compiled from csv again on next use.
+
+    Notes
+    -----
+
+    Registered tables are kept and reloaded on next use.
+
+    """
+
+    with _LOCK:
+        _TABLES.clear()
+        _ORIGIN.clear()
+        _VERSIONS.clear()
+        for derived in _DERIVED:
+            derived.clear()
+
+        if binary:
+            for name in _READERS:
+                for path in _binary_files(name, CACHE_DIR):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+
+def _table_kind(name):
+    "'residue' for tables indexed by amino acid, 'pair' for dipeptide tables"
+
+    if name in _CUSTOM:
+        return _CUSTOM[name][0]
+    if name == 'aaindex1':
+        return 'residue'
+    if name in _READERS:
+        return 'pair'
+    raise ValueError("Unknown table %r. Must be one of %r."
+                     % (name, sorted(_READERS) + sorted(_CUSTOM)))
+
+
+def _is_table(name):
+    return name in _READERS or name in _CUSTOM
+
+
+def _read_custom_csv(path, order):
+    """Read a table in the layout of the bundled AAindex csv files.
+
+    Residue scales have one row per scale and one column per amino acid.
+    Pair matrices have 20 rows per matrix, labeled by an 'Amino Acids' column,
+    and may be square or lower triangular. An optional 'Description' column
+    names the scales or matrices. Tables are returned in the given order.
+    """
+
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    missing = sorted(set(order) - set(df.columns))
+    if missing:
+        raise ValueError("%s has no column(s) for %r." % (path, missing))
+    values = df[list(order)].values.astype(np.float64)
+    desc = df['Description'].values if 'Description' in df else None
+
+    if 'Amino Acids' not in df:
+        return 'residue', values.T, desc
+
+    if len(df) % 20:
+        raise ValueError("Pair matrices in %s must have 20 rows each." % path)
+
+    # matrices with rows and columns in the order of the csv columns
+    csv_order = [col for col in df.columns if col in order]
+    tensor = df[csv_order].values.astype(np.float64).reshape(-1, 20, 20)
+    for i, labels in enumerate(df['Amino Acids'].values.reshape(-1, 20)):
+        if sorted(labels) != sorted(order):
+            raise ValueError("Rows of matrix %d in %s must be labeled with "
+                             "all 20 amino acids." % (i, path))
+        tensor[i] = tensor[i][[list(labels).index(aa) for aa in csv_order]]
+
+    # lower triangular matrices (nothing but 0 or NaN above the diagonal) are
+    # mirrored into full symmetric matrices, as in _read_pair_index
+    upper = np.triu(np.ones((20, 20), dtype=bool), 1)
+    lowtri = (np.nan_to_num(tensor[:, upper]) == 0).all(axis=1)
+    tensor[lowtri] = np.where(~upper, tensor[lowtri], 
+                              tensor[lowtri].transpose(0, 2, 1))
+
+    perm = [csv_order.index(aa) for aa in order]
+    tensor = tensor[:, perm][:, :, perm]
+
+    return 'pair', tensor, None if desc is None else desc[::20]
+
+
+def register_table(name, table, kind=None, names=None, order=AMINO_ACIDS):
+    """Register a custom amino acid scale or pair matrix.
+
+    The table is compiled into the same representation as the bundled 
+    AAindex tables, so that it can be computed with custom_index, featurize,
+    featurize_one, featurize_into and TableTransformer, including the batch,
+    parallel (n_jobs) and FeatureCache paths. Registered tables are available
+    to the worker processes of protlearn, but not to other processes.
+
+    Parameters
+    ----------
+
+    name : string
+        Name of the table, used as feature name and column prefix. The names 
+        of the bundled tables and of the other features cannot be used.
+        Registering a table under the same name again replaces it.
+
+    table : array-like or string
+        Residue scales as an array of shape (20, ) or (20, n_scales), or pair
+        matrices as an array of shape (20, 20), (n_matrices, 20, 20) or 
+        (400, n_matrices) with rows 20*aa1 + aa2. A path is read as a csv 
+        file in the layout of the bundled AAindex files: one row per scale 
+        and one column per amino acid, or 20 rows per matrix labeled by an 
+        'Amino Acids' column. Matrices with only zeros or NaNs above the 
+        diagonal are taken to be lower triangular and mirrored, as for
+        AAindex2 and AAindex3. NaN values are treated as in AAindex.
+
+    kind : string, default=None
+        'residue' or 'pair'. None infers it from the shape, where (20, 20) 
+        arrays are taken to be a single pair matrix.
+
+    names : list of strings, default=None
+        Names of the scales or matrices. Defaults to the 'Description' column
+        of a csv file, the name of the table if it contains a single scale or
+        matrix, and name_0, name_1, ... otherwise.
+
+    order : string, default='ACDEFGHIKLMNPQRSTVWY'
+        Order of the amino acids along the rows (and columns) of an array, 
+        e.g. 'ARNDCQEGHILKMFPSTWYV' for AAindex order.
+
+    Returns
+    -------
+
+    desc : ndarray of shape (n_indices, )
+        Names of the scales or matrices.
+
+    index : ndarray of shape (20, n_indices) or (400, n_indices)
+        Compiled table in 'ACDEFGHIKLMNPQRSTVWY' order (see load_table).
+
+    """
+
+    if not isinstance(name, str) or not name or _RESERVED.fullmatch(name):
+        raise ValueError("%r cannot be used as the name of a table." % name)
+    if sorted(order) != sorted(AMINO_ACIDS):
+        raise ValueError("order must contain each of the 20 amino acids.")
+    if kind not in [None, 'residue', 'pair']:
+        raise ValueError("kind must be one of %r." % [None, 'residue', 'pair'])
+
+    csv_names = None
+    if isinstance(table, (str, os.PathLike)):
+        csv_kind, table, csv_names = _read_custom_csv(table, order)
+        if kind not in [None, csv_kind]:
+            raise ValueError("The csv file contains %s tables, not %s tables."
+                             % (csv_kind, kind))
+        kind = csv_kind
+    arr = np.array(table, dtype=np.float64)
+
+    # rows (and columns) of residues in the given order
+    perm = [order.index(aa) for aa in AMINO_ACIDS]
+    shape = arr.shape
+    if kind is None:
+        kind = 'pair' if shape in [(20, 20), (400, )] or (
+            len(shape) == 3 or len(shape) == 2 and shape[0] == 400) \
+            else 'residue'
+    if kind == 'residue' and len(shape) in [1, 2] and shape[0] == 20:
+        index = arr.reshape(20, -1)[perm]
+    elif kind == 'pair' and len(shape) in [2, 3] and shape[-2:] == (20, 20):
+        tensor = arr.reshape(-1, 20, 20)[:, perm][:, :, perm]
+        index = tensor.reshape(len(tensor), 400).T
+    elif kind == 'pair' and len(shape) in [1, 2] and shape[0] == 400:
+        tensor = arr.reshape(20, 20, -1)[perm][:, perm]
+        index = tensor.reshape(400, -1)
+    else:
+        raise ValueError("Cannot interpret an array of shape %r as %s table."
+                         % (shape, kind or 'a'))
+    index = np.ascontiguousarray(index)
+    index.flags.writeable = False
+
+    n_indices = index.shape[1]
+    if names is None:
+        names = csv_names
+    if names is None:
+        names = [name] if n_indices == 1 else ['%s_%d' % (name, i) 
+                                               for i in range(n_indices)]
+    desc = np.asarray(names, dtype=object).astype(str)
+    if desc.shape != (n_indices, ):
+        raise ValueError("Expected %d names, got %d." % (n_indices, len(desc)))
+
+    with _LOCK:
+        _CUSTOM[name] = (kind, desc, index)
+        _forget(name)
+
+    return desc, index
+
+
+def unregister_table(name):
+    """Remove a table added with register_table.
+
+    Parameters
+    ----------
+
+    name : string
+        Name of the table.
+
+    """
+
+    if name not in _CUSTOM:
+        raise ValueError("No table %r is registered." % name)
+    with _LOCK:
+        del _CUSTOM[name]
+        _forget(name)
+
+
+def _forget(name):
+    "Drop a table and everything derived from it from the caches"
+
+    _TABLES.pop(name, None)
+    _ORIGIN.pop(name, None)
+    _VERSIONS.pop(name, None)
+    for derived in _DERIVED:
+        derived.clear()
+
+
+def _restore_tables(custom):
+    "Register the tables of the parent process in a worker process"
+
+    for name, (kind, desc, index) in custom.items():
+        _CUSTOM[name] = (kind, desc, index)
+        _forget(name)
@@ -0,0 +1,545 @@
+# Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
+
+import numpy as np
+import pandas as pd
+from abc import ABCMeta, abstractmethod
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import StandardScaler, MinMaxScaler
+from sklearn.utils.validation import check_is_fitted
+from protlearn.tables import AMINO_ACIDS, load_table
+from protlearn.preprocessing import SequenceBatch, _as_batch
+from protlearn.parallel import map_shards
+from protlearn.feature_engineering import _composition_kernel,\
+                                          _aaindex1_kernel,\
+                                          _pair_index_kernel, _table_kernel,\
+                                          _ngram_triplets,\
+                                          kmer_to_string, _length_edges,\
+                                          _length_bin_names
+
+
+def _to_batch(X):
+    "Accept a DataFrame, SequenceBatch, or (n_samples, ) / (n_samples, 1) array"
+
+    if isinstance(X, (SequenceBatch, pd.DataFrame)):
+        return _as_batch(X)
+    X = np.asarray(X, dtype=object)
+    if X.ndim == 2 and X.shape[1] == 1:
+        X = X[:, 0]
+    elif X.ndim != 1:
+        raise ValueError("Expected a single column of sequences, got an array "
+                         "of shape %r." % (X.shape, ))
+
+    return SequenceBatch(X)
+
+
+class _IndexTransformer(TransformerMixin, BaseEstimator, metaclass=ABCMeta):
+    """Base class of transformers producing a fixed matrix of features.
+
+    Subclasses implement _raw, which returns the unfiltered feature matrix of
+    a batch, and _names, which returns the names of all its columns. fit
+    learns which columns to keep and the scaling statistics, transform then
+    only computes, selects and scales.
+    """
+
+    @abstractmethod
+    def _raw(self, batch):
+        "Unfiltered (n_samples, n_features) matrix of a batch"
+
+    @abstractmethod
+    def _names(self):
+        "Names of all columns of the unfiltered matrix"
+
+    def fit(self, X, y=None):
+        """Learn the retained columns and the scaling statistics.
+
+        Parameters
+        ----------
+
+        X : Pandas DataFrame, SequenceBatch or array-like of strings
+            The column containing protein or peptide sequences must be
+            labeled 'Sequence'.
+
+        y : ignored
+
+        Returns
+        -------
+
+        self
+
+        """
+
+        self._fit(_to_batch(X))
+
+        return self
+
+    def _fit(self, batch):
+        "Fit on a batch and return the transformed training matrix"
+
+        if self.standardize not in ['none', 'zscore', 'minmax']:
+            raise ValueError("standardize must be one of %r."
+                             % ['none', 'zscore', 'minmax'])
+        arr = self._raw(batch)
+
+        # columns with NaNs are always removed, all-zero columns only if the
+        # matrix is standardized (as in the feature functions)
+        cols = np.isnan(arr).any(axis=0)
+        if self.drop_zero or self.standardize != 'none':
+            cols |= ~arr.any(axis=0)
+        self.columns_ = np.flatnonzero(~cols)
+        self.feature_names_ = np.asarray(self._names())[self.columns_]
+        self.n_features_out_ = len(self.columns_)
+        arr = arr[:, self.columns_]
+
+        if self.standardize == 'zscore':
+            self.scaler_ = StandardScaler().fit(arr)
+        elif self.standardize == 'minmax':
+            self.scaler_ = MinMaxScaler().fit(arr)
+        else:
+            self.scaler_ = None
+
+        return self._scale(arr)
+
+    def _scale(self, arr):
+        "Scale a feature matrix in place with the fitted statistics"
+
+        if isinstance(self.scaler_, StandardScaler):
+            arr -= self.scaler_.mean_
+            arr /= self.scaler_.scale_
+        elif isinstance(self.scaler_, MinMaxScaler):
+            arr *= self.scaler_.scale_
+            arr += self.scaler_.min_
+
+        return arr
+
+    def fit_transform(self, X, y=None):
+        "Fit to X and return the transformed training matrix"
+
+        return self._fit(_to_batch(X))
+
+    def transform(self, X):
+        """Compute the features with the columns and scaling learned at fit.
+
+        Parameters
+        ----------
+
+        X : Pandas DataFrame, SequenceBatch or array-like of strings
+            The column containing protein or peptide sequences must be
+            labeled 'Sequence'.
+
+        Returns
+        -------
+
+        arr : ndarray of shape (n_samples, n_features_out_)
+
+        """
+
+        check_is_fitted(self, 'columns_')
+        arr = self._raw(_to_batch(X))
+        if len(self.columns_) < arr.shape[1]:
+            arr = arr[:, self.columns_]
+
+        return self._scale(arr)
+
+    def get_feature_names_out(self, input_features=None):
+        "Names of the retained columns"
+
+        check_is_fitted(self, 'columns_')
+
+        return self.feature_names_.astype(object)
+
+
+class CompositionTransformer(_IndexTransformer):
+    """Amino acid composition with a column schema fixed at fit.
+
+    Parameters
+    ----------
+
+    method : string, default='absolute'
+        'absolute' : absolute amino acid counts
+        'relative' : counts divided by the sequence length (not rounded)
+
+    start : int, default=1
+        Determines the starting point of the amino acid sequence.
+
+    end : int, default=None
+        Determines the end point of the amino acid sequence.
+
+    standardize : string, default='none'
+        'none', 'zscore' or 'minmax' scaling learned at fit.
+
+    drop_zero : bool, default=True
+        Remove amino acids that are absent from all training sequences, as
+        composition does.
+
+    n_jobs : int, default=None
+        Number of worker processes (see composition).
+
+    Attributes
+    ----------
+
+    columns_ : ndarray
+        Indices of the retained amino acids in 'ACDEFGHIKLMNPQRSTVWY'.
+
+    feature_names_ : ndarray
+        Names of the retained columns.
+
+    scaler_ : StandardScaler, MinMaxScaler or None
+        Fitted scaler.
+
+    """
+
+    def __init__(self, method='absolute', start=1, end=None,
+                 standardize='none', drop_zero=True, n_jobs=None):
+        self.method = method
+        self.start = start
+        self.end = end
+        self.standardize = standardize
+        self.drop_zero = drop_zero
+        self.n_jobs = n_jobs
+
+    def _raw(self, batch):
+        arr = map_shards(_composition_kernel, batch, (self.start, self.end),
+                         self.n_jobs, width=20, dtype=np.int64)
+        arr = arr.astype(np.float64)
+        if self.method == 'relative':
+            arr /= batch.lengths[:, None]
+        elif self.method != 'absolute':
+            raise ValueError("method must be one of %r."
+                             % ['absolute', 'relative'])
+
+        return arr
+
+    def _names(self):
+        return list(AMINO_ACIDS)
+
+
+class AAIndex1Transformer(_IndexTransformer):
+    """AAIndex1 features with a column schema and scaling fixed at fit.
+
+    Parameters
+    ----------
+
+    standardize : string, default='none'
+        'none', 'zscore' or 'minmax' scaling learned at fit.
+
+    start : int, default=1
+        Determines the starting point of the amino acid sequence.
+
+    end : int, default=None
+        Determines the end point of the amino acid sequence.
+
+    drop_zero : bool, default=False
+        Also remove all-zero columns if standardize='none' (they are always
+        removed otherwise).
+
+    n_jobs : int, default=None
+        Number of worker processes (see aaindex1).
+
+    Attributes
+    ----------
+
+    columns_ : ndarray
+        Indices of the retained AAIndex1 indices.
+
+    feature_names_ : ndarray
+        Descriptions of the retained indices.
+
+    scaler_ : StandardScaler, MinMaxScaler or None
+        Fitted scaler.
+
+    Notes
+    -----
+
+    Indices that are NaN for some training sequence are removed at fit. If an
+    inference sequence contains a residue with a NaN value for a retained
+    index, its value is NaN.
+
+    """
+
+    def __init__(self, standardize='none', start=1, end=None, drop_zero=False,
+                 n_jobs=None):
+        self.standardize = standardize
+        self.start = start
+        self.end = end
+        self.drop_zero = drop_zero
+        self.n_jobs = n_jobs
+
+    def _raw(self, batch):
+        return map_shards(_aaindex1_kernel, batch,
+                          (self.start, self.end),
+                          self.n_jobs, width=len(self._names()))
+
+    def _names(self):
+        return load_table('aaindex1')[0]
+
+
+class AAIndex2Transformer(AAIndex1Transformer):
+    """AAIndex2 features with a column schema and scaling fixed at fit.
+
+    Takes the same parameters as AAIndex1Transformer.
+    """
+
+    _table = 'aaindex2'
+
+    def _raw(self, batch):
+        return map_shards(_pair_index_kernel, batch,
+                          (self._table, self.start, self.end),
+                          self.n_jobs, width=len(self._names()))
+
+    def _names(self):
+        return load_table(self._table)[0]
+
+
+class AAIndex3Transformer(AAIndex2Transformer):
+    """AAIndex3 features with a column schema and scaling fixed at fit.
+
+    Takes the same parameters as AAIndex1Transformer.
+    """
+
+    _table = 'aaindex3'
+
+
+class TableTransformer(AAIndex1Transformer):
+    """Features of a registered table with a column schema and scaling fixed
+    at fit.
+
+    Parameters
+    ----------
+
+    table : string
+        Name of a table added with register_table (or of a bundled table).
+
+    Takes the remaining parameters of AAIndex1Transformer.
+    """
+
+    def __init__(self, table, standardize='none', start=1, end=None, 
+                 drop_zero=False, n_jobs=None):
+        self.table = table
+        self.standardize = standardize
+        self.start = start
+        self.end = end
+        self.drop_zero = drop_zero
+        self.n_jobs = n_jobs
+
+    def _raw(self, batch):
+        return map_shards(_table_kernel, batch,
+                          (self.table, self.start, self.end),
+                          self.n_jobs, width=len(self._names()))
+
+    def _names(self):
+        return load_table(self.table)[0]
+
+
+class NGramTransformer(TransformerMixin, BaseEstimator):
+    """N-gram composition with a vocabulary fixed at fit.
+
+    Parameters
+    ----------
+
+    ngram : int, default=2
+        Integer denoting the desired n-gram composition (1-14).
+
+    gap : int, default=0
+        Number of positions skipped between consecutive residues of an n-gram.
+
+    start : int, default=1
+        Determines the starting point of the amino acid sequence.
+
+    end : int, default=None
+        Determines the end point of the amino acid sequence.
+
+    sparse : bool, default=False
+        Return a scipy.sparse CSR matrix instead of a dense array.
+
+    n_jobs : int, default=None
+        Number of worker processes (see ngram_composition).
+
+    Attributes
+    ----------
+
+    vocabulary_ : ndarray
+        Sorted base-20 ids of the n-grams present in the training sequences.
+
+    feature_names_ : ndarray
+        The n-grams as strings, e.g. 'AC'.
+
+    Notes
+    -----
+
+    N-grams that were not seen at fit are ignored by transform.
+
+    """
+
+    def __init__(self, ngram=2, gap=0, start=1, end=None, sparse=False,
+                 n_jobs=None):
+        self.ngram = ngram
+        self.gap = gap
+        self.start = start
+        self.end = end
+        self.sparse = sparse
+        self.n_jobs = n_jobs
+
+    def _triplets(self, X):
+        "(n_samples, rows, ids, counts) of all n-grams of X"
+
+        if not 1 <= self.ngram <= 14:
+            raise ValueError("ngram must be an integer between 1-14.")
+        return _ngram_triplets(_to_batch(X), self.ngram, self.gap, 
+                               self.start, self.end, self.n_jobs)
+
+    def _matrix(self, n_samples, rows, cols, counts):
+        "Assemble the output matrix from (row, column, count) triplets"
+
+        shape = (n_samples, len(self.vocabulary_))
+        if self.sparse:
+            return sparse.csr_matrix((counts.astype(np.float64),
+                                      (rows, cols)), shape=shape)
+        arr = np.zeros(shape)
+        arr[rows, cols] = counts
+
+        return arr
+
+    def fit(self, X, y=None):
+        "Learn the n-gram vocabulary of X"
+
+        self.fit_transform(X)
+
+        return self
+
+    def fit_transform(self, X, y=None):
+        "Learn the n-gram vocabulary of X and return its n-gram counts"
+
+        n_samples, rows, ids, counts = self._triplets(X)
+        self.vocabulary_, cols = np.unique(ids, return_inverse=True)
+        self.feature_names_ = kmer_to_string(self.vocabulary_, self.ngram,
+                                            self.gap)
+
+        return self._matrix(n_samples, rows, cols, counts)
+
+    def transform(self, X):
+        """Count the n-grams of the fitted vocabulary.
+
+        Parameters
+        ----------
+
+        X : Pandas DataFrame, SequenceBatch or array-like of strings
+            The column containing protein or peptide sequences must be
+            labeled 'Sequence'.
+
+        Returns
+        -------
+
+        arr : ndarray or scipy.sparse.csr_matrix of shape
+              (n_samples, n_vocabulary)
+
+        """
+
+        check_is_fitted(self, 'vocabulary_')
+        n_samples, rows, ids, counts = self._triplets(X)
+
+        # map ids to columns and drop n-grams that were not seen at fit
+        cols = np.searchsorted(self.vocabulary_, ids)
+        cols[cols == len(self.vocabulary_)] = 0
+        known = self.vocabulary_[cols] == ids if len(self.vocabulary_) else\
+                np.zeros(len(ids), dtype=bool)
+
+        return self._matrix(n_samples, rows[known], cols[known], counts[known])
+
+    def get_feature_names_out(self, input_features=None):
+        "The n-grams of the fitted vocabulary"
+
+        check_is_fitted(self, 'vocabulary_')
+
+        return self.feature_names_.astype(object)
+
+
+class LengthTransformer(TransformerMixin, BaseEstimator):
+    """One-hot encoded length bins with bin edges learned at fit.
+
+    Parameters
+    ----------
+
+    bins : int or array-like, default=10
+        Number of bins, placed according to strategy, or increasing integer
+        edges e_1, ..., e_k delimiting the k+1 bins <e_1, e_1 to e_2-1, ..., 
+        >=e_k.
+
+    strategy : string, default='quantile'
+        Only applies if bins is an integer.
+
+        'quantile' : bin edges at the quantiles of the training lengths
+        'uniform' : bins of equal width between the shortest and longest 
+                    training sequence
+
+    sparse : bool, default=False
+        Return a scipy.sparse CSR matrix instead of a dense array.
+
+    Attributes
+    ----------
+
+    edges_ : ndarray
+        Inner bin edges. Duplicate quantiles are merged, so there may be fewer
+        than bins bins.
+
+    feature_names_ : ndarray
+        Names of the bins, e.g. '<10', '10-49', '>=50'.
+
+    Notes
+    -----
+
+    The first and last bin are open, so lengths outside the training range
+    fall into them.
+
+    """
+
+    def __init__(self, bins=10, strategy='quantile', sparse=False):
+        self.bins = bins
+        self.strategy = strategy
+        self.sparse = sparse
+
+    def fit(self, X, y=None):
+        "Learn the bin edges from the lengths of X"
+
+        self.edges_ = _length_edges(_to_batch(X).lengths, self.bins,
+                                    self.strategy)
+        self.feature_names_ = _length_bin_names(self.edges_)
+
+        return self
+
+    def transform(self, X):
+        """One-hot encode the length bins of X.
+
+        Parameters
+        ----------
+
+        X : Pandas DataFrame, SequenceBatch or array-like of strings
+            The column containing protein or peptide sequences must be
+            labeled 'Sequence'.
+
+        Returns
+        -------
+
+        arr : ndarray or scipy.sparse.csr_matrix of shape 
+              (n_samples, n_bins)
+
+        """
+
+        check_is_fitted(self, 'edges_')
+        cols = np.searchsorted(self.edges_, _to_batch(X).lengths, 
+                               side='right')
+        shape = (len(cols), len(self.feature_names_))
+        if self.sparse:
+            return sparse.csr_matrix((np.ones(len(cols)), cols, 
+                                      np.arange(len(cols)+1)), shape=shape)
+        arr = np.zeros(shape)
+        arr[np.arange(len(cols)), cols] = 1
+
+        return arr
+
+    def get_feature_names_out(self, input_features=None):
+        "Names of the length bins"
+
+        check_is_fitted(self, 'edges_')
+
+        return self.feature_names_.astype(object)
@@ -1,15 +1,36 @@
 # Author: Thomas Dorfer <thomas.a.dorfer@gmail.com>
 
 import pandas as pd
-import seaborn as sns
-import matplotlib as mpl
-from collections import Counter
-from protlearn.feature_engineering import ngram_composition
+from protlearn.summary import DatasetSummary, summarize
 
 
-# set sns style settings
-sns.set(font_scale=1.3)
-sns.set_style('white', {'axes.spines.top': False, 'axes.spines.right': False})
+# seaborn style of all plots
+STYLE = {'axes.spines.top': False, 'axes.spines.right': False}
+
+
+def _barplot(x, y, colors, order, data=None):
+    """Bar plot colored by bar height with the coolwarm palette.
+
+    seaborn and matplotlib are imported on first use, and the style is only
+    applied to this plot instead of changing global settings.
+    """
+
+    import seaborn as sns
+    import matplotlib as mpl
+
+    with sns.axes_style('white', STYLE), sns.plotting_context(font_scale=1.3):
+        return sns.barplot(x=x, y=y, data=data, order=order,
+                           palette=mpl.cm.ScalarMappable(cmap='coolwarm').\
+                           to_rgba(colors))
+
+
+def _summary(X, ngrams=()):
+    "Summarize X, unless it is a DatasetSummary already"
+
+    if isinstance(X, DatasetSummary):
+        return X
+    return summarize(X, ngrams)
+
 
 def viz_length(X, method='absolute', sort=True, get_data=False, plot=True):
     """Bar plot of the length of a sequence or set of sequences. 
@@ -21,9 +42,11 @@ def viz_length(X, method='absolute', sort=True, get_data=False, plot=True):
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch, iterator of Pandas DataFrames or
+        DatasetSummary
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. An iterator of DataFrames (e.g. from read_chunks) is
+        summarized chunk by chunk in a single pass.
 
     method : string, default='absolute'
 
@@ -56,14 +79,10 @@ def viz_length(X, method='absolute', sort=True, get_data=False, plot=True):
 
     """
 
-    len_all = [len(seq) for seq in X['Sequence']]
-    len_unique = list(set(len_all))
-    len_dict = {str(len_unique[i]): len_all.count(x) for i, x in\
-                enumerate(len_unique)}
-    lengths = list(len_dict.values())
-    
-    columns = [i for i in list(len_dict.keys())]
-    df = pd.DataFrame(data=[lengths], columns=columns, index=['Frequency'])
+    # length histogram of the entire dataset
+    lengths = _summary(X).lengths()
+    df = pd.DataFrame(data=[lengths.values], columns=lengths.index.astype(str),
+                      index=['Frequency'])
     df = df.reindex(sorted(df.columns), axis=1)
     
     if method == 'relative':
@@ -81,9 +100,7 @@ def viz_length(X, method='absolute', sort=True, get_data=False, plot=True):
         elif method == 'absolute':
             ylabel = 'Absolute Frequency'
 
-        ax = sns.barplot(x=df.columns, y=df.iloc[0], 
-                         palette=mpl.cm.ScalarMappable(cmap='coolwarm').\
-                         to_rgba(df.iloc[0]), order=df.columns)
+        ax = _barplot(df.columns, df.iloc[0], df.iloc[0], df.columns)
         ax.set_xlabel('Length [amino acids]', fontsize=15, labelpad=10)
         ax.set_ylabel(ylabel, fontsize=15, labelpad=10)
     
@@ -101,9 +118,11 @@ def viz_composition(X, method='absolute', sort=True, get_data=False, plot=True):
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch, iterator of Pandas DataFrames or
+        DatasetSummary
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. An iterator of DataFrames (e.g. from read_chunks) is
+        summarized chunk by chunk in a single pass.
 
     method : string, default='absolute'
 
@@ -135,10 +154,10 @@ def viz_composition(X, method='absolute', sort=True, get_data=False, plot=True):
 
     """
 
-    all_aa = [aa for seq in X['Sequence'] for aa in seq]
-    aa_dict= Counter(all_aa)
-    df = pd.DataFrame({'Amino Acid': list(aa_dict.keys()),\
-                       'Frequency': list(aa_dict.values())})
+    # amino acid counts of the entire dataset
+    counts = _summary(X).composition()
+    df = pd.DataFrame({'Amino Acid': counts.index, 'Frequency': counts.values})
+    df = df[df['Frequency'] > 0]
     df = df.sort_values(by='Amino Acid').reset_index(drop=True)
 
     if sort == True:
@@ -150,12 +169,8 @@ def viz_composition(X, method='absolute', sort=True, get_data=False, plot=True):
         
     if plot==True:
         # plotting
-        ax = sns.barplot(x='Amino Acid', 
-                         y='Frequency', 
-                         data=df, 
-                         palette=mpl.cm.ScalarMappable(cmap='coolwarm').\
-                         to_rgba(df['Frequency']),
-                         order=df['Amino Acid'])
+        ax = _barplot('Amino Acid', 'Frequency', df['Frequency'], 
+                      df['Amino Acid'], data=df)
 
         ax.set_xlabel('Amino Acid',
                       fontsize=15, 
@@ -183,9 +198,11 @@ def viz_ngram(X, ngram=2, top=100, method='absolute', sort=True, get_data=False,
     Parameters
     ----------
 
-    X : Pandas DataFrame 
+    X : Pandas DataFrame, SequenceBatch, iterator of Pandas DataFrames or
+        DatasetSummary
         The column containing protein or peptide sequences must be labeled
-        'Sequence'.
+        'Sequence'. An iterator of DataFrames (e.g. from read_chunks) is
+        summarized chunk by chunk in a single pass.
 
     ngram : int, default=2
         Integer denoting the desired n-gram composition.
@@ -231,9 +248,8 @@ def viz_ngram(X, ngram=2, top=100, method='absolute', sort=True, get_data=False,
     combination divided by the total ngram combinations. 
 
     """
-    # compute ngram composition and get sum
-    ng = ngram_composition(X, ngram)
-    ng_sum = ng.sum()
+    # ngram counts of the entire dataset
+    ng_sum = _summary(X, (ngram, )).ngram_counts(ngram)
     
     # build dataframe
     df = pd.DataFrame(data=[ng_sum], columns=ng_sum.index, index=['Frequency'])
@@ -259,13 +275,13 @@ def viz_ngram(X, ngram=2, top=100, method='absolute', sort=True, get_data=False,
             xlabel = 'Tripeptide Composition'
         elif ngram ==4:
             xlabel = 'Quadpeptide Composition'
+        else:
+            xlabel = '%d-gram Composition' % ngram
             
         first = round(len(df.columns) * (top/100))
         
-        ax = sns.barplot(x=df.columns[:first],
-                         y=df.iloc[0, :first],
-                         palette=mpl.cm.ScalarMappable(cmap='coolwarm').\
-                         to_rgba(df.iloc[0]), order=df.columns[:first])
+        ax = _barplot(df.columns[:first], df.iloc[0, :first], df.iloc[0], 
+                      df.columns[:first])
         ax.set_xlabel(xlabel, fontsize=15, labelpad = 10)
         ax.set_xticklabels(ax.get_xticklabels(), rotation=xtick_rotation)
         ax.set_ylabel(ylabel, fontsize=15, labelpad = 10)
@@ -25,10 +25,17 @@ setup(
   install_requires=[            
           'numpy',
           'pandas',
+          'scipy',
           'scikit-learn',
           'seaborn',
           'matplotlib'
       ],
+  extras_require={
+          'arrow': ['pyarrow'],
+      },
+  entry_points={
+          'console_scripts': ['protlearn=protlearn.cli:main'],
+      },
   classifiers=[
     'Development Status :: 5 - Production/Stable',      
     'Intended Audience :: Science/Research',      # Define that your audience are developers
@@ -0,0 +1,40 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/benchmarks')
+import copy
+import json
+
+from bench import random_sequences, public_functions, run, compare, main
+from bench import CASES
+
+
+def test_benchmarks(tmp_path):
+    "Test the benchmark harness on a tiny dataset"
+
+    # generated sequences
+    df = random_sequences(50, 10, 5000, median_len=350)
+    lengths = df['Sequence'].str.len()
+    assert len(df) == 50 and lengths.min() >= 10 and lengths.max() <= 5000
+    assert set(''.join(df['Sequence'])) <= set('ACDEFGHIKLMNPQRSTVWY')
+
+    # every public function has a benchmark
+    assert set(public_functions()) <= {case[0] for case in CASES.values()}
+
+    # run and compare
+    results = run(['peptide'], [20], ['composition', 'aaindex2'], repeat=1,
+                  verbose=False)
+    assert len(results['results']) == 2 and results['meta']['uncovered'] == []
+    slower = copy.deepcopy(results)
+    slower['results'][0]['time'] = 10*results['results'][0]['time'] + 1
+    rows = compare(results, slower)
+    assert [row['regression'] for row in rows] == [True, False]
+
+    # command line
+    for name, res in [('base.json', results), ('new.json', slower)]:
+        with open(str(tmp_path/name), 'w') as f:
+            json.dump(res, f)
+    assert main(['compare', str(tmp_path/'base.json'), 
+                 str(tmp_path/'base.json')]) == 0
+    assert main(['compare', str(tmp_path/'base.json'), 
+                 str(tmp_path/'new.json')]) == 1
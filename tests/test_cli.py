@@ -0,0 +1,81 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import json
+import numpy as np
+import pytest
+
+from protlearn.preprocessing import read_chunks
+from protlearn.pipeline import featurize_one, feature_names
+from protlearn.cli import main, featurize_files
+
+
+def test_cli(tmp_path):
+    "Test the protlearn featurize command"
+
+    fasta = path+'/tests/docs/test_seq.fasta'
+    seqs = list(read_chunks(fasta, 1000))[0]['Sequence']
+    features = ['length', 'composition', 'aaindex1', 'aaindex3']
+    expected = np.array([featurize_one(seq, features) for seq in seqs])
+
+    # npy shards with a manifest
+    out = str(tmp_path/'npy')
+    assert main(['featurize', fasta, '-o', out, '--format', 'npy',
+                 '--chunksize', '2', '--features'] + features + ['-q']) == 0
+    with open(os.path.join(out, 'manifest.json')) as f:
+        manifest = json.load(f)
+    assert manifest['complete']
+    assert manifest['columns'] == feature_names(features)
+    assert manifest['n_samples'] == len(seqs)
+    assert [s['first_row'] for s in manifest['shards']] == \
+           list(range(0, len(seqs), 2))
+    assert sum(s['n_residues'] for s in manifest['shards']) == \
+           sum(map(len, seqs))
+    arr = np.vstack([np.load(os.path.join(out, s['file'])) 
+                     for s in manifest['shards']])
+    np.testing.assert_allclose(arr, expected, atol=1e-10)
+
+    # resume only computes missing shards
+    os.remove(os.path.join(out, manifest['shards'][-1]['file']))
+    mtime = os.path.getmtime(os.path.join(out, manifest['shards'][0]['file']))
+    manifest = featurize_files(fasta, out, features, 'npy', 2, resume=True)
+    assert manifest['complete'] and len(manifest['shards']) == len(seqs)//2
+    assert os.path.getmtime(os.path.join(out, manifest['shards'][0]['file'])) \
+           == mtime
+    arr = np.vstack([np.load(os.path.join(out, s['file'])) 
+                     for s in manifest['shards']])
+    np.testing.assert_allclose(arr, expected, atol=1e-10)
+
+    # existing runs are not overwritten and settings must match on resume
+    with pytest.raises(ValueError):
+        featurize_files(fasta, out, features, 'npy', 2)
+    with pytest.raises(ValueError):
+        featurize_files(fasta, out, features, 'npy', 3, resume=True)
+    with pytest.raises(SystemExit):
+        main(['featurize', fasta, '-o', out, '--format', 'npy', '-q'])
+
+    # parquet shards
+    pq = pytest.importorskip('pyarrow.parquet')
+    out = str(tmp_path/'parquet')
+    manifest = featurize_files(fasta, out, features, 'parquet', 3, 
+                               dtype='float32')
+    tables = [pq.read_table(os.path.join(out, s['file'])) 
+              for s in manifest['shards']]
+    assert tables[0].column_names == feature_names(features)
+    arr = np.vstack([t.to_pandas().values for t in tables])
+    assert arr.dtype == np.float32
+    np.testing.assert_allclose(arr, expected, rtol=1e-6, atol=1e-6)
+
+    # relative compositions of a slice are divided by the full length
+    out = str(tmp_path/'start')
+    features = ['length', 'composition_relative']
+    manifest = featurize_files(fasta, out, features, 'npy', 2, start=3)
+    arr = np.vstack([np.load(os.path.join(out, s['file'])) 
+                     for s in manifest['shards']])
+    expected = [[len(seq)] + [seq[2:].count(aa)/len(seq) for aa in 
+                              'ACDEFGHIKLMNPQRSTVWY'] for seq in seqs]
+    np.testing.assert_allclose(arr, expected)
+
+    with pytest.raises(SystemExit):
+        main([])
@@ -2,6 +2,7 @@ import os
 import sys
 path = os.environ.get('TRAVIS_BUILD_DIR')
 sys.path.insert(0, path+'/protlearn')
+import numpy as np
 
 from preprocessing import txt_to_df
 from feature_engineering import composition
@@ -34,4 +35,21 @@ def test_composition():
     # test if frequences == sequence length
     all_lengths = [6, 9, 7, 6]
     for i in range(df.shape[0]):
-        assert comp_abs.iloc[i,:].sum() == all_lengths[i]
\ No newline at end of file
+        assert comp_abs.iloc[i,:].sum() == all_lengths[i]
+    # test integer counts and float32 relative compositions
+    comp_int = composition(df, 'absolute', dtype=np.int32)
+    assert comp_int.values.dtype == np.int32
+    np.testing.assert_array_equal(comp_int.values, comp_abs.values)
+    comp_32 = composition(df, 'relative', dtype=np.float32)
+    assert comp_32.values.dtype == np.float32
+    
+    # test per-sequence start and end
+    starts, ends = [1, 2, 3, 1], [6, 5, 7, 3]
+    comp_seq = composition(df, start=starts, end=ends)
+    for i in range(df.shape[0]):
+        sliced = df.iloc[[i]].copy()
+        sliced['Sequence'] = df['Sequence'][i][starts[i]-1:ends[i]]
+        ref = composition(sliced)
+        np.testing.assert_array_equal(comp_seq.loc[i, ref.columns], 
+                                      ref.values[0])
+        assert comp_seq.loc[i].sum() == ref.values.sum()
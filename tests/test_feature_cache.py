@@ -0,0 +1,63 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+import pytest
+
+from protlearn.feature_engineering import composition, aaindex1, aaindex2
+from protlearn.feature_engineering import ngram_composition
+from protlearn.cache import FeatureCache
+from protlearn.tables import load_table
+
+
+def test_feature_cache(tmp_path):
+    "Test the persistent per-sequence feature cache"
+
+    X = pd.DataFrame(['ARKLY', 'EERKPGL', 'WWRPA', 'ARKLY'], 
+                     columns=['Sequence'])
+    X_new = pd.DataFrame(['ARKLY', 'MKTAYIAK'], columns=['Sequence'])
+    cache = FeatureCache(str(tmp_path/'features.db'))
+
+    # cached results equal uncached results, also when read back
+    for _ in range(2):
+        pd.testing.assert_frame_equal(aaindex1(X, 'zscore', cache=cache), 
+                                      aaindex1(X, 'zscore'))
+    info = cache.info()
+    assert info['misses'] == 4 and info['hits'] == 4 
+    assert info['entries'] == 3
+
+    # only new sequences are computed
+    pd.testing.assert_frame_equal(aaindex1(X_new, cache=cache), aaindex1(X_new))
+    assert cache.info()['misses'] == 5 and cache.info()['entries'] == 4
+
+    # features, parameters and slices have their own rows
+    for kwargs in [{}, {'start': 2, 'end': 4}, {'method': 'relative'}]:
+        pd.testing.assert_frame_equal(composition(X, cache=cache, **kwargs), 
+                                      composition(X, **kwargs))
+    pd.testing.assert_frame_equal(aaindex2(X, cache=cache), aaindex2(X))
+    for ngram in [2, 3]:
+        ref = ngram_composition(X, ngram=ngram)
+        pd.testing.assert_frame_equal(ngram_composition(X, ngram=ngram, 
+                                                        cache=cache), ref)
+        pd.testing.assert_frame_equal(ngram_composition(X, ngram=ngram, 
+                                                        cache=cache), ref)
+
+    # the cache persists across instances
+    cache.close()
+    cache = FeatureCache(str(tmp_path/'features.db'))
+    aaindex1(X, cache=cache)
+    assert cache.info()['hits'] == 4 and cache.info()['misses'] == 0
+
+    # least recently used rows are evicted beyond max_bytes
+    row = len(load_table('aaindex1')[0]) * 8
+    small = FeatureCache(str(tmp_path/'small.db'), max_bytes=2*row)
+    aaindex1(X, cache=small)
+    assert small.info()['entries'] == 2 and small.info()['nbytes'] <= 2*row
+    small.clear()
+    assert small.info() == {'hits': 0, 'misses': 0, 'entries': 0, 
+                            'nbytes': 0, 'max_bytes': 2*row}
+
+    with pytest.raises(ValueError):
+        aaindex1(X, window=2, cache=cache)
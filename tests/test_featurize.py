@@ -0,0 +1,57 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+
+from preprocessing import txt_to_df
+from pipeline import featurize
+from feature_engineering import composition, aaindex1, aaindex2, aaindex3,\
+                                ngram_composition
+
+
+def test_featurize():
+    "Test multi-feature extraction"
+    
+    # load data
+    df = txt_to_df(path+'/tests/docs/test_seq.txt', 0)
+    
+    # test default features
+    feats = featurize(df)
+    assert feats.shape == (4, 1+20+553+94+43)
+    assert feats.columns[0] == 'length'
+    assert np.array_equal(feats['length'], np.array([6, 9, 7, 6]))
+    
+    # test column order and values
+    feats = featurize(df, ['ngram2', 'composition', 'aaindex1'])
+    comp = composition(df)
+    aaind1 = aaindex1(df)
+    ngram = ngram_composition(df, 2)
+    assert list(feats.columns[:ngram.shape[1]]) ==\
+           ['ngram2_'+col for col in ngram.columns]
+    np.testing.assert_array_equal(feats['composition_A'], comp['A'])
+    np.testing.assert_array_equal(feats['aaindex1_ANDN920101'], 
+                                  aaind1['ANDN920101'])
+    assert feats.shape[1] == ngram.shape[1] + comp.shape[1] + aaind1.shape[1]
+    
+    # fused pair tables give the same blocks as the individual functions
+    for standardize in ['none', 'zscore']:
+        feats = featurize(df, ['aaindex3', 'length', 'aaindex2'], 
+                          standardize=standardize)
+        for name, func in [('aaindex2', aaindex2), ('aaindex3', aaindex3)]:
+            arr = func(df, standardize)
+            np.testing.assert_array_equal(
+                feats[[name+'_'+col for col in arr.columns]], arr)
+        assert feats.shape[1] == 1 + aaindex2(df, standardize).shape[1] + \
+                                 aaindex3(df, standardize).shape[1]
+
+    # test standardization
+    feats = featurize(df, ['aaindex3'], standardize='minmax')
+    assert round(feats.min().min()) == 0 and round(feats.max().max()) == 1
+    
+    # test unknown feature
+    try:
+        featurize(df, ['aaindex4'])
+        assert False
+    except ValueError:
+        pass
@@ -0,0 +1,50 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+import pytest
+
+from protlearn.preprocessing import read_chunks
+from protlearn.pipeline import featurize_one, feature_names, featurize_into
+
+
+def test_featurize_into(tmp_path):
+    "Test writing features into preallocated and memory-mapped arrays"
+
+    # load data
+    df = pd.read_csv(path+'/tests/docs/test_seq.txt', header=None, 
+                     names=['Sequence'])
+    features = ['length', 'composition', 'aaindex1', 'aaindex2']
+    expected = np.array([featurize_one(seq, features) 
+                         for seq in df['Sequence']])
+
+    # memory-mapped .npy file, written chunk by chunk
+    npy = str(tmp_path/'features.npy')
+    arr = featurize_into(df, npy, features, chunksize=2)
+    assert isinstance(arr, np.memmap)
+    assert arr.shape == (len(df), len(feature_names(features)))
+    np.testing.assert_allclose(arr, expected, atol=1e-10)
+    np.testing.assert_allclose(np.load(npy, mmap_mode='r'), expected, 
+                               atol=1e-10)
+
+    # preallocated array with a different dtype, several workers
+    out = np.zeros((len(df), len(feature_names(features))), dtype=np.float32)
+    assert featurize_into(df, out, features, n_jobs=2) is out
+    np.testing.assert_allclose(out, expected, rtol=1e-6, atol=1e-6)
+
+    # iterator of chunks
+    chunks = read_chunks(path+'/tests/docs/test_seq.txt', chunksize=3)
+    arr = featurize_into(chunks, str(tmp_path/'chunks.npy'), features,
+                         n_samples=len(df))
+    np.testing.assert_allclose(arr, expected, atol=1e-10)
+
+    # shapes must match
+    with pytest.raises(ValueError):
+        featurize_into(df, np.zeros((len(df)+1, out.shape[1])), features)
+    with pytest.raises(ValueError):
+        featurize_into(df, np.zeros((len(df), 5)), features)
+    with pytest.raises(ValueError):
+        featurize_into(read_chunks(path+'/tests/docs/test_seq.txt'), 
+                       str(tmp_path/'x.npy'), features)
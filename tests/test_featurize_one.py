@@ -0,0 +1,44 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+import pytest
+
+from protlearn.pipeline import featurize, featurize_one, feature_names
+
+
+def test_featurize_one():
+    "Test the single-sequence fast path"
+
+    seqs = ['ARKLY', 'EERKPGL', 'CCWWR', 'MKTAYIAK']
+    features = ['length', 'composition', 'aaindex1', 'aaindex2', 'aaindex3', 
+                'ngram2']
+
+    # fixed layout of all indices
+    names = feature_names(features)
+    assert len(names) == 1+20+566+94+47+400
+    assert names[:3] == ['length', 'composition_A', 'composition_C']
+    assert len(featurize_one('A', features)) == len(names)
+
+    # equal to featurize on the columns featurize keeps
+    arr = np.array([featurize_one(seq, features) for seq in seqs])
+    arr = pd.DataFrame(arr, columns=names)
+    feats = featurize(pd.DataFrame(seqs, columns=['Sequence']), features)
+    np.testing.assert_allclose(arr[feats.columns].values, feats.values, 
+                               atol=1e-10)
+
+    # NaN columns are NaN only for sequences containing NaN residues
+    assert np.isnan(featurize_one('CDEF', ['aaindex1'])).sum() == 0
+    assert np.isnan(featurize_one('CDEFP', ['aaindex1'])).sum() == 11
+
+    # sequences too short for pairs, preallocated output, unknown residues
+    assert np.isnan(featurize_one('A', ('aaindex2', ))).all()
+    out = np.zeros((2, len(names)))
+    featurize_one('ARKLY', features, out=out[1])
+    np.testing.assert_array_equal(out[1], arr.values[0])
+    with pytest.raises(ValueError):
+        featurize_one('ARKLX')
+    with pytest.raises(ValueError):
+        featurize_one('ARKLY', ['ngram3'])
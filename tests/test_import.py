@@ -0,0 +1,43 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/benchmarks')
+
+from bench import measure_import
+
+
+def test_import():
+    "Test that optional dependencies are imported on first use only"
+
+    # importing the package loads no dependencies beyond numpy
+    _, _, modules = measure_import('import protlearn', repeat=1, memory=False)
+    assert modules == []
+
+    # features need neither scikit-learn nor the plotting libraries
+    _, _, modules = measure_import(
+        'import protlearn; protlearn.composition(["ARKLY"]); '
+        'protlearn.aaindex1(["ARKLY"])', repeat=1, memory=False)
+    assert modules == ['pandas']
+
+    # importing the plots does not change the matplotlib settings
+    _, _, modules = measure_import(
+        'import matplotlib as mpl; rc = dict(mpl.rcParams); '
+        'import protlearn.visualize; assert dict(mpl.rcParams) == rc', 
+        repeat=1, memory=False)
+    assert 'seaborn' not in modules
+
+    # standardized features import scikit-learn when needed
+    _, _, modules = measure_import(
+        'import protlearn; protlearn.aaindex1(["ARKLY", "EERKPGL"], '
+        'standardize="zscore")', repeat=1, memory=False)
+    assert 'sklearn' in modules
+
+    # without module-level __getattr__ (Python < 3.7), all functions are 
+    # imported eagerly
+    import subprocess
+    script = ("import sys; sys.version_info = (3, 6, 15)\n"
+              "import protlearn\n"
+              "assert set(protlearn.__all__) <= set(vars(protlearn))\n"
+              "from protlearn import read_chunks, viz_length\n")
+    subprocess.run([sys.executable, '-c', script], check=True, 
+                   env=dict(os.environ, PYTHONPATH=path))
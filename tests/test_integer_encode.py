@@ -30,4 +30,32 @@ def test_integer_encode():
     assert enc.shape == (4, 9)
     assert [enc[0][i] == 0 for i in [6, 7, 8]]
     assert [enc[2][i] == 0 for i in [7, 8]]
-    assert [enc[3][i] == 0 for i in [6, 7, 8]]
\ No newline at end of file
+    assert [enc[3][i] == 0 for i in [6, 7, 8]]
+    
+def test_integer_encode_options():
+    "Test truncation, left padding, unknown residues and ragged output"
+
+    # load data
+    df = txt_to_df(path+'/tests/docs/test_seq.txt', 0)
+
+    # test truncation and left padding
+    enc = integer_encode(df, padding=True, max_len=7, pad_side='left')
+    assert enc.shape == (4, 7)
+    assert enc.dtype == np.uint8
+    assert np.array_equal(enc[0], np.array([0, 1, 6, 17, 20, 10, 9]))
+    assert np.array_equal(enc[1], np.array([18, 2, 8, 11, 11, 11, 13]))
+
+    # test ragged output
+    data, offsets = integer_encode(df, ragged=True)
+    assert np.array_equal(offsets, np.array([0, 6, 15, 22, 28]))
+    assert np.array_equal(data[6:15], np.array([18, 2, 8, 11, 11, 11, 13, 5, 13]))
+
+    # test unknown residues
+    df.loc[0, 'Sequence'] = 'AXG'
+    try:
+        integer_encode(df)
+        assert False
+    except ValueError:
+        pass
+    enc = integer_encode(df, unknown=21)
+    assert np.array_equal(enc[0], np.array([1, 21, 6]))
@@ -0,0 +1,38 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pytest
+
+from feature_engineering import kmer_vocabulary, kmer_to_string, kmer_to_id
+
+
+def test_kmers():
+    "Test k-mer vocabularies and the id-string mapping"
+
+    # full vocabularies in id order, cached per n
+    vocab = kmer_vocabulary(2)
+    assert vocab.shape == (400, ) and list(vocab[:3]) == ['AA', 'AC', 'AD']
+    assert vocab[-1] == 'YY' and kmer_vocabulary(2) is vocab
+    assert not vocab.flags.writeable
+    assert list(kmer_vocabulary(2, gap=1)[:2]) == ['A.A', 'A.C']
+    assert kmer_vocabulary(3)[20*20*2 + 20*1 + 16] == 'DCT'
+
+    # ids and strings, with and without a cached vocabulary
+    for ngram in [2, 7]:
+        ids = np.array([0, 1, 20, 20**ngram - 1])
+        kmers = kmer_to_string(ids, ngram)
+        assert kmers[1] == 'A'*(ngram-1) + 'C' and kmers[2][-2:] == 'CA'
+        assert kmers[3] == 'Y'*ngram
+        np.testing.assert_array_equal(kmer_to_id(kmers), ids)
+    np.testing.assert_array_equal(kmer_to_id(kmer_to_string([5, 399], 2, 2),
+                                             gap=2), [5, 399])
+    assert kmer_to_id('AC')[0] == 1
+
+    with pytest.raises(ValueError):
+        kmer_to_id(['AC', 'AXC'])
+    with pytest.raises(ValueError):
+        kmer_to_id(['AC', 'A'])
+    with pytest.raises(ValueError):
+        kmer_vocabulary(6)
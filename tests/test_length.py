@@ -3,9 +3,11 @@ import sys
 path = os.environ.get('TRAVIS_BUILD_DIR')
 sys.path.insert(0, path+'/protlearn')
 import numpy as np
+import pandas as pd
 
 from preprocessing import txt_to_df
 from feature_engineering import length
+from protlearn.transformers import LengthTransformer
 
 
 def test_lengths():
@@ -24,4 +26,26 @@ def test_lengths():
     assert np.array_equal(len_ohe, np.array([[1., 0., 0.],
                                              [0., 0., 1.],
                                              [0., 1., 0.],
-                                             [1., 0., 0.]]))
\ No newline at end of file
+                                             [1., 0., 0.]]))    
+    # test the one-hot encoding of widely different lengths
+    lengths = [10, 30000, 10, 250]
+    X = pd.DataFrame(['A'*n for n in lengths], columns=['Sequence'])
+    ohe, columns = length(X, 'ohe', output='sparse')
+    assert ohe.shape == (4, 3) and list(columns) == [10, 250, 30000]
+    assert np.array_equal(ohe.toarray(), [[1, 0, 0], [0, 0, 1], [1, 0, 0], 
+                                          [0, 1, 0]])
+    
+    # test length bins
+    len_bin = length(df, 'bin', bins=[7, 9], output='pandas')
+    assert list(len_bin.columns) == ['<7', '7-8', '>=9']
+    assert np.array_equal(len_bin, [[1, 0, 0], [0, 0, 1], [0, 1, 0], 
+                                    [1, 0, 0]])
+    assert length(df, 'bin', bins=2).shape == (4, 2)
+    
+    # test bins learned at fit
+    transformer = LengthTransformer(bins=2).fit(df)
+    assert list(transformer.get_feature_names_out()) == ['<7', '>=7']
+    arr = transformer.transform(['ARK', 'ARKLYQ', 'ARKLYQW', 'A'*30000])
+    assert np.array_equal(arr, [[1, 0], [1, 0], [0, 1], [0, 1]])
+    transformer = LengthTransformer(bins=[100, 1000], sparse=True).fit(df)
+    assert transformer.transform(X).shape == (4, 3)
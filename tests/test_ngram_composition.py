@@ -0,0 +1,52 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+
+from preprocessing import txt_to_df
+from feature_engineering import ngram_composition
+
+
+def test_ngram_composition():
+    "Test n-gram composition"
+    
+    # load data
+    df = txt_to_df(path+'/tests/docs/test_seq.txt', 0)
+    
+    # test dipeptide composition
+    di = ngram_composition(df, 2)
+    assert di.shape == (4, 23)
+    assert di.iloc[0].sum() == 5
+    assert di['MM'][1] == 2
+    assert di['AG'][0] == 1 and di['AG'][1] == 0
+
+    # test tripeptide composition
+    tri = ngram_composition(df, 3)
+    assert tri.shape == (4, 20)
+    assert tri['MMM'][1] == 1
+    
+    # test sparse output
+    for ngram in [2, 3, 4]:
+        dense = ngram_composition(df, ngram)
+        arr, columns = ngram_composition(df, ngram, output='sparse')
+        assert list(columns) == list(dense.columns)
+        assert np.array_equal(arr.toarray(), np.asarray(dense))
+    
+    # test arbitrary n
+    pent = ngram_composition(df, 5)
+    assert pent.shape == (4, 12)
+    assert pent['CIMMM'][1] == 1
+
+    # test gapped dipeptides
+    gapped = ngram_composition(df, 2, gap=1)
+    assert gapped.shape == (4, 20)
+    assert gapped['A.T'][0] == 1
+    assert gapped['M.M'][1] == 1
+
+    # test invalid ngram
+    try:
+        ngram_composition(df, 15)
+        assert False
+    except ValueError:
+        pass
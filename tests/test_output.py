@@ -0,0 +1,77 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_engineering import length, composition, aaindex1, aaindex3
+from feature_engineering import ngram_composition, position_enrichment
+
+
+def test_output():
+    "Test output containers and dtypes of the feature functions"
+
+    X = pd.DataFrame(['ARKLY', 'EERKPGL', 'WWRPA'], columns=['Sequence'])
+
+    # counts default to the smallest signed integer type, flags to uint8
+    assert composition(X).values.dtype == np.int8
+    assert ngram_composition(X, ngram=3).values.dtype == np.int8
+    assert length(X).dtype == np.int8
+    assert length(pd.DataFrame(['A'*200], columns=['Sequence'])).dtype == \
+           np.int16
+    assert (length(X) - 6).tolist() == [-1, 1, -1]
+    assert length(X, 'ohe').dtype == np.uint8
+    assert position_enrichment(X, [1, 2], ['A', 'R']).dtype == np.uint8
+    assert composition(X, 'relative').values.dtype == np.float64
+    assert aaindex1(X).values.dtype == np.float64
+
+    # compact unsigned counts on request
+    assert composition(X, dtype='compact').values.dtype == np.uint8
+    assert ngram_composition(X, output='sparse', dtype='compact')[0].dtype \
+           == np.uint8
+    assert length(X, dtype='compact').dtype == np.uint8
+    assert length(X, 'ohe', dtype='compact').dtype == np.uint8
+
+    # explicit dtypes
+    assert length(X, dtype=np.int64).dtype == np.int64
+    assert aaindex1(X, dtype=np.float32).values.dtype == np.float32
+    assert composition(X, dtype=np.float64).values.dtype == np.float64
+
+    # containers
+    comp = composition(X)
+    np.testing.assert_array_equal(composition(X, output='numpy'), comp.values)
+    csr, cols = composition(X, output='sparse')
+    np.testing.assert_array_equal(csr.toarray(), comp.values)
+    assert list(cols) == list(comp.columns)
+    assert list(length(X, output='pandas')) == [5, 7, 5]
+    pos = position_enrichment(X, [1, 2], ['A', 'R'], output='pandas')
+    assert list(pos.columns) == ['A1', 'R2']
+    ngram = ngram_composition(X, ngram=2, output='numpy', dtype=np.int32)
+    assert ngram.dtype == np.int32 and ngram.shape == (3, 13)
+    with pytest.raises(ValueError):
+        aaindex3(X, output='list')
+    with pytest.raises(ValueError):
+        aaindex1(X, window=2, output='pandas')
+
+
+def test_output_arrow():
+    "Test Arrow output"
+
+    pa = pytest.importorskip('pyarrow')
+    X = pd.DataFrame(['ARKLY', 'EERKPGL', 'WWRPA'], columns=['Sequence'])
+
+    table = aaindex1(X, output='arrow')
+    assert isinstance(table, pa.Table)
+    np.testing.assert_array_equal(table.to_pandas().values, aaindex1(X).values)
+    comp = composition(X, output='arrow')
+    assert comp.column_names == list(composition(X).columns)
+    assert comp.schema.field('R').type == pa.int8()
+
+    # the columns reference one column-major buffer of the requested dtype
+    table = aaindex1(X, output='arrow', dtype=np.float32)
+    addresses = [table.column(j).chunks[0].buffers()[1].address 
+                 for j in range(2)]
+    assert table.schema.field(0).type == pa.float32()
+    assert addresses[1] - addresses[0] == 4*len(X)
@@ -0,0 +1,50 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+
+from protlearn.feature_engineering import composition, aaindex1, aaindex2
+from protlearn.feature_engineering import aaindex3, ngram_composition
+from protlearn.parallel import effective_n_jobs
+
+
+def test_parallel():
+    "Test that results do not depend on n_jobs"
+
+    X = pd.DataFrame(['ARKLY', 'EERKPGL', 'WWRPA', 'MKTAYIAK', 'AAAC', 
+                      'ARKLYQWE'], columns=['Sequence'])
+
+    for func in [composition, aaindex1, aaindex2, aaindex3]:
+        serial = func(X, n_jobs=1)
+        parallel = func(X, n_jobs=2)
+        pd.testing.assert_frame_equal(serial, parallel, check_exact=True)
+        pd.testing.assert_frame_equal(func(X), serial, check_exact=True)
+
+    ngram = ngram_composition(X, ngram=3, n_jobs=3)
+    pd.testing.assert_frame_equal(ngram, ngram_composition(X, ngram=3))
+    sp, cols = ngram_composition(X, ngram=2, output='sparse', n_jobs=2)
+    np.testing.assert_array_equal(sp.toarray(), ngram_composition(X)[cols])
+
+    assert effective_n_jobs(None) == 1
+    assert effective_n_jobs(-1) == os.cpu_count()
+
+
+def test_serial_without_shared_memory():
+    "Test that the serial path does not need multiprocessing.shared_memory"
+
+    import subprocess
+    script = ("import sys; sys.modules['multiprocessing.shared_memory'] = None\n"
+              "import pandas as pd\n"
+              "from protlearn.feature_engineering import aaindex1\n"
+              "X = pd.DataFrame(['ARKLY', 'AAAC'], columns=['Sequence'])\n"
+              "assert aaindex1(X, n_jobs=1).shape[0] == 2\n"
+              "try:\n"
+              "    aaindex1(X, n_jobs=2)\n"
+              "except ImportError:\n"
+              "    pass\n"
+              "else:\n"
+              "    raise AssertionError\n")
+    subprocess.run([sys.executable, '-c', script], check=True, 
+                   env=dict(os.environ, PYTHONPATH=path))
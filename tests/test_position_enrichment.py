@@ -0,0 +1,62 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_engineering import position_enrichment
+
+
+def test_position_enrichment():
+    "Test position queries and the positional one-hot encoding"
+    
+    # load data
+    df = pd.read_csv(path+'/tests/docs/test_seq.txt', header=None)
+    X = pd.DataFrame(['ARKLY', 'EERKPGL', 'WWRPA', 'RK'], columns=['Sequence'])
+    
+    # single and multiple queries
+    np.testing.assert_array_equal(position_enrichment(X, 3, 'K'), 
+                                  [1, 0, 0, 0])
+    pos = position_enrichment(X, [1, 3, 4, 7, 0, 2], 
+                              ['A', 'K', 'K', 'L', 'A', 'X'])
+    np.testing.assert_array_equal(pos, [[1, 1, 0, 0, 0, 0],
+                                        [0, 0, 1, 1, 0, 0],
+                                        [0, 0, 0, 0, 0, 0],
+                                        [0, 0, 0, 0, 0, 0]])
+    assert pos.dtype == np.uint8
+
+    # many queries match a per-query reference
+    seqs = list(df[0])
+    rng = np.random.RandomState(0)
+    positions = list(rng.randint(1, 60, 400))
+    aminoacids = list(rng.choice(list('ACDEFGHIKLMNPQRSTVWY'), 400))
+    pos = position_enrichment(pd.DataFrame(seqs, columns=['Sequence']), 
+                              positions, aminoacids)
+    ref = np.array([[len(s) >= p and s[p-1] == aa for p, aa in 
+                     zip(positions, aminoacids)] for s in seqs])
+    np.testing.assert_array_equal(pos, ref)
+
+    # positional one-hot encoding
+    onehot, columns = position_enrichment(X, method='onehot')
+    assert onehot.shape == (4, 140) and len(columns) == 140
+    assert list(columns[:2]) == ['A1', 'C1'] and columns[-1] == 'Y7'
+    np.testing.assert_array_equal(onehot.sum(axis=1).A.ravel(), [5, 7, 5, 2])
+    arr = position_enrichment(X, 3, method='onehot', output='numpy')
+    assert arr.shape == (4, 60)
+    assert arr[0, 40+8] == 1 and arr[3, 40:].sum() == 0
+
+    # non-standard residues are allowed, but never match
+    Y = pd.DataFrame(['AKXLMN', 'UKA'], columns=['Sequence'])
+    np.testing.assert_array_equal(position_enrichment(Y, 2, 'K'), [1, 1])
+    np.testing.assert_array_equal(
+        position_enrichment(Y, [3, 4, 1], ['X', 'L', 'A']), [[0, 1, 1],
+                                                             [0, 0, 0]])
+    onehot, columns = position_enrichment(Y, 3, method='onehot')
+    np.testing.assert_array_equal(onehot.sum(axis=1).A.ravel(), [2, 2])
+
+    with pytest.raises(ValueError):
+        position_enrichment(X, [1, 2], ['A'])
+    with pytest.raises(ValueError):
+        position_enrichment(X, 1, 'A', method='positional')
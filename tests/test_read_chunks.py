@@ -0,0 +1,47 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+
+from preprocessing import read_chunks
+from feature_engineering import length, composition
+
+
+def test_read_chunks():
+    "Test chunked reading of .txt and FASTA files"
+    
+    seqs = ['AGTYLK', 'VCIMMMPFP', 'LRSAHHN', 'AQEEWD']
+
+    # test .txt and FASTA files
+    for f in ['test_seq.txt', 'test_seq.fasta']:
+        chunks = list(read_chunks(path+'/tests/docs/'+f, chunksize=3))
+        assert [chunk.shape[0] for chunk in chunks] == [3, 1]
+        assert list(chunks[0]['Sequence']) + list(chunks[1]['Sequence']) == seqs
+
+    # test labels
+    chunks = list(read_chunks(path+'/tests/docs/test_seq.fasta', label=1))
+    assert len(chunks) == 1
+    assert list(chunks[0].columns) == ['Sequence', 'Label']
+    assert (chunks[0]['Label'] == 1).all()
+    
+    # test chunkwise feature computation
+    lengths = length(read_chunks(path+'/tests/docs/test_seq.fasta', 
+                                 chunksize=2))
+    assert np.array_equal(np.hstack(list(lengths)), np.array([6, 9, 7, 6]))
+    comp = list(composition(read_chunks(path+'/tests/docs/test_seq.txt', 
+                                        chunksize=2)))
+    assert len(comp) == 2
+    assert comp[1].iloc[0].sum() == 7
+
+    # the format is detected from the first non-blank line
+    import io
+    chunks = list(read_chunks(io.StringIO('\n  \n>a\nACDK\n>b\nKKL\n')))
+    assert list(chunks[0]['Sequence']) == ['ACDK', 'KKL']
+
+    # invalid arguments are reported on the call, not on the first chunk
+    import pytest
+    with pytest.raises(ValueError):
+        read_chunks(path+'/tests/docs/test_seq.txt', chunksize=0)
+    with pytest.raises(ValueError):
+        read_chunks(path+'/tests/docs/test_seq.txt', file_format='csv')
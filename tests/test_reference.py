@@ -0,0 +1,82 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+
+from preprocessing import txt_to_df
+from feature_engineering import aaindex1, aaindex2, aaindex3
+
+DOCS = path+'/protlearn/docs/'
+
+
+def _sequences():
+    "Sequences of the test file and random sequences of various lengths"
+
+    rng = np.random.RandomState(0)
+    seqs = list(txt_to_df(path+'/tests/docs/test_seq.txt', 0)['Sequence'])
+    seqs += [''.join(rng.choice(list('ACDEFGHIKLMNPQRSTVWY'), n))
+             for n in [2, 3, 17, 64, 250, 1000]]
+
+    return pd.DataFrame(seqs, columns=['Sequence'])
+
+
+def _reference_aaindex1(X):
+    "Per-sequence loop of the original aaindex1"
+
+    aaind1 = pd.read_csv(DOCS+'aaindex1.csv')
+    arr = np.zeros((len(X), aaind1.shape[0]))
+    for i, sequence in enumerate(X['Sequence']):
+        tmp_arr = np.zeros((aaind1.shape[0], len(sequence)))
+        for j, aa in enumerate(sequence):
+            tmp_arr[:,j] = np.asarray(aaind1[aa])
+        arr[i,:] = tmp_arr.mean(axis=1)
+
+    return pd.DataFrame(arr, columns=aaind1['Description'].values)
+
+
+def _reference_pairs(X, name):
+    "Per-sequence loop of the original aaindex2 and aaindex3"
+
+    frames = []
+    for shape in ['lowtri', 'square']:
+        index = pd.read_csv(DOCS+'%s_%s.csv' % (name, shape))
+        desc = [index['Description'][i] for i in
+                np.arange(0, index.shape[0], 20)]
+        index = index.drop(['Description', 'Amino Acids'], axis=1)
+        inds = np.arange(0, index.shape[0], 20)
+        aa_dict = {aa: i for i, aa in enumerate(index.columns)}
+        values = index.values
+
+        arr = np.zeros((len(X), len(desc)))
+        for a, sequence in enumerate(X['Sequence']):
+            conpot = np.zeros((len(sequence)-1, len(desc)))
+            for i in range(len(sequence)-1):
+                aa1, aa2 = aa_dict[sequence[i]], aa_dict[sequence[i+1]]
+                if shape == 'lowtri' and aa1 < aa2:
+                    aa1, aa2 = aa2, aa1
+                conpot[i,:] = values[aa1+inds, aa2]
+            arr[a,:] = conpot.mean(axis=0)
+        frames.append(pd.DataFrame(arr, columns=desc))
+
+    return pd.concat(frames, axis=1)
+
+
+def test_reference():
+    "Test that aaindex1-3 match the original per-sequence computations"
+
+    X = _sequences()
+
+    # the mean over residues is summed in a different order
+    aaind1 = aaindex1(X)
+    expected = _reference_aaindex1(X)[aaind1.columns]
+    pd.testing.assert_frame_equal(aaind1, expected, check_exact=False,
+                                  rtol=1e-12)
+
+    # the mean over pairs is bit-identical
+    for name, func in [('aaindex2', aaindex2), ('aaindex3', aaindex3)]:
+        arr = func(X)
+        expected = _reference_pairs(X, name).dropna(axis=1)
+        assert list(arr.columns) == list(expected.columns)
+        np.testing.assert_array_equal(arr.values, expected.values)
@@ -0,0 +1,166 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+import pytest
+
+from protlearn.tables import AMINO_ACIDS, load_table, table_version,\
+                             register_table, unregister_table, _CUSTOM
+from protlearn.feature_engineering import aaindex1, aaindex3, custom_index
+from protlearn.pipeline import featurize, featurize_one, feature_names,\
+                               featurize_into
+from protlearn.transformers import TableTransformer
+from protlearn.cache import FeatureCache
+from protlearn.cli import main
+
+
+AAINDEX_ORDER = 'ARNDCQEGHILKMFPSTWYV'
+
+
+def _mean(seq, values):
+    return np.mean([values[AMINO_ACIDS.index(aa)] for aa in seq])
+
+
+def _pair_mean(seq, matrix):
+    return np.mean([matrix[AMINO_ACIDS.index(a), AMINO_ACIDS.index(b)] 
+                    for a, b in zip(seq, seq[1:])])
+
+
+def test_register_table(tmp_path):
+    "Test custom residue scales and pair matrices"
+
+    # load data
+    df = pd.read_csv(path+'/tests/docs/test_seq.txt', header=None, 
+                     names=['Sequence'])
+    seqs = list(df['Sequence'])
+    rng = np.random.default_rng(0)
+    scales = rng.normal(size=(20, 3))
+    matrix = rng.normal(size=(20, 20))
+    matrix[AMINO_ACIDS.index('W'), AMINO_ACIDS.index('W')] = np.nan
+
+    try:
+        # residue scales, also given in AAindex order
+        desc, index = register_table('scales', scales, names=['a', 'b', 'c'])
+        assert list(desc) == ['a', 'b', 'c'] and index.shape == (20, 3)
+        perm = [AMINO_ACIDS.index(aa) for aa in AAINDEX_ORDER]
+        register_table('scales2', scales[perm], order=AAINDEX_ORDER)
+        np.testing.assert_array_equal(load_table('scales2')[1], index)
+        arr = custom_index(df, 'scales')
+        assert list(arr.columns) == ['a', 'b', 'c']
+        np.testing.assert_allclose(arr['b'], [_mean(seq, scales[:, 1]) 
+                                              for seq in seqs])
+
+        # the bundled engine on a bundled table gives the same as aaindex1
+        pd.testing.assert_frame_equal(custom_index(df, 'aaindex1'), 
+                                      aaindex1(df))
+
+        # pair matrix, NaN columns removed as in aaindex2
+        register_table('contact', matrix)
+        assert load_table('contact')[0].tolist() == ['contact']
+        assert custom_index(['AWWC'], 'contact').shape == (1, 0)
+        assert custom_index(['AWCW'], 'contact').shape == (1, 1)
+        register_table('contact', np.nan_to_num(matrix))
+        expected = [_pair_mean(seq, np.nan_to_num(matrix)) for seq in seqs]
+        np.testing.assert_allclose(custom_index(df, 'contact')['contact'], 
+                                   expected)
+        np.testing.assert_allclose(custom_index(df, 'contact', n_jobs=2)
+                                   ['contact'], expected)
+        assert custom_index(df, 'contact', window=3).shape[2] == 1
+
+        # stacks of matrices and dipeptide tables
+        tensor = rng.normal(size=(2, 20, 20))
+        index = register_table('stack', tensor)[1]
+        np.testing.assert_array_equal(
+            register_table('stack2', index, kind='pair')[1], index)
+
+        # csv files in the layout of the bundled tables
+        scale_csv = str(tmp_path/'scales.csv')
+        pd.DataFrame(scales.T[:, perm], columns=list(AAINDEX_ORDER))\
+          .assign(Description=['x', 'y', 'z']).to_csv(scale_csv, index=False)
+        desc, index = register_table('csv_scales', scale_csv)
+        assert list(desc) == ['x', 'y', 'z']
+        np.testing.assert_allclose(index, scales)
+        pair_csv = str(tmp_path/'pairs.csv')
+        rows = pd.DataFrame(tensor.reshape(40, 20), columns=list(AMINO_ACIDS))
+        rows.insert(0, 'Amino Acids', list(AMINO_ACIDS)*2)
+        rows.insert(0, 'Description', ['m1']*20 + ['m2']*20)
+        rows.iloc[::-1].to_csv(pair_csv, index=False)
+        desc, index = register_table('csv_pairs', pair_csv)
+        assert list(desc) == ['m2', 'm1']
+        np.testing.assert_allclose(index[:, ::-1], 
+                                   tensor.reshape(2, 400).T)
+
+        # the bundled lower triangular and square csv files give aaindex3
+        bundled = aaindex3(df)
+        for shape in ['lowtri', 'square']:
+            register_table('aaindex3_'+shape, 
+                           path+'/protlearn/docs/aaindex3_%s.csv' % shape)
+            arr = custom_index(df, 'aaindex3_'+shape)
+            assert len(arr.columns) > 0
+            pd.testing.assert_frame_equal(arr, bundled[arr.columns])
+
+        # featurize, featurize_one and featurize_into use the same tables
+        features = ['scales', 'aaindex1', 'contact']
+        names = feature_names(features)
+        assert names[:4] == ['scales_a', 'scales_b', 'scales_c', 
+                             'aaindex1_ANDN920101']
+        one = np.array([featurize_one(seq, features) for seq in seqs])
+        np.testing.assert_allclose(one[:, :3], custom_index(df, 'scales'))
+        np.testing.assert_allclose(one[:, -1], expected)
+        feats = featurize(df, features)
+        np.testing.assert_allclose(pd.DataFrame(one, columns=names)
+                                   [feats.columns], feats, atol=1e-10)
+        np.testing.assert_allclose(featurize_into(df, np.empty(one.shape), 
+                                                  features), one, atol=1e-10)
+
+        # re-registering recompiles layouts and invalidates cached rows
+        cache = FeatureCache(str(tmp_path/'cache.db'))
+        version = table_version('scales')
+        custom_index(df, 'scales', cache=cache)
+        register_table('scales', 2*scales, names=['a', 'b', 'c'])
+        assert table_version('scales') != version
+        np.testing.assert_allclose(featurize_one(seqs[0], features)[:3], 
+                                   2*one[0, :3])
+        np.testing.assert_allclose(custom_index(df, 'scales', cache=cache), 
+                                   2*one[:, :3])
+        cache.close()
+
+        # names that merely start with those of other features
+        register_table('ngrams', scales)
+        np.testing.assert_allclose(featurize(df, ['ngrams', 'ngram2'])
+                                   [['ngrams_ngrams_0']].values, 
+                                   custom_index(df, 'ngrams')[['ngrams_0']])
+
+        # transformer
+        t = TableTransformer('contact', standardize='zscore').fit(df)
+        assert t.transform(df).shape == (len(df), 1)
+
+        # command line
+        out = str(tmp_path/'cli')
+        assert main(['featurize', path+'/tests/docs/test_seq.txt', '-o', out,
+                     '--format', 'npy', '--table', 'pot='+pair_csv, 
+                     '--features', 'length', 'pot', '-q']) == 0
+        shard = np.load(os.path.join(out, 'shard-00000.npy'))
+        np.testing.assert_allclose(shard[:, 1:], custom_index(df, 'pot'))
+
+        # invalid tables and names
+        for name in ['aaindex1', 'composition', 'ngram3', '']:
+            with pytest.raises(ValueError):
+                register_table(name, scales)
+        with pytest.raises(ValueError):
+            register_table('bad', np.zeros((19, 2)))
+        with pytest.raises(ValueError):
+            register_table('bad', scales, names=['a'])
+        with pytest.raises(ValueError):
+            register_table('bad', matrix, kind='pair', order='ACD')
+
+    finally:
+        for name in list(_CUSTOM):
+            unregister_table(name)
+
+    with pytest.raises(ValueError):
+        load_table('scales')
+    with pytest.raises(ValueError):
+        unregister_table('scales')
@@ -0,0 +1,52 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+
+from protlearn.preprocessing import txt_to_df, SequenceBatch
+from protlearn.feature_engineering import composition, aaindex1, aaindex2
+
+
+def test_sequence_batch():
+    "Test shared sequence batch"
+    
+    # load data
+    df = txt_to_df(path+'/tests/docs/test_seq.txt', 0)
+    batch = SequenceBatch(df)
+    
+    # test encoding
+    assert len(batch) == 4
+    assert np.array_equal(batch.lengths, np.array([6, 9, 7, 6]))
+    assert np.array_equal(batch.offsets, np.array([0, 6, 15, 22, 28]))
+    assert batch.data.dtype == np.uint8
+    assert np.array_equal(batch.data[:6], np.array([0, 5, 16, 19, 9, 8]))
+    
+    # test slicing
+    codes, lengths = batch.encode(2, 4)
+    assert np.array_equal(lengths, np.array([3, 3, 3, 3]))
+    assert np.array_equal(codes[:3], np.array([5, 16, 19]))
+    
+    # test count matrices
+    counts = batch.counts()
+    assert counts.shape == (4, 20)
+    assert np.array_equal(counts.sum(axis=1), batch.lengths)
+    assert counts[1, 10] == 3
+    dipeptides = batch.dipeptide_counts()
+    assert dipeptides.shape == (4, 400)
+    assert np.array_equal(dipeptides.sum(axis=1), batch.lengths-1)
+    assert dipeptides[1, 10*20+10] == 2
+    
+    # test that intermediates are cached
+    assert batch.counts() is counts
+    
+    # test that features are identical to those computed from the dataframe
+    for func in [composition, aaindex1, aaindex2]:
+        assert func(batch).equals(func(df))
+
+    # test unknown amino acids
+    try:
+        SequenceBatch(['AXG'])
+        assert False
+    except ValueError:
+        pass
@@ -0,0 +1,96 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+
+from protlearn.preprocessing import read_chunks
+from protlearn.feature_engineering import ngram_composition
+from protlearn.summary import DatasetSummary, summarize
+from protlearn.visualize import viz_length, viz_composition, viz_ngram
+
+
+def test_summary():
+    "Test streaming, mergeable dataset summaries"
+
+    # load data
+    df = pd.read_csv(path+'/tests/docs/test_seq.txt', header=None, 
+                     names=['Sequence'])
+
+    # counts of the whole dataset
+    summary = summarize(df, ngrams=(2, 5))
+    assert summary.n_samples == 4 and summary.n_residues == 28
+    assert summary.lengths().to_dict() == {6: 2, 7: 1, 9: 1}
+    assert summary.composition().sum() == 28
+    for n in [2, 5]:
+        pd.testing.assert_series_equal(
+            summary.ngram_counts(n), 
+            ngram_composition(df, n).sum().astype(np.int64), check_names=False)
+
+    # chunks and merged partial summaries equal a single pass
+    chunked = summarize(read_chunks(path+'/tests/docs/test_seq.txt', 
+                                    chunksize=3), ngrams=(2, 5))
+    merged = DatasetSummary((2, 5)).update(df[:1]) + \
+             pickle.loads(pickle.dumps(summarize(df[1:], ngrams=(2, 5))))
+    for other in [chunked, merged]:
+        assert other.n_samples == 4
+        np.testing.assert_array_equal(other.length_counts, 
+                                      summary.length_counts)
+        np.testing.assert_array_equal(other.residue_counts, 
+                                      summary.residue_counts)
+        for n in [2, 5]:
+            pd.testing.assert_series_equal(other.ngram_counts(n), 
+                                           summary.ngram_counts(n))
+
+    # plots accept summaries and iterators of chunks
+    lengths = viz_length(df, get_data=True, plot=False)
+    assert list(lengths.columns) == ['6', '7', '9']
+    assert list(lengths.iloc[0]) == [2, 1, 1]
+    pd.testing.assert_frame_equal(viz_length(summary, get_data=True, 
+                                             plot=False), lengths)
+    comp = viz_composition(df, get_data=True, plot=False)
+    pd.testing.assert_frame_equal(viz_composition(summary, get_data=True,
+                                                  plot=False), comp)
+    ngram = viz_ngram(read_chunks(path+'/tests/docs/test_seq.txt', 
+                                  chunksize=3), get_data=True, plot=False)
+    pd.testing.assert_frame_equal(viz_ngram(summary, get_data=True, 
+                                            plot=False), ngram)
+
+    with pytest.raises(ValueError):
+        summary.ngram_counts(3)
+    with pytest.raises(ValueError):
+        summary.merge(DatasetSummary((2, )))
+
+
+def test_summary_nonstandard():
+    "Test summaries and plots of sequences with non-standard residues"
+
+    df = pd.DataFrame({'Sequence': ['AXCA', 'UKKX', 'AC']})
+    summary = summarize(df, ngrams=(1, 2))
+    assert summary.n_residues == 10
+    assert summary.lengths().to_dict() == {2: 1, 4: 2}
+    assert summary.other_counts == {'U': 1, 'X': 2}
+    comp = summary.composition()
+    assert comp[['A', 'C', 'K', 'U', 'X']].tolist() == [3, 2, 2, 1, 2]
+    assert comp.sum() == 10
+
+    # n-grams do not span non-standard residues or sequences
+    assert summary.ngram_counts(2).to_dict() == {'AC': 1, 'CA': 1, 'KK': 1}
+    assert summary.ngram_counts(1).sum() == 7
+
+    # partial summaries merge their non-standard counts
+    merged = summarize(df[:1], ngrams=(1, 2)) + summarize(df[1:], 
+                                                          ngrams=(1, 2))
+    assert merged.other_counts == summary.other_counts
+    pd.testing.assert_series_equal(merged.ngram_counts(2), 
+                                   summary.ngram_counts(2))
+
+    # the plots handle them as before
+    lengths = viz_length(df, get_data=True, plot=False)
+    assert lengths.to_dict('list') == {'4': [2], '2': [1]}
+    comp = viz_composition(df, get_data=True, plot=False)
+    assert dict(zip(comp['Amino Acid'], comp['Frequency'])) == \
+           {'A': 3, 'C': 2, 'K': 2, 'U': 1, 'X': 2}
@@ -0,0 +1,58 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+
+import tables
+from tables import load_table, table_cache_info, clear_table_cache
+
+
+def test_tables(tmp_path, monkeypatch):
+    "Test the AAIndex table cache"
+
+    # compile tables from csv
+    monkeypatch.setattr(tables, 'CACHE_DIR', str(tmp_path))
+    clear_table_cache(binary=True)
+    desc1, aaind1 = load_table('aaindex1')
+    desc2, aaind2 = load_table('aaindex2')
+    desc3, aaind3 = load_table('aaindex3')
+
+    # test shapes
+    assert aaind1.shape == (20, 566)
+    assert aaind2.shape == (400, 94)
+    assert aaind3.shape == (400, 47)
+    assert len(desc1) == 566 and desc1[0] == 'ANDN920101'
+
+    # test some values (A, R and lower triangular pair R-A)
+    assert aaind1[0, 0] == 4.35
+    assert aaind1[14, 0] == 4.38
+    ALTS910101 = list(desc2).index('ALTS910101')
+    assert aaind2[0*20 + 14, ALTS910101] == -3.0
+    assert aaind2[14*20 + 0, ALTS910101] == -3.0
+
+    # test that tables are cached
+    info = table_cache_info()
+    assert sorted(info) == ['aaindex1', 'aaindex2', 'aaindex3']
+    assert info['aaindex1']['shape'] == (20, 566)
+    assert load_table('aaindex1')[1] is aaind1
+
+    # binary copies are only written to CACHE_DIR
+    assert sorted(os.listdir(str(tmp_path))) == \
+           sorted(name + suffix for name in info for suffix in 
+                  ['.npy', '_desc.npy'])
+    assert not [f for f in os.listdir(tables.PATH) if f.endswith('.npy')]
+
+    # test loading from binary copy
+    clear_table_cache()
+    assert table_cache_info() == {}
+    desc1_bin, aaind1_bin = load_table('aaindex1')
+    assert table_cache_info()['aaindex1']['mmap']
+    assert table_cache_info()['aaindex1']['origin'] == \
+           os.path.join(str(tmp_path), 'aaindex1.npy')
+    np.testing.assert_array_equal(aaind1_bin, aaind1)
+    np.testing.assert_array_equal(desc1_bin, desc1)
+
+    # binary copies are deleted from CACHE_DIR
+    clear_table_cache(binary=True)
+    assert os.listdir(str(tmp_path)) == []
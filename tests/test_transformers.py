@@ -0,0 +1,64 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline, FeatureUnion
+
+from protlearn.feature_engineering import composition, aaindex1, aaindex2
+from protlearn.feature_engineering import ngram_composition
+from protlearn.transformers import CompositionTransformer, AAIndex1Transformer
+from protlearn.transformers import AAIndex2Transformer, AAIndex3Transformer
+from protlearn.transformers import NGramTransformer, _IndexTransformer
+
+
+def test_transformers():
+    "Test transformers with column schemas and scalers learned at fit"
+
+    X = pd.DataFrame(['ARKLY', 'EERKPGL', 'WWRPA', 'MKTAYIAK'], 
+                     columns=['Sequence'])
+    X_new = ['AAAC', 'YYW']
+
+    # fitted outputs equal the feature functions
+    comp = CompositionTransformer()
+    np.testing.assert_array_equal(comp.fit_transform(X), composition(X).values)
+    assert list(comp.get_feature_names_out()) == list(composition(X).columns)
+    aaind1 = AAIndex1Transformer(standardize='zscore').fit(X)
+    np.testing.assert_allclose(aaind1.transform(X), 
+                               aaindex1(X, standardize='zscore').values)
+    aaind2 = AAIndex2Transformer(standardize='minmax').fit(X)
+    np.testing.assert_allclose(aaind2.transform(X),
+                               aaindex2(X, standardize='minmax').values,
+                               atol=1e-12)
+
+    # the schema is fixed at fit, also for single sequences
+    assert comp.transform(X_new).shape == (2, comp.n_features_out_)
+    np.testing.assert_array_equal(comp.transform(X_new)[:, 0], [3, 0])
+    for aaind in [aaind1, aaind2]:
+        assert aaind.transform(X_new[:1]).shape == (1, aaind.n_features_out_)
+    np.testing.assert_allclose(aaind1.transform(X_new), 
+                               aaind1.transform(np.array([X_new]).T))
+    
+    # n-gram vocabulary is fixed at fit, unseen n-grams are ignored
+    ngram = NGramTransformer(ngram=2).fit(X)
+    arr = ngram.transform(['ARWW', 'CCC'])
+    assert arr.shape == (2, ngram_composition(X).shape[1])
+    assert arr[0].sum() == 2 and arr[1].sum() == 0
+    assert ngram.set_params(sparse=True).transform(['ARWW']).nnz == 2
+
+    # transformers can be pickled and used in pipelines
+    union = Pipeline([('features', FeatureUnion([
+        ('comp', CompositionTransformer(method='relative')),
+        ('aaind3', AAIndex3Transformer(standardize='zscore', n_jobs=2))]))])
+    fitted = pickle.loads(pickle.dumps(union.fit(X)))
+    np.testing.assert_array_equal(fitted.transform(X_new), 
+                                  union.transform(X_new))
+
+    # the base class cannot be instantiated
+    try:
+        _IndexTransformer()
+        assert False
+    except TypeError:
+        pass
@@ -0,0 +1,53 @@
+import os
+import sys
+path = os.environ.get('TRAVIS_BUILD_DIR')
+sys.path.insert(0, path+'/protlearn')
+import numpy as np
+import pandas as pd
+import pytest
+
+from protlearn.feature_engineering import composition, aaindex1, aaindex2
+from protlearn.feature_engineering import aaindex3
+from protlearn.tables import load_table
+
+
+def test_window():
+    "Test sliding window profiles against profiles of the sliced sequences"
+
+    seqs = ['ARKLYWPQ', 'CDEFG', 'AC', 'MKTAYIAKQRQISFVKSH']
+    X = pd.DataFrame(seqs, columns=['Sequence'])
+    w = 4
+
+    # shapes and padding
+    comp = composition(X, window=w)
+    assert comp.shape == (4, 15, 20)
+    assert np.isnan(comp[1, 2:]).all() and np.isnan(comp[2]).all()
+    np.testing.assert_array_equal(comp[0, 1, :5], [0, 0, 0, 0, 0])
+    np.testing.assert_array_equal(comp[0, 1, [8, 9, 14, 19]], [1, 1, 1, 1])
+    rel = composition(X, method='relative', window=w)
+    np.testing.assert_array_equal(rel[0, 1, 19], 0.25)
+
+    # each window equals the index of the sliced sequence
+    for func, name in [(aaindex1, 'aaindex1'), (aaindex2, 'aaindex2'), 
+                       (aaindex3, 'aaindex3')]:
+        arr = func(X, window=w, n_jobs=None)
+        desc = load_table(name)[0]
+        assert arr.shape == (4, 15, len(desc))
+        for i, j in [(0, 0), (0, 4), (1, 1), (3, 14)]:
+            ref = func(pd.DataFrame([seqs[i][j:j+w]], columns=['Sequence']))
+            row = pd.Series(arr[i, j], index=desc)
+            np.testing.assert_allclose(row[ref.columns], ref.values[0], 
+                                       atol=1e-10)
+            assert row.isna().sum() == len(desc) - ref.shape[1]
+
+        # windows of a slice, parallel computation and standardization
+        sliced = func(X, start=2, end=7, window=w)
+        np.testing.assert_allclose(sliced[0, 0], arr[0, 1], atol=1e-10)
+        np.testing.assert_array_equal(func(X, window=w, n_jobs=2), 
+                                      func(X, window=w, n_jobs=1))
+        scaled = func(X, window=w, standardize='zscore')
+        assert np.isnan(scaled[2]).all()
+        np.testing.assert_allclose(np.nanmean(scaled[:, :, 0]), 0, atol=1e-12)
+
+    with pytest.raises(ValueError):
+        aaindex2(X, window=1)